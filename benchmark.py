@@ -0,0 +1,267 @@
+"""GUI 표시, 저장, JSON 읽기, 전체 새로고침, 실시간 시세 반영, 스냅샷 기록 성능을 측정해서 JSON으로 출력하는 벤치마크
+
+네트워크 없이 합성 시세(ReplayProvider)와 화면 없는 Qt(offscreen)를 사용하므로
+어느 환경에서나 같은 조건으로 실행할 수 있습니다. 결과 JSON을 릴리스마다 저장해 두고 비교합니다.
+
+    python benchmark.py --sizes 100 10000 100000 --out bench.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta, timezone
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtCore import PYQT_VERSION_STR, QT_VERSION_STR, QCoreApplication
+from PyQt5.QtWidgets import QApplication
+
+import metrics
+from portfolio_store import PortfolioStore
+from price_provider import ReplayProvider, synthetic_market
+from snapshot_history import SnapshotHistory
+from stock_app import StockApp
+from stock_fetch import StockFetcher
+from stock_model import StockRow, dump_rows_json, load_rows_json
+from symbol_master import Symbol, save_symbols
+
+DEFAULT_SIZES = (100, 10_000, 100_000)
+# 행 수와 관계없이 수정 지연 시간을 잴 횟수
+DEFAULT_EDITS = 50
+# 실시간 시세 반영을 측정할 종목 수와 틱 수
+LIVE_TICKERS = 500
+LIVE_TICKS = 20
+# 스냅샷 기록을 측정할 일 수(약 3년)와 최대 종목 수
+HISTORY_DAYS = 1095
+HISTORY_TICKERS = 500
+MARKET_NAMES = {".KS": "KOSPI", ".KQ": "KOSDAQ"}
+
+
+def make_rows(count):
+    """벤치마크용 포트폴리오 행을 만드는 함수 (종목코드 000000부터 차례로)"""
+    return [StockRow(f"{i:06d}", f"종목{i}", 10_000 + i, 11_000 + i, 12_000 + i)
+            for i in range(count)]
+
+
+def make_symbols(rows, path):
+    """행의 종목코드로 합성 시세와 같은 시장 정보를 가진 종목 목록 파일을 만드는 함수"""
+    save_symbols([Symbol(row.ticker, row.name, market=MARKET_NAMES[synthetic_market(row.ticker)])
+                  for row in rows], path)
+
+
+def timed(func, *args):
+    """(반환값, 걸린 시간(초))을 반환하는 함수"""
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def summarize(samples):
+    """지연 시간 목록(초)을 밀리초 단위 통계로 바꾸는 함수"""
+    samples = sorted(samples)
+    return {
+        "count": len(samples),
+        "mean_ms": statistics.fmean(samples) * 1000,
+        "p50_ms": samples[len(samples) // 2] * 1000,
+        "p95_ms": samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000,
+        "max_ms": samples[-1] * 1000,
+    }
+
+
+def process_events_until(condition, timeout):
+    """condition()이 참이 될 때까지 Qt 이벤트를 처리하는 함수 (시간 초과 시 False)"""
+    deadline = time.perf_counter() + timeout
+    while not condition():
+        if time.perf_counter() > deadline:
+            return False
+        QCoreApplication.processEvents()
+        time.sleep(0.001)
+    return True
+
+
+def bench_json(rows, directory):
+    """JSON 파일 저장/읽기 시간을 재는 함수"""
+    path = os.path.join(directory, "stock_data.json")
+    _, dump_s = timed(dump_rows_json, rows, path)
+    loaded, load_s = timed(load_rows_json, path)
+    assert len(loaded) == len(rows)
+    return path, {"json_dump_s": dump_s, "json_load_s": load_s,
+                  "json_bytes": os.path.getsize(path)}
+
+
+def bench_history(rows, directory):
+    """일별 스냅샷 기록의 덧붙이기 시간, 파일 크기, 날짜 비교/기간 조회 시간을 재는 함수
+
+    종목마다 하루 ±2% 안팎으로 움직이는 가격으로 HISTORY_DAYS일치를 덧붙입니다.
+    """
+    history = SnapshotHistory(os.path.join(directory, "portfolio_history.bin"))
+    rows = [StockRow(row.ticker, "", row.price_1yr, row.price_6mo, row.current_price)
+            for row in rows[:HISTORY_TICKERS]]
+    rng = random.Random(0)
+    start = date(2020, 1, 1)
+    samples = []
+    for day in range(HISTORY_DAYS):
+        for row in rows:
+            row.price_1yr = int(row.price_1yr * (1 + rng.gauss(0, 0.02)))
+            row.price_6mo = int(row.price_6mo * (1 + rng.gauss(0, 0.02)))
+            row.current_price = int(row.current_price * (1 + rng.gauss(0, 0.02)))
+        samples.append(timed(history.append, rows, start + timedelta(days=day))[1])
+    result = {"history_append": summarize(samples),
+              "history_bytes": os.path.getsize(history.path),
+              "history_snapshots": len(history)}
+
+    reopened = SnapshotHistory(history.path)
+    result["history_compare"] = summarize(
+        [timed(reopened.snapshot, start + timedelta(days=day))[1]
+         for day in range(0, HISTORY_DAYS, 7)])
+    result["history_series"] = summarize(
+        [timed(reopened.series, row.ticker, start, start + timedelta(days=365))[1]
+         for row in rows[:50]])
+    return result
+
+
+def bench_gui(rows, json_file, directory, args):
+    """GUI 표시, 행 수정 저장, 전체 새로고침 시간을 재는 함수"""
+    store = PortfolioStore(os.path.join(directory, "stock_data.db"))
+    _, import_s = timed(store.import_json, json_file)
+
+    symbols_file = os.path.join(directory, "krx_symbols.json")
+    make_symbols(rows, symbols_file)
+    provider = ReplayProvider(latency=args.latency, error_rate=args.error_rate)
+    fetcher = StockFetcher(cache_path=os.path.join(directory, "price_cache.db"),
+                           symbols_file=symbols_file, provider=provider)
+
+    history = SnapshotHistory(os.path.join(directory, "gui_history.bin"))
+    app, construct_s = timed(StockApp, store, fetcher, history)
+    app.show()
+    _, first_paint_s = timed(process_events_until, lambda: app.first_painted, 10)
+    # 이미 가져온 JSON은 다시 가져오지 않으므로 저장소 읽기와 모델 채우기만 측정됩니다.
+    _, load_data_s = timed(app.load_data)
+    _, repaint_s = timed(QCoreApplication.processEvents)
+    result = {
+        "store_import_json_s": import_s,
+        "window_build_s": construct_s,
+        "first_paint_s": first_paint_s,
+        "load_data_s": load_data_s,
+        "repaint_s": repaint_s,
+    }
+
+    # 행 수정 1건당 저장 지연 시간 (선택 -> 입력 -> 수정 버튼과 같은 순서)
+    samples = []
+    step = max(1, len(rows) // args.edits)
+    for position in range(0, len(rows), step)[:args.edits]:
+        index = app.proxy_model.mapFromSource(app.table_model.index(position, 0))
+        app.table.setCurrentIndex(index)
+        app.name_input.setText(f"수정{position}")
+        app.current_price_input.setText(f"{position:,} 원")
+        app.ticker_input.setText(app.table_model.row(position).ticker)
+        samples.append(timed(app.update_data)[1])
+    app.cancel_stock_data()
+    result["edit_save"] = summarize(samples)
+
+    # 전체 새로고침 (빈 시세 캐시 -> 캐시가 유효한 상태 순서로 두 번)
+    for label in ("refresh_cold", "refresh_warm"):
+        start = time.perf_counter()
+        app.refresh_all()
+        done = process_events_until(lambda: app.refresh_worker is None, args.timeout)
+        elapsed = time.perf_counter() - start
+        result[label] = {"seconds": elapsed, "completed": done,
+                         "rows_per_s": len(rows) / elapsed if elapsed else None}
+    result["provider_calls"] = provider.calls
+
+    # 실시간 시세 1틱 반영 + 다시 그리기 (틱마다 절반의 종목 가격이 바뀜)
+    tickers = list(dict.fromkeys(row.ticker for row in app.table_model.rows()))[:LIVE_TICKERS]
+    samples = []
+    for tick in range(LIVE_TICKS):
+        quotes = {ticker: 10_000 + tick * (number % 2) for number, ticker in enumerate(tickers)}
+        start = time.perf_counter()
+        app.table_model.apply_quotes(quotes)
+        QCoreApplication.processEvents()
+        samples.append(time.perf_counter() - start)
+    result["live_tick"] = summarize(samples)
+
+    app.close()
+    app.deleteLater()
+    QCoreApplication.processEvents()
+    fetcher.cache.close()
+    fetcher.resolver.close()
+    store.close()
+    return result
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, cwd=os.path.dirname(os.path.abspath(__file__)),
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args):
+    app = QApplication.instance() or QApplication([sys.argv[0]])
+    results = []
+    for size in args.sizes:
+        rows = make_rows(size)
+        metrics.registry.reset()
+        with tempfile.TemporaryDirectory() as directory:
+            json_file, result = bench_json(rows, directory)
+            result.update(bench_gui(rows, json_file, directory, args))
+            result.update(bench_history(rows, directory))
+        result["rows"] = size
+        # 같은 실행에서 계측 지점별로 기록된 지연 시간과 캐시 적중률
+        result["metrics"] = metrics.registry.snapshot()
+        results.append(result)
+        print(f"{size} rows done", file=sys.stderr)
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "qt": QT_VERSION_STR,
+            "qt_platform": app.platformName(),
+            "pyqt": PYQT_VERSION_STR,
+            "provider_latency_s": args.latency,
+            "provider_error_rate": args.error_rate,
+        },
+        "results": results,
+    }
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="한국주식 현재주가 벤치마크")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES),
+                        help="측정할 행 수 목록")
+    parser.add_argument("--edits", type=int, default=DEFAULT_EDITS,
+                        help="저장 지연 시간을 잴 수정 횟수")
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="합성 시세 제공자의 요청당 지연 시간(초)")
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="합성 시세 제공자의 오류 주입 확률")
+    parser.add_argument("--timeout", type=float, default=1800,
+                        help="새로고침 한 번을 기다릴 최대 시간(초)")
+    parser.add_argument("--out", default=None, help="결과 JSON 파일 (생략하면 표준 출력)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    report = run(args)
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as file:
+            file.write(text + "\n")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
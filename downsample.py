@@ -0,0 +1,109 @@
+"""긴 가격 시계열을 화면 픽셀 수에 맞게 줄이는 함수들
+
+LTTB(Largest-Triangle-Three-Buckets)는 구간(bucket)마다 이전에 고른 점, 다음 구간의 평균과
+가장 큰 삼각형을 이루는 점을 골라서 선 모양(고점/저점)을 유지합니다.
+수십만 개 이상의 점은 먼저 min/max 단계(SeriesPyramid)로 줄여 두고, 화면에 보이는 구간만
+픽셀 수만큼 LTTB로 줄이므로 확대/이동할 때의 계산량은 전체 길이와 관계없이 화면 너비에 비례합니다.
+"""
+# 단계마다 점 수를 줄이는 비율 (묶음 하나에서 최솟값/최댓값 두 점을 남김)
+PYRAMID_FACTOR = 8
+# 이 개수보다 적은 단계는 만들지 않음
+PYRAMID_MIN_POINTS = 2048
+
+
+def lttb(x, y, threshold):
+    """LTTB로 threshold개의 점을 골라서 원래 배열의 위치(int 배열)를 반환하는 함수
+
+    x는 증가하는 순서여야 하며, 점이 threshold개 이하이면 모든 위치를 반환합니다.
+    """
+    import numpy as np
+
+    count = len(x)
+    if threshold >= count or threshold < 3:
+        return np.arange(count)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    # 처음과 마지막 점은 항상 남기고, 나머지를 threshold - 2개 구간으로 나눕니다.
+    edges = (np.arange(threshold - 1) * ((count - 2) / (threshold - 2))).astype(np.int64) + 1
+    edges[-1] = count - 1
+    # 구간별 평균은 누적합으로 한 번에 계산합니다.
+    x_sums = np.concatenate([[0.0], np.cumsum(x)])
+    y_sums = np.concatenate([[0.0], np.cumsum(y)])
+    next_edges = np.append(edges[2:], count)
+    sizes = next_edges - edges[1:]
+    x_means = (x_sums[next_edges] - x_sums[edges[1:]]) / sizes
+    y_means = (y_sums[next_edges] - y_sums[edges[1:]]) / sizes
+
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = count - 1
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        bx = x[start:end]
+        by = y[start:end]
+        # 삼각형 넓이의 2배 (부호 제외)
+        areas = np.abs((x[a] - x_means[i]) * (by - y[a]) - (x[a] - bx) * (y_means[i] - y[a]))
+        a = start + int(areas.argmax())
+        selected[i + 1] = a
+    return selected
+
+
+def minmax_indices(y, factor=PYRAMID_FACTOR):
+    """factor개씩 묶어서 묶음마다 최솟값/최댓값 위치만 남기는 함수 (위치는 순서대로)"""
+    import numpy as np
+
+    count = len(y) // factor * factor
+    if count == 0:
+        return np.arange(len(y))
+    blocks = np.asarray(y[:count]).reshape(-1, factor)
+    base = np.arange(0, count, factor)
+    low = base + blocks.argmin(axis=1)
+    high = base + blocks.argmax(axis=1)
+    # 묶음 안에서 앞에 오는 점이 먼저 오도록 정렬합니다.
+    pairs = np.sort(np.stack([low, high], axis=1), axis=1).ravel()
+    # 나누어떨어지지 않는 마지막 점들은 그대로 둡니다.
+    return np.concatenate([pairs, np.arange(count, len(y))])
+
+
+class SeriesPyramid:
+    """시계열과 min/max로 줄인 단계들을 보관하고, 보이는 구간을 픽셀 수만큼 줄여 주는 클래스"""
+
+    def __init__(self, x, y):
+        import numpy as np
+
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        self.levels = [(x, y)]
+        while len(x) >= PYRAMID_MIN_POINTS * PYRAMID_FACTOR // 2:
+            keep = minmax_indices(y)
+            x, y = x[keep], y[keep]
+            self.levels.append((x, y))
+
+    def __len__(self):
+        return len(self.levels[0][0])
+
+    def bounds(self):
+        """전체 x 범위 (점이 없으면 None)"""
+        x = self.levels[0][0]
+        return (x[0], x[-1]) if len(x) else None
+
+    def visible(self, x0, x1, points):
+        """x0~x1 구간을 points개 정도로 줄인 (x, y) 배열을 반환하는 함수
+
+        선이 화면 끝까지 이어지도록 구간 바로 바깥의 점을 하나씩 포함합니다.
+        """
+        import numpy as np
+
+        level_x, level_y = self.levels[0]
+        start = end = 0
+        # 보이는 점이 points의 2배 이상 남는 가장 작은 단계를 고릅니다.
+        for level_x, level_y in reversed(self.levels):
+            start = max(0, int(np.searchsorted(level_x, x0, side="left")) - 1)
+            end = min(len(level_x), int(np.searchsorted(level_x, x1, side="right")) + 1)
+            if end - start >= 2 * points:
+                break
+        x = level_x[start:end]
+        y = level_y[start:end]
+        keep = lttb(x, y, points)
+        return x[keep], y[keep]
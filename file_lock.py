@@ -0,0 +1,65 @@
+import os
+import time
+
+# 잠금을 기다리는 기본 시간(초)과 다시 시도하는 간격(초)
+DEFAULT_TIMEOUT = 10.0
+RETRY_INTERVAL = 0.05
+
+
+class FileLock:
+    """여러 프로세스가 함께 쓰는 파일을 위한 권고(advisory) 잠금
+
+    대상 파일 옆의 "<파일>.lock"을 잠그므로, 같은 잠금을 사용하는 프로그램끼리만 순서가 지켜집니다.
+    (GUI 여러 개, 명령줄 모드의 --update 등) with 문으로 사용합니다.
+    """
+
+    def __init__(self, path, timeout=DEFAULT_TIMEOUT):
+        self.path = path + ".lock"
+        self.timeout = timeout
+        self._file = None
+
+    def _try_lock(self):
+        if os.name == "nt":
+            import msvcrt
+            try:
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_NBLCK, 1)
+            except OSError:
+                return False
+            return True
+        import fcntl
+        try:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return False
+        return True
+
+    def acquire(self):
+        """잠금을 얻을 때까지 기다리는 함수 (timeout이 지나면 TimeoutError)"""
+        self._file = open(self.path, "a+")
+        deadline = time.monotonic() + self.timeout
+        while not self._try_lock():
+            if time.monotonic() >= deadline:
+                self._file.close()
+                self._file = None
+                raise TimeoutError(f"다른 프로그램이 파일을 사용 중입니다: {self.path}")
+            time.sleep(RETRY_INTERVAL)
+
+    def release(self):
+        if self._file is None:
+            return
+        if os.name == "nt":
+            import msvcrt
+            self._file.seek(0)
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        self._file.close()
+        self._file = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
@@ -0,0 +1,82 @@
+"""표시 통화(KRW/USD/JPY) 환율
+
+환율도 종목과 같은 시세 캐시(PriceCache)에 일봉으로 보관하므로, 캐시 유효 시간(TTL)이 지나지
+않았으면 네트워크 없이 바로 계산합니다. 1년전/6개월전 가격은 그 기준일의 환율로 바꿉니다.
+표는 열마다 환율 하나(원/통화)만 받아 두고 화면에 그리는 셀만 나누므로, 통화를 바꿀 때 행 수와
+관계없이 바로 바뀝니다.
+"""
+import threading
+import time
+
+from lookback import anchor_days
+from stock_fetch import update_price_cache
+
+# 기본 통화 (가격은 항상 원으로 저장)
+BASE_CURRENCY = "KRW"
+# 통화 -> 1통화당 원 환율 심볼 (yfinance 형식)
+FX_SYMBOLS = {"USD": "KRW=X", "JPY": "JPYKRW=X"}
+CURRENCIES = (BASE_CURRENCY,) + tuple(FX_SYMBOLS)
+# 통화별 표시 형식
+CURRENCY_FORMATS = {"KRW": "{:,.0f} 원", "USD": "${:,.2f}", "JPY": "¥{:,.0f}"}
+# 계산한 환율을 메모리에 두고 다시 쓰는 시간(초)
+FX_TTL = 60 * 60
+# 가격 필드 -> 환율 기준 (current: 최근 환율, 그 외는 lookback.HORIZONS의 기간 전 환율)
+FIELD_HORIZONS = {"price_1yr": "1Y", "price_6mo": "6M"}
+
+
+def format_money(value, currency=BASE_CURRENCY, rate=None):
+    """원 단위 값을 통화로 바꿔서 표시용 문자열로 만드는 함수 (rate: 1통화당 원)"""
+    if value is None:
+        return ""
+    if rate:
+        value = value / rate
+    return CURRENCY_FORMATS[currency].format(value)
+
+
+class FxRates:
+    """시세 캐시를 이용해서 통화별 현재/기준일 환율을 구하는 클래스 (여러 스레드에서 사용)"""
+
+    def __init__(self, cache, provider, ttl=FX_TTL):
+        self.cache = cache
+        self.provider = provider
+        self.ttl = ttl
+        self._rates = {}  # 통화 -> (계산한 시각, 환율 딕셔너리)
+        self._lock = threading.Lock()
+
+    def rates(self, currency):
+        """통화의 {"current": 최근 환율, "1Y": 1년전 환율, "6M": 6개월전 환율}을 반환하는 함수
+
+        환율은 1통화당 원이며, 원(KRW)은 모두 1입니다. 기준일 환율이 없으면 최근 환율을 씁니다.
+        """
+        import numpy as np
+
+        if currency == BASE_CURRENCY:
+            return {"current": 1.0, **{horizon: 1.0 for horizon in FIELD_HORIZONS.values()}}
+        with self._lock:
+            cached = self._rates.get(currency)
+        if cached and time.time() - cached[0] < self.ttl:
+            return cached[1]
+
+        symbol = FX_SYMBOLS[currency]
+        update_price_cache(self.cache, self.provider, symbol)
+        days, closes, _ = self.cache.pack([symbol])
+        if not len(days):
+            raise ValueError(f"{currency}: 환율 데이터가 없습니다")
+        last_day = days[-1:]
+        horizons = list(FIELD_HORIZONS.values())
+        anchors = np.concatenate([last_day] + [anchor_days(last_day, horizon)
+                                               for horizon in horizons])
+        # 기준일 당일 또는 그 이전의 마지막 환율 (일봉보다 이전이면 첫 환율)
+        index = np.maximum(np.searchsorted(days, anchors, side="right") - 1, 0)
+        values = closes[index].tolist()
+        rates = {"current": values[0], **dict(zip(horizons, values[1:]))}
+        with self._lock:
+            self._rates[currency] = (time.time(), rates)
+        return rates
+
+    def field_rates(self, currency):
+        """가격 필드별 환율 딕셔너리 (FIELD_HORIZONS에 없는 필드는 "current" 키의 최근 환율)"""
+        rates = self.rates(currency)
+        result = {field: rates[horizon] for field, horizon in FIELD_HORIZONS.items()}
+        result["current"] = rates["current"]
+        return result
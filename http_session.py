@@ -0,0 +1,212 @@
+"""시세 제공자가 함께 쓰는 HTTP 세션 (연결 재사용 + 디스크 응답 캐시)
+
+yfinance는 세션을 넘기지 않으면 요청마다 새로 접속하므로, 하나의 requests.Session을 만들어
+모든 조회(yfinance, 로컬 대체 서버)가 keep-alive 연결 풀을 함께 쓰도록 합니다.
+
+GET 응답은 URL 종류별 유효 시간(종목명 등 메타데이터: 며칠, 시세: 몇 분) 동안 SQLite 파일에
+보관해서 네트워크 없이 돌려주고, 유효 시간이 지났어도 ETag/Last-Modified가 있으면 조건부 요청을
+보내서 304 응답이면 보관한 본문을 다시 씁니다. 장중 시세(1분봉, /quotes)와 로그인/crumb 요청 등
+목록에 없는 URL은 저장하지 않습니다.
+"""
+import json
+import sqlite3
+import threading
+import time
+import urllib.parse
+
+import metrics
+from settings import http_cache_path
+
+# 연결 풀 크기 (호스트별 유지하는 연결 수, 동시에 조회하는 스레드 수 이상)
+POOL_SIZE = 8
+# 접속/응답 대기 시간(초)
+CONNECT_TIMEOUT = 5
+READ_TIMEOUT = 20
+# 접속 오류 시 다시 시도하는 횟수
+RETRIES = 2
+# 응답 캐시 유효 시간(초): 종목명 등 메타데이터와 일봉 시세
+METADATA_TTL = 3 * 24 * 60 * 60
+PRICE_TTL = 15 * 60
+# URL에 포함된 경로 -> 유효 시간 (위에서부터 처음 일치하는 항목, 없으면 저장하지 않음)
+CACHE_RULES = (
+    ("interval=1m", 0),                  # 장중 분봉 (실시간 시세)
+    ("/quotes", 0),                      # 대체 서버의 장중 시세
+    ("/finance/quoteSummary", METADATA_TTL),
+    ("/finance/search", METADATA_TTL),
+    ("/name", METADATA_TTL),
+    ("/finance/chart", PRICE_TTL),
+    ("/history", PRICE_TTL),
+    ("/batch", PRICE_TTL),
+)
+# 요청할 때마다 바뀌어서 캐시 키에서 빼는 쿼리 값 (yfinance가 종료 시각으로 현재 시각을 넣음)
+VOLATILE_PARAMS = ("period2",)
+
+
+def response_ttl(url):
+    """URL의 응답을 캐시에 보관할 시간(초)을 반환하는 함수 (0이면 보관하지 않음)"""
+    for pattern, ttl in CACHE_RULES:
+        if pattern in url:
+            return ttl
+    return 0
+
+
+def cache_key(url):
+    """URL에서 VOLATILE_PARAMS를 뺀 캐시 키를 만드는 함수
+
+    유효 시간 안에는 종료 시각만 다른 요청에 같은 응답을 돌려줍니다.
+    """
+    parts = urllib.parse.urlsplit(url)
+    query = [(key, value) for key, value in urllib.parse.parse_qsl(parts.query, keep_blank_values=True)
+             if key not in VOLATILE_PARAMS]
+    return urllib.parse.urlunsplit(parts._replace(query=urllib.parse.urlencode(query)))
+
+
+class ResponseCache:
+    """URL별 GET 응답(상태, 헤더, 본문, ETag/Last-Modified)을 SQLite 파일에 보관하는 캐시
+
+    여러 작업 스레드에서 함께 사용할 수 있도록 하나의 연결을 잠금으로 보호합니다.
+    """
+
+    def __init__(self, path):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        with self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    url TEXT PRIMARY KEY,
+                    status INTEGER NOT NULL,
+                    headers TEXT NOT NULL,
+                    body BLOB NOT NULL,
+                    stored_at REAL NOT NULL
+                )""")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def get(self, url):
+        """(상태, 헤더 딕셔너리, 본문, 저장 시각)을 반환하는 함수 (없으면 None)"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status, headers, body, stored_at FROM responses WHERE url = ?",
+                (url,)).fetchone()
+        if row is None:
+            return None
+        return row[0], json.loads(row[1]), row[2], row[3]
+
+    def put(self, url, status, headers, body, now=None):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                (url, status, json.dumps(headers), body, time.time() if now is None else now))
+
+    def touch(self, url, now=None):
+        """304 응답으로 확인한 항목의 저장 시각을 갱신하는 함수"""
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE responses SET stored_at = ? WHERE url = ?",
+                               (time.time() if now is None else now, url))
+
+    def prune(self, max_age=METADATA_TTL):
+        """max_age보다 오래된 항목을 지우는 함수"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM responses WHERE stored_at < ?",
+                               (time.time() - max_age,))
+
+
+def _adapter_class():
+    from requests.adapters import HTTPAdapter
+
+    class CachingAdapter(HTTPAdapter):
+        """연결 풀을 가진 HTTPAdapter에 디스크 응답 캐시와 기본 대기 시간을 더한 어댑터"""
+
+        def __init__(self, cache=None, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT), **kwargs):
+            super().__init__(**kwargs)
+            self.cache = cache
+            self.timeout = timeout
+
+        def _cached_response(self, request, status, headers, body):
+            from requests.models import Response
+            from requests.structures import CaseInsensitiveDict
+            from requests.utils import get_encoding_from_headers
+
+            response = Response()
+            response.status_code = status
+            response.headers = CaseInsensitiveDict(headers)
+            response.encoding = get_encoding_from_headers(response.headers)
+            response._content = body
+            response.url = request.url
+            response.request = request
+            response.connection = self
+            response.reason = "OK"
+            return response
+
+        def send(self, request, timeout=None, **kwargs):
+            # 호출하는 쪽(yfinance 등)이 정한 값 대신 설정한 대기 시간을 사용합니다.
+            timeout = self.timeout
+            ttl = response_ttl(request.url) if self.cache and request.method == "GET" else 0
+            if not ttl:
+                with metrics.timer("http_request", errors="http_errors_total"):
+                    return super().send(request, timeout=timeout, **kwargs)
+
+            key = cache_key(request.url)
+            cached = self.cache.get(key)
+            if cached is not None:
+                status, headers, body, stored_at = cached
+                if time.time() - stored_at < ttl:
+                    metrics.inc("http_cache_hits_total")
+                    return self._cached_response(request, status, headers, body)
+                # 유효 시간이 지났으면 서버에 바뀌었는지만 물어봅니다.
+                if "ETag" in headers:
+                    request.headers["If-None-Match"] = headers["ETag"]
+                if "Last-Modified" in headers:
+                    request.headers["If-Modified-Since"] = headers["Last-Modified"]
+
+            with metrics.timer("http_request", errors="http_errors_total"):
+                response = super().send(request, timeout=timeout, **kwargs)
+            if response.status_code == 304 and cached is not None:
+                metrics.inc("http_cache_revalidated_total")
+                self.cache.touch(key)
+                return self._cached_response(request, status, headers, body)
+            metrics.inc("http_cache_misses_total")
+            if (response.status_code == 200
+                    and "no-store" not in response.headers.get("Cache-Control", "")):
+                # 본문은 압축을 푼 값으로 저장하므로 전송 관련 헤더는 빼고 보관합니다.
+                headers = {key: value for key, value in response.headers.items()
+                           if key.lower() not in ("content-encoding", "content-length",
+                                                  "transfer-encoding", "connection",
+                                                  "set-cookie")}
+                self.cache.put(key, response.status_code, headers, response.content)
+            return response
+
+    return CachingAdapter
+
+
+def create_session(cache_path=http_cache_path, pool_size=POOL_SIZE,
+                   timeout=(CONNECT_TIMEOUT, READ_TIMEOUT), retries=RETRIES):
+    """연결 풀과 응답 캐시를 사용하는 requests.Session을 만드는 함수 (cache_path가 None이면 캐시 없음)"""
+    import requests
+
+    cache = None
+    if cache_path:
+        cache = ResponseCache(cache_path)
+        cache.prune()
+    adapter = _adapter_class()(cache=cache, timeout=timeout, pool_connections=pool_size,
+                               pool_maxsize=pool_size, max_retries=retries)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+_shared_session = None
+_shared_lock = threading.Lock()
+
+
+def shared_session():
+    """프로그램 전체에서 함께 쓰는 기본 설정의 세션을 반환하는 함수 (처음 호출할 때 만듦)"""
+    global _shared_session
+    with _shared_lock:
+        if _shared_session is None:
+            _shared_session = create_session()
+        return _shared_session
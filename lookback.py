@@ -0,0 +1,153 @@
+"""달력 기준 기간 수익률 계산
+
+각 종목의 마지막 거래일을 기준으로 1주/1개월/3개월/6개월/연초/1년/3년 전 날짜(기준일)를 구하고,
+그날 또는 그 이전의 마지막 거래일 종가를 이진 탐색(searchsorted)으로 찾습니다.
+모든 종목의 일봉을 하나의 배열로 이어 붙여서 전체 포트폴리오를 한 번에 계산합니다.
+"""
+import math
+
+# 기간 이름 -> (종류, 값). months는 같은 날짜(말일 보정)의 n개월 전, ytd는 전년도 마지막 날
+HORIZONS = {
+    "1W": ("days", 7),
+    "1M": ("months", 1),
+    "3M": ("months", 3),
+    "6M": ("months", 6),
+    "YTD": ("ytd", 0),
+    "1Y": ("months", 12),
+    "3Y": ("months", 36),
+}
+# CAGR과 최대 낙폭(MDD)을 계산하는 기간
+SUMMARY_HORIZON = "3Y"
+# 가장 긴 기간을 계산하는 데 필요한 일봉 기간(일) - 기준일 이전 거래일을 찾도록 여유를 둠
+HISTORY_DAYS = 3 * 366 + 14
+# CAGR을 계산하는 최소 기간(년) - 이보다 짧으면 연율화하지 않음
+MIN_CAGR_YEARS = 1.0
+
+# 종목 구간이 서로 섞이지 않도록 종목 번호마다 더하는 값 (1970년부터의 일 수보다 충분히 큼)
+_ROW_STRIDE = 1 << 20
+# 로그 가격에 종목 번호마다 더하는 값 (한 종목의 로그 가격 범위보다 충분히 큼)
+_LOG_STRIDE = 100.0
+
+
+def pack_series(series):
+    """[(날짜 목록, 종가 목록), ...]을 (일 번호, 종가, 구간 시작 위치) 배열로 이어 붙이는 함수
+
+    날짜는 ISO 문자열 또는 date이며 종목마다 날짜순이어야 합니다.
+    구간 시작 위치(offsets)는 종목 수 + 1개이며, i번째 종목은 offsets[i]:offsets[i + 1]입니다.
+    """
+    import numpy as np
+
+    lengths = [len(dates) for dates, _ in series]
+    offsets = np.zeros(len(series) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    total = int(offsets[-1])
+    days = np.empty(total, dtype=np.int64)
+    closes = np.empty(total, dtype=np.float64)
+    for i, (dates, values) in enumerate(series):
+        start, end = offsets[i], offsets[i + 1]
+        if end > start:
+            days[start:end] = np.array(dates, dtype="datetime64[D]").astype(np.int64)
+            closes[start:end] = values
+    return days, closes, offsets
+
+
+def anchor_days(last_days, horizon):
+    """마지막 거래일(1970년부터의 일 수 배열)에서 기간별 기준일을 구하는 함수"""
+    import numpy as np
+
+    kind, amount = HORIZONS[horizon]
+    last = last_days.astype("datetime64[D]")
+    if kind == "days":
+        anchors = last - amount
+    elif kind == "ytd":
+        anchors = last.astype("datetime64[Y]").astype("datetime64[D]") - 1
+    else:
+        month = last.astype("datetime64[M]")
+        day = (last - month.astype("datetime64[D]")).astype(np.int64)
+        target = month - amount
+        month_length = ((target + 1).astype("datetime64[D]")
+                        - target.astype("datetime64[D]")).astype(np.int64)
+        # 3월 31일의 1개월 전은 2월 말일처럼 말일로 맞춥니다.
+        anchors = target.astype("datetime64[D]") + np.minimum(day, month_length - 1)
+    return anchors.astype(np.int64)
+
+
+def compute_lookbacks(series):
+    """[(날짜 목록, 종가 목록), ...]의 기간 수익률을 계산하는 함수 (compute_packed 참고)"""
+    return compute_packed(*pack_series(series))
+
+
+def compute_packed(days, closes, offsets):
+    """여러 종목의 기간 수익률, CAGR, 최대 낙폭을 한 번에 계산하는 함수
+
+    입력은 pack_series 또는 PriceCache.pack이 만든 (일 번호, 종가, 구간 시작 위치) 배열이며,
+    결과는 이름 -> 종목별 값 배열(없으면 NaN) 딕셔너리입니다.
+    - last_day, last_close: 마지막 거래일(일 번호), 종가
+    - price_<기간>, return_<기간>: 기준일 종가와 그 이후 수익률 (HORIZONS의 기간마다)
+    - cagr, mdd: SUMMARY_HORIZON 동안(일봉이 더 짧으면 있는 기간)의 연평균 수익률, 최대 낙폭
+    """
+    import numpy as np
+
+    count = len(offsets) - 1
+    starts, ends = offsets[:-1], offsets[1:]
+    has_data = ends > starts
+    last_index = np.where(has_data, ends - 1, 0)
+    nan = np.full(count, np.nan)
+    if not len(days):
+        result = {"last_day": nan.copy(), "last_close": nan.copy(), "cagr": nan.copy(),
+                  "mdd": nan.copy()}
+        for horizon in HORIZONS:
+            result[f"price_{horizon}"] = nan.copy()
+            result[f"return_{horizon}"] = nan.copy()
+        return result
+
+    rows = np.repeat(np.arange(count, dtype=np.int64), ends - starts)
+    keys = rows * _ROW_STRIDE + days
+    last_days = days[last_index]
+    last_close = np.where(has_data, closes[last_index], np.nan)
+    result = {"last_day": np.where(has_data, last_days, np.nan), "last_close": last_close}
+
+    anchor_index = {}
+    for horizon in HORIZONS:
+        anchors = anchor_days(last_days, horizon)
+        # 기준일 당일 또는 그 이전의 마지막 거래일 (같은 종목 구간 안에서만)
+        index = np.searchsorted(keys, np.arange(count) * _ROW_STRIDE + anchors, side="right") - 1
+        valid = has_data & (index >= starts)
+        anchor_index[horizon] = np.where(valid, index, -1)
+        price = np.where(valid, closes[np.maximum(index, 0)], np.nan)
+        result[f"price_{horizon}"] = price
+        result[f"return_{horizon}"] = last_close / price - 1
+
+    # CAGR, MDD 구간의 시작 위치 (일봉이 기간보다 짧으면 첫 거래일)
+    window_start = np.where(anchor_index[SUMMARY_HORIZON] >= 0,
+                            anchor_index[SUMMARY_HORIZON], starts)
+    window_start = np.where(has_data, window_start, 0)
+    years = (last_days - days[window_start]) / 365.25
+    with np.errstate(divide="ignore", invalid="ignore"):
+        growth = last_close / closes[window_start]
+        result["cagr"] = np.where(has_data & (years >= MIN_CAGR_YEARS),
+                                  growth ** (1 / np.maximum(years, 1e-9)) - 1, np.nan)
+
+        # 종목마다 로그 가격에 큰 값을 더해서 누적 최댓값이 종목 경계에서 새로 시작되게 합니다.
+        shifted = np.log(closes) + rows * _LOG_STRIDE
+        in_window = np.arange(len(days)) >= window_start[rows]
+        # 구간 이전 값은 그 종목의 어떤 값보다 작고 이전 종목보다는 큰 값으로 바꿉니다.
+        shifted = np.where(in_window, shifted, rows * _LOG_STRIDE - _LOG_STRIDE / 2)
+        drawdown = np.exp(shifted - np.maximum.accumulate(shifted)) - 1
+    # 일봉이 있는 종목의 구간은 빈틈없이 이어지므로 시작 위치만으로 구간별 최솟값을 구합니다.
+    mdd = nan.copy()
+    mdd[has_data] = np.minimum.reduceat(drawdown, starts[has_data])
+    result["mdd"] = mdd
+    return result
+
+
+def lookback_rows(keys, days, closes, offsets):
+    """compute_packed 결과를 키(틱커 등) -> {이름: 값 또는 None} 딕셔너리로 바꾸는 함수"""
+    result = compute_packed(days, closes, offsets)
+    names = list(result)
+    columns = [result[name].tolist() for name in names]
+    rows = {}
+    for key, values in zip(keys, zip(*columns)):
+        rows[key] = {name: None if value is None or math.isnan(value) else value
+                     for name, value in zip(names, values)}
+    return rows
@@ -0,0 +1,128 @@
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# 시장별 야후 파이낸스 심볼 접미사
+MARKET_SUFFIXES = {"KOSPI": ".KS", "KOSDAQ": ".KQ"}
+# 어느 시장에서도 찾지 못한 종목코드를 다시 확인하기까지의 시간(초)
+NEGATIVE_TTL = 24 * 60 * 60
+
+
+class MarketResolver:
+    """6자리 종목코드가 유가증권(.KS)과 코스닥(.KQ) 중 어디에 상장되어 있는지 찾는 클래스
+
+    알 수 없는 종목코드는 두 접미사를 동시에 확인(probe)해서 먼저 유효한 쪽을 사용하고,
+    결과는 SQLite 파일에 저장합니다. 찾지 못한 결과도 NEGATIVE_TTL 동안 기억합니다.
+    probe(심볼)는 유효하면 True, 데이터가 없으면 False를 반환하고,
+    네트워크 오류 등으로 알 수 없으면 예외를 발생시켜야 합니다.
+    """
+
+    def __init__(self, path, probe, symbols=None, negative_ttl=NEGATIVE_TTL, max_workers=8):
+        self.probe = probe
+        self.symbols = symbols  # SymbolIndex (시장 정보가 있으면 확인 없이 사용)
+        self.negative_ttl = negative_ttl
+        self.max_workers = max_workers
+        self._lock = threading.Lock()
+        self._memory = {}
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS markets (
+                    ticker TEXT PRIMARY KEY,
+                    suffix TEXT,
+                    checked_at REAL NOT NULL
+                )""")
+            for ticker, suffix, checked_at in self._conn.execute("SELECT * FROM markets"):
+                self._memory[ticker] = (suffix, checked_at)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def cached(self, ticker):
+        """확인 없이 알 수 있는 심볼을 반환하는 함수
+
+        심볼 문자열, 유효하지 않은 종목코드로 기억된 경우 None,
+        아직 모르는 경우 False를 반환합니다.
+        """
+        symbol = self.symbols.get(ticker) if self.symbols is not None else None
+        if symbol is not None and symbol.market in MARKET_SUFFIXES:
+            return ticker + MARKET_SUFFIXES[symbol.market]
+        with self._lock:
+            entry = self._memory.get(ticker)
+        if entry is None:
+            return False
+        suffix, checked_at = entry
+        if suffix:
+            return ticker + suffix
+        if time.time() - checked_at < self.negative_ttl:
+            return None
+        return False
+
+    def _remember(self, ticker, suffix):
+        checked_at = time.time()
+        with self._lock, self._conn:
+            self._memory[ticker] = (suffix, checked_at)
+            self._conn.execute("INSERT OR REPLACE INTO markets VALUES (?, ?, ?)",
+                               (ticker, suffix, checked_at))
+
+    def _probe_ticker(self, executor, ticker):
+        """두 접미사를 동시에 확인하고 먼저 유효하다고 답한 쪽을 기억하는 함수"""
+        futures = {executor.submit(self.probe, ticker + suffix): suffix
+                   for suffix in MARKET_SUFFIXES.values()}
+        errors = []
+        for future in as_completed(futures):
+            try:
+                valid = future.result()
+            except Exception as e:
+                errors.append(e)
+                continue
+            if valid:
+                suffix = futures[future]
+                self._remember(ticker, suffix)
+                return ticker + suffix
+        if errors:
+            # 한쪽이라도 확인하지 못했다면 없는 종목으로 단정하지 않습니다.
+            raise errors[0]
+        self._remember(ticker, None)
+        return None
+
+    def resolve(self, ticker):
+        """종목코드의 야후 파이낸스 심볼을 반환하는 함수 (유효하지 않은 종목코드는 None)"""
+        symbol = self.cached(ticker)
+        if symbol is not False:
+            return symbol
+        executor = ThreadPoolExecutor(max_workers=len(MARKET_SUFFIXES))
+        try:
+            return self._probe_ticker(executor, ticker)
+        finally:
+            # 먼저 답한 쪽을 사용하므로 나머지 확인이 끝나기를 기다리지 않습니다.
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def resolve_many(self, tickers):
+        """여러 종목코드를 한 번에 확인해서 종목코드 -> 심볼(또는 None) 딕셔너리를 반환하는 함수
+
+        확인이 실패한 종목코드는 결과에서 빠집니다.
+        """
+        result = {}
+        unknown = []
+        for ticker in dict.fromkeys(tickers):
+            symbol = self.cached(ticker)
+            if symbol is False:
+                unknown.append(ticker)
+            else:
+                result[ticker] = symbol
+        if not unknown:
+            return result
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as probe_executor, \
+                ThreadPoolExecutor(max_workers=self.max_workers) as ticker_executor:
+            futures = {ticker_executor.submit(self._probe_ticker, probe_executor, ticker): ticker
+                       for ticker in unknown}
+            for future in as_completed(futures):
+                try:
+                    result[futures[future]] = future.result()
+                except Exception as e:
+                    print(f"Error resolving market for {futures[future]}: {e}")
+        return result
@@ -0,0 +1,189 @@
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import wraps
+
+# 지연 시간 히스토그램 구간 상한(초) - 1ms부터 약 2배씩, 마지막은 +Inf
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0)
+# Prometheus 텍스트 형식에서 지표 이름 앞에 붙이는 접두사
+PREFIX = "kor_stock_"
+
+# 적중률을 계산할 (이름, 적중 카운터, 실패 카운터) 목록
+HIT_RATES = (
+    ("price_cache", "price_cache_hits_total", "price_cache_misses_total"),
+    ("name_cache", "name_cache_hits_total", "name_cache_misses_total"),
+    ("http_cache", "http_cache_hits_total", "http_cache_misses_total"),
+)
+
+
+class Histogram:
+    """고정 구간 지연 시간 히스토그램 (합계, 개수, 최솟값, 최댓값 포함)"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def quantile(self, q):
+        """구간 안에서 선형 보간한 q 분위수(초)를 반환하는 함수 (관측값이 없으면 None)"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = self.buckets[i - 1] if i else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.max
+                value = lower + (upper - lower) * (rank - seen) / count
+                return min(max(value, self.min), self.max)
+            seen += count
+        return self.max
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "min": self.min,
+            "max": self.max,
+            "mean": self.sum / self.count if self.count else None,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            "buckets": {str(bound): count for bound, count
+                        in zip(self.buckets + ("+Inf",), self.counts)},
+        }
+
+
+class Metrics:
+    """카운터와 지연 시간 히스토그램을 모아 두는 저장소 (여러 스레드에서 함께 사용)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+        self.started_at = time.time()
+
+    def inc(self, name, amount=1):
+        """카운터를 amount만큼 올리는 함수"""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def observe(self, name, seconds):
+        """히스토그램에 지연 시간(초)을 하나 기록하는 함수"""
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.observe(seconds)
+
+    @contextmanager
+    def timer(self, name, errors=None):
+        """with 블록의 실행 시간을 name_seconds 히스토그램에 기록하는 함수
+
+        errors(카운터 이름)가 있으면 블록에서 예외가 발생했을 때 그 카운터를 올립니다.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            if errors:
+                self.inc(errors)
+            raise
+        finally:
+            self.observe(name + "_seconds", time.perf_counter() - start)
+
+    def timed(self, name, errors=None):
+        """함수 실행 시간을 기록하는 데코레이터 (timer와 같음)"""
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.timer(name, errors):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def counter(self, name):
+        with self._lock:
+            return self.counters.get(name, 0)
+
+    def histogram(self, name):
+        """히스토그램 요약(dict)을 반환하는 함수 (기록이 없으면 None)"""
+        with self._lock:
+            histogram = self.histograms.get(name)
+            return histogram.to_dict() if histogram else None
+
+    def hit_rate(self, hits, misses):
+        """적중률(0~1)을 반환하는 함수 (조회가 없으면 None)"""
+        hit_count = self.counter(hits)
+        total = hit_count + self.counter(misses)
+        return hit_count / total if total else None
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+            self.started_at = time.time()
+
+    def snapshot(self):
+        """모든 지표를 JSON으로 저장할 수 있는 dict로 반환하는 함수"""
+        with self._lock:
+            counters = dict(self.counters)
+            histograms = {name: histogram.to_dict()
+                          for name, histogram in self.histograms.items()}
+        return {
+            "started_at": self.started_at,
+            "uptime_s": time.time() - self.started_at,
+            "counters": counters,
+            "histograms": histograms,
+            "hit_rates": {name: self.hit_rate(hits, misses) for name, hits, misses in HIT_RATES},
+        }
+
+    def to_prometheus(self):
+        """Prometheus 텍스트 형식(exposition format)으로 변환하는 함수"""
+        lines = []
+        with self._lock:
+            for name, value in sorted(self.counters.items()):
+                lines.append(f"# TYPE {PREFIX}{name} counter")
+                lines.append(f"{PREFIX}{name} {value}")
+            for name, histogram in sorted(self.histograms.items()):
+                lines.append(f"# TYPE {PREFIX}{name} histogram")
+                cumulative = 0
+                for bound, count in zip(histogram.buckets + ("+Inf",), histogram.counts):
+                    cumulative += count
+                    lines.append(f'{PREFIX}{name}_bucket{{le="{bound}"}} {cumulative}')
+                lines.append(f"{PREFIX}{name}_sum {histogram.sum}")
+                lines.append(f"{PREFIX}{name}_count {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path):
+        """지표를 파일로 저장하는 함수 (확장자가 .prom 또는 .txt이면 Prometheus 형식, 그 외는 JSON)"""
+        if os.path.splitext(path)[1].lower() in (".prom", ".txt"):
+            text = self.to_prometheus()
+        else:
+            text = json.dumps(self.snapshot(), ensure_ascii=False, indent=2) + "\n"
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            file.write(text)
+        os.replace(tmp_path, path)
+
+
+# 프로그램 전체에서 함께 사용하는 기본 지표 저장소
+registry = Metrics()
+inc = registry.inc
+observe = registry.observe
+timer = registry.timer
+timed = registry.timed
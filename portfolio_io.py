@@ -0,0 +1,158 @@
+"""관심 종목 목록 가져오기/내보내기 (CSV, JSON Lines, JSON, XLSX)
+
+파일을 한 번에 읽지 않고 chunk_size 행씩 StockRow 목록으로 내보내며, 쓸 때도 한 행씩 씁니다.
+첫 행이 열 이름(FIELDS 또는 화면의 한글 열 이름)이면 그 순서를 따르고, 아니면 FIELDS 순서로 읽습니다.
+XLSX는 openpyxl이 설치되어 있을 때만 사용할 수 있습니다.
+"""
+import csv
+import json
+import os
+
+import metrics
+from stock_model import FIELDS, StockRow
+
+# 한 번에 읽어서 넘겨주는 행 수
+CHUNK_SIZE = 1000
+# 확장자 -> 형식
+FORMATS = {".csv": "csv", ".jsonl": "jsonl", ".json": "json", ".xlsx": "xlsx"}
+# 열 이름 -> 필드 (영문 필드 이름과 화면의 한글 열 이름)
+COLUMN_ALIASES = {field: field for field in FIELDS}
+COLUMN_ALIASES.update({
+    "틱커명": "ticker", "종목코드": "ticker", "종목명": "name", "1년전가격": "price_1yr",
+    "6개월전가격": "price_6mo", "현재가격": "current_price", "수량": "quantity",
+    "평균단가": "avg_cost",
+})
+
+
+def guess_format(path):
+    """파일 확장자로 형식을 정하는 함수 (알 수 없으면 ValueError)"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in FORMATS:
+        raise ValueError(f"지원하지 않는 파일 형식입니다: {path} (csv, jsonl, json, xlsx)")
+    return FORMATS[extension]
+
+
+def load_openpyxl():
+    try:
+        import openpyxl
+    except ImportError:
+        raise ValueError("XLSX 파일을 사용하려면 openpyxl을 설치해야 합니다 (pip install openpyxl)")
+    return openpyxl
+
+
+def normalize_ticker(value):
+    """스프레드시트에서 숫자로 읽힌 종목코드(5930)를 6자리 문자열(005930)로 되돌리는 함수"""
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    text = str(value).strip()
+    return text.zfill(6) if text.isdigit() and len(text) < 6 else text
+
+
+def _records_to_rows(records):
+    """값 목록(첫 행은 열 이름일 수 있음)을 StockRow로 바꾸는 제너레이터"""
+    columns = None
+    for values in records:
+        values = list(values)
+        if columns is None:
+            names = [COLUMN_ALIASES.get(str(value).strip()) if value is not None else None
+                     for value in values]
+            if "ticker" in names:
+                columns = names
+                continue
+            columns = list(FIELDS)
+        if not any(value not in (None, "") for value in values):
+            continue  # 빈 행
+        data = {field: value for field, value in zip(columns, values) if field}
+        data["ticker"] = normalize_ticker(data.get("ticker"))
+        yield StockRow.from_dict(data)
+
+
+def _iter_records(path, fmt):
+    if fmt == "csv":
+        with open(path, "r", encoding="utf-8-sig", newline="") as file:
+            yield from csv.reader(file)
+    elif fmt == "jsonl":
+        with open(path, "r", encoding="utf-8") as file:
+            yield list(FIELDS)
+            for line in file:
+                if line.strip():
+                    item = json.loads(line)
+                    yield [item.get(field) for field in FIELDS] if isinstance(item, dict) else item
+    elif fmt == "json":
+        # JSON 배열은 한 번에 읽어야 하지만 StockRow는 chunk 단위로 만듭니다.
+        with open(path, "r", encoding="utf-8") as file:
+            data = json.load(file)
+        if not isinstance(data, list):
+            raise ValueError(f"행 목록이 아닙니다: {path}")
+        yield list(FIELDS)
+        for item in data:
+            yield [item.get(field) for field in FIELDS] if isinstance(item, dict) else item
+    else:
+        workbook = load_openpyxl().load_workbook(path, read_only=True, data_only=True)
+        try:
+            yield from workbook.active.iter_rows(values_only=True)
+        finally:
+            workbook.close()
+
+
+def iter_row_chunks(path, fmt=None, chunk_size=CHUNK_SIZE):
+    """파일에서 StockRow를 chunk_size개씩 목록으로 내보내는 제너레이터"""
+    fmt = fmt or guess_format(path)
+    chunk = []
+    for row in _records_to_rows(_iter_records(path, fmt)):
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+@metrics.timed("import_read")
+def read_rows(path, fmt=None):
+    """파일의 모든 행을 StockRow 목록으로 읽는 함수"""
+    rows = []
+    for chunk in iter_row_chunks(path, fmt):
+        rows.extend(chunk)
+    return rows
+
+
+@metrics.timed("export_write")
+def write_rows(path, rows, fmt=None):
+    """StockRow를 한 행씩 파일에 쓰는 함수 (임시 파일에 쓴 뒤 교체, 쓴 행 수를 반환)"""
+    fmt = fmt or guess_format(path)
+    tmp_path = path + ".tmp"
+    count = 0
+    if fmt == "xlsx":
+        openpyxl = load_openpyxl()
+        workbook = openpyxl.Workbook(write_only=True)
+        sheet = workbook.create_sheet()
+        sheet.append(list(FIELDS))
+        for row in rows:
+            sheet.append(list(row.values()))
+            count += 1
+        workbook.save(tmp_path)
+    else:
+        # CSV는 엑셀에서 한글이 깨지지 않도록 BOM을 붙입니다.
+        encoding = "utf-8-sig" if fmt == "csv" else "utf-8"
+        with open(tmp_path, "w", encoding=encoding, newline="") as file:
+            if fmt == "csv":
+                writer = csv.writer(file)
+                writer.writerow(FIELDS)
+            elif fmt == "json":
+                file.write("[")
+            for row in rows:
+                if fmt == "csv":
+                    writer.writerow(["" if value is None else value for value in row.values()])
+                else:
+                    text = json.dumps(row.to_dict(), ensure_ascii=False)
+                    if fmt == "json":
+                        text = ("," if count else "") + "\n" + text
+                    file.write(text if fmt == "json" else text + "\n")
+                count += 1
+            if fmt == "json":
+                file.write("\n]\n")
+    os.replace(tmp_path, path)
+    return count
@@ -0,0 +1,226 @@
+import sqlite3
+
+import metrics
+from file_lock import FileLock
+from stock_model import (FIELDS, HOLDING_FIELDS, NUMERIC_FIELDS, PRICE_FIELDS, StockRow,
+                         dump_rows_json, load_rows_json, parse_price)
+
+# 저장소 스키마 버전 (PRAGMA user_version)
+# 1: 가격을 정수로 보관, 2: 보유 수량/평균 단가 추가, 3: 변경 번호(revision) 추가
+SCHEMA_VERSION = 3
+# 삭제 기록을 남겨 두는 변경 번호 수 (이보다 오래 전 상태에서는 전체를 다시 읽음)
+DELETED_ROWS_KEEP = 10000
+
+_COLUMN_TYPES = {"ticker": "TEXT NOT NULL DEFAULT ''", "name": "TEXT NOT NULL DEFAULT ''"}
+_COLUMN_TYPES.update({field: "INTEGER" for field in NUMERIC_FIELDS})
+# 버전 0의 열 (가격은 문자열)
+_V0_FIELDS = ("ticker", "name") + PRICE_FIELDS
+_INSERT_SQL = (f"INSERT INTO rows ({', '.join(FIELDS)}, revision) "
+               f"VALUES ({', '.join('?' * (len(FIELDS) + 1))})")
+
+
+class PortfolioStore:
+    """포트폴리오 행(StockRow)을 SQLite 파일에 보관하는 저장소
+
+    추가/수정/삭제는 해당 행만 하나의 트랜잭션으로 반영되며, WAL 저널을 사용하므로
+    쓰는 도중에 프로그램이 종료되어도 마지막으로 커밋된 상태가 유지됩니다.
+
+    여러 프로그램(GUI 여러 개, 명령줄 모드)이 같은 파일을 함께 쓸 수 있습니다. 쓰기 트랜잭션마다
+    변경 번호(revision)를 하나 올리고 바뀐 행에 기록하므로, 다른 프로그램의 변경은
+    data_version()으로 알아채고 changes_since()로 바뀐 행만 읽어 올 수 있습니다.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=FULL")
+        self._migrate()
+
+    def _migrate(self):
+        """스키마를 만들거나 이전 버전의 스키마를 현재 버전으로 바꾸는 함수
+
+        sqlite3 모듈은 CREATE/ALTER/DROP 앞에서 트랜잭션을 시작하지 않으므로, 중간에 종료되어도
+        이전 상태가 남도록 처음부터 쓰기 트랜잭션(BEGIN IMMEDIATE)을 열고 한 번에 커밋합니다.
+        """
+        with self._conn:
+            # 다른 프로그램이 동시에 바꾸는 중일 수 있으므로 쓰기 잠금을 잡은 뒤에 버전을 읽습니다.
+            self._conn.execute("BEGIN IMMEDIATE")
+            version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+            tables = {name for name, in self._conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table'")}
+            has_rows = "rows" in tables
+            from_v0 = version == 0 and (has_rows or "rows_v0" in tables)
+            if from_v0 and "rows_v0" in tables:
+                # 이전 버전이 이름만 바꾸고 중단된 경우: 남은 rows_v0이 원본이고 만들다 만 rows는 버립니다.
+                self._conn.execute("DROP TABLE IF EXISTS rows")
+            elif from_v0:
+                # 버전 0은 가격을 "14,624 원" 형식의 문자열로 보관했습니다.
+                self._conn.execute("ALTER TABLE rows RENAME TO rows_v0")
+            self._conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS rows (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    {", ".join(f"{field} {_COLUMN_TYPES[field]}" for field in FIELDS)},
+                    revision INTEGER NOT NULL DEFAULT 0
+                )""")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS meta (
+                    key TEXT PRIMARY KEY,
+                    value TEXT
+                )""")
+            if from_v0:
+                old_rows = self._conn.execute(
+                    f"SELECT id, {', '.join(_V0_FIELDS)} FROM rows_v0").fetchall()
+                self._conn.executemany(
+                    f"INSERT INTO rows (id, {', '.join(_V0_FIELDS)}) VALUES (?, ?, ?, ?, ?, ?)",
+                    [row[:3] + tuple(parse_price(value) for value in row[3:])
+                     for row in old_rows])
+                self._conn.execute("DROP TABLE rows_v0")
+            elif has_rows and version < SCHEMA_VERSION:
+                if version < 2:
+                    for field in HOLDING_FIELDS:
+                        self._conn.execute(
+                            f"ALTER TABLE rows ADD COLUMN {field} {_COLUMN_TYPES[field]}")
+                if version < 3:
+                    self._conn.execute(
+                        "ALTER TABLE rows ADD COLUMN revision INTEGER NOT NULL DEFAULT 0")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS rows_revision ON rows (revision)")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS deleted_rows (
+                    id INTEGER PRIMARY KEY,
+                    revision INTEGER NOT NULL
+                )""")
+            self._conn.execute("INSERT OR IGNORE INTO meta VALUES ('revision', '0')")
+            self._conn.execute("INSERT OR IGNORE INTO meta VALUES ('pruned_revision', '0')")
+            # 오래된 삭제 기록 정리 (그보다 이전 상태에서 오는 changes_since는 전체 다시 읽기)
+            pruned = int(self._get_meta("revision")) - DELETED_ROWS_KEEP
+            if pruned > int(self._get_meta("pruned_revision")):
+                self._conn.execute("DELETE FROM deleted_rows WHERE revision <= ?", (pruned,))
+                self._set_meta("pruned_revision", str(pruned))
+            self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def close(self):
+        self._conn.close()
+
+    def _next_revision(self):
+        """트랜잭션 안에서 변경 번호를 하나 올려서 반환하는 함수
+
+        meta를 먼저 수정하므로 이 시점부터 커밋까지 쓰기 잠금을 잡고 있고, 변경 번호는 커밋 순서와 같습니다.
+        """
+        self._conn.execute(
+            "UPDATE meta SET value = CAST(value AS INTEGER) + 1 WHERE key = 'revision'")
+        return int(self._get_meta("revision"))
+
+    def revision(self):
+        """마지막으로 커밋된 변경 번호를 반환하는 함수"""
+        return int(self._get_meta("revision"))
+
+    def data_version(self):
+        """다른 연결(다른 프로그램)이 커밋할 때마다 바뀌는 값을 반환하는 함수 (파일 변경 감지용)"""
+        return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def changes_since(self, revision):
+        """revision 이후에 바뀐 행과 삭제된 행 번호를 읽는 함수
+
+        (바뀐 StockRow 목록, 삭제된 행 번호 목록, 현재 변경 번호)를 반환합니다.
+        삭제 기록이 정리되어 알 수 없을 만큼 오래된 revision이면 None을 반환합니다.
+        """
+        # 읽는 도중 다른 프로그램이 커밋해도 같은 시점을 보도록 하나의 읽기 트랜잭션으로 묶습니다.
+        with self._conn:
+            self._conn.execute("BEGIN")
+            if revision < int(self._get_meta("pruned_revision")):
+                return None
+            current = int(self._get_meta("revision"))
+            cursor = self._conn.execute(
+                f"SELECT id, {', '.join(FIELDS)} FROM rows WHERE revision > ? ORDER BY id",
+                (revision,))
+            rows = [StockRow(*row[1:], row_id=row[0]) for row in cursor]
+            deleted = [row_id for row_id, in self._conn.execute(
+                "SELECT id FROM deleted_rows WHERE revision > ? ORDER BY id", (revision,))]
+        return rows, deleted, current
+
+    def load(self):
+        """저장된 모든 행을 StockRow 목록으로 반환하는 함수"""
+        with metrics.timer("store_load"):
+            cursor = self._conn.execute(
+                f"SELECT id, {', '.join(FIELDS)} FROM rows ORDER BY id")
+            return [StockRow(*row[1:], row_id=row[0]) for row in cursor]
+
+    def insert(self, row):
+        """행을 추가하고 새 행 번호를 row.row_id에 기록한 뒤 반환하는 함수"""
+        with metrics.timer("store_save", errors="store_errors_total"), self._conn:
+            revision = self._next_revision()
+            cursor = self._conn.execute(_INSERT_SQL, row.values() + (revision,))
+        row.row_id = cursor.lastrowid
+        return row.row_id
+
+    def insert_many(self, rows):
+        """여러 행을 하나의 트랜잭션으로 추가하고 각 행의 row_id를 기록하는 함수"""
+        try:
+            with metrics.timer("store_save", errors="store_errors_total"), self._conn:
+                revision = self._next_revision()
+                for row in rows:
+                    row.row_id = self._conn.execute(
+                        _INSERT_SQL, row.values() + (revision,)).lastrowid
+        except sqlite3.Error:
+            # 트랜잭션이 취소되었으므로 기록한 행 번호도 지웁니다.
+            for row in rows:
+                row.row_id = None
+            raise
+        return len(rows)
+
+    def update(self, row):
+        """한 행을 수정하는 함수"""
+        self.update_many([row])
+
+    def update_many(self, rows, fields=FIELDS):
+        """여러 행의 fields 열을 하나의 트랜잭션으로 수정하는 함수
+
+        가격 새로고침처럼 일부 열만 바꿀 때는 그 열만 지정해야 다른 프로그램이 그 사이에 고친
+        종목명이나 보유 정보를 덮어쓰지 않습니다.
+        """
+        assignments = ", ".join(f"{field} = ?" for field in fields)
+        with metrics.timer("store_save", errors="store_errors_total"), self._conn:
+            revision = self._next_revision()
+            self._conn.executemany(
+                f"UPDATE rows SET {assignments}, revision = ? WHERE id = ?",
+                [tuple(getattr(row, field) for field in fields) + (revision, row.row_id)
+                 for row in rows])
+
+    def update_prices(self, rows):
+        """여러 행의 가격 열만 하나의 트랜잭션으로 수정하는 함수"""
+        self.update_many(rows, PRICE_FIELDS)
+
+    def delete(self, row_id):
+        """한 행을 삭제하는 함수"""
+        with metrics.timer("store_save", errors="store_errors_total"), self._conn:
+            revision = self._next_revision()
+            self._conn.execute("DELETE FROM rows WHERE id = ?", (row_id,))
+            self._conn.execute("INSERT OR REPLACE INTO deleted_rows VALUES (?, ?)",
+                               (row_id, revision))
+
+    def import_json(self, json_path):
+        """stock_data.json 파일(새 형식 또는 기존 문자열 형식)을 한 번만 가져오는 함수
+
+        이미 가져온 적이 있거나 파일이 없으면 아무것도 하지 않습니다.
+        """
+        if self._get_meta("json_imported"):
+            return 0
+        rows = load_rows_json(json_path)
+        with self._conn:
+            revision = self._next_revision()
+            self._conn.executemany(_INSERT_SQL, [row.values() + (revision,) for row in rows])
+            self._set_meta("json_imported", json_path)
+        return len(rows)
+
+    def export_json(self, json_path):
+        """저장된 행을 JSON 파일로 내보내는 함수 (다른 프로그램과 동시에 쓰지 않도록 파일을 잠금)"""
+        with FileLock(json_path):
+            dump_rows_json(self.load(), json_path)
+
+    def _get_meta(self, key):
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key, value):
+        self._conn.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (key, value))
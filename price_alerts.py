@@ -0,0 +1,247 @@
+"""가격 알림 규칙과 알림 엔진
+
+규칙은 stock_data.json 옆의 alert_rules.json에 보관합니다. 종류는 두 가지입니다.
+- 가격 기준: "000660 140,000 원 이하" (direction="below", value=140000)
+- 기준 가격 대비 비율: "6개월전가격 대비 +5% 이상" (direction="above", value=5, reference="price_6mo")
+
+엔진은 규칙을 틱커별로 나누고, 방향(이상/이하)마다 기준 가격 정렬 목록으로 보관합니다.
+가격이 바뀌면 이전 가격과 새 가격 사이에 있는 기준만 bisect로 찾으므로, 한 번의 갱신 비용은
+규칙 수가 아니라 실제로 넘어선 규칙 수에 비례합니다. 규칙은 조건을 새로 만족하게 된 때
+(기준 가격을 넘어설 때) 한 번 알립니다.
+"""
+import bisect
+import json
+import os
+import time
+
+from file_lock import FileLock
+from stock_model import format_price, parse_price
+
+DIRECTIONS = ("above", "below")
+# 비율 규칙의 기준으로 쓸 수 있는 필드와 표시 이름
+REFERENCE_FIELDS = {"price_1yr": "1년전가격", "price_6mo": "6개월전가격"}
+_REFERENCE_ALIASES = {name: field for field, name in REFERENCE_FIELDS.items()}
+_REFERENCE_ALIASES.update({"1yr": "price_1yr", "6mo": "price_6mo"})
+_REFERENCE_ALIASES.update({field: field for field in REFERENCE_FIELDS})
+_OPERATORS = {"<": "below", "<=": "below", ">": "above", ">=": "above",
+              "이하": "below", "이상": "above", "below": "below", "above": "above"}
+# 한 번의 알림에 목록으로 보여 줄 최대 건수
+SUMMARY_LIMIT = 5
+
+
+class AlertRule:
+    """가격 알림 규칙 한 건 (reference가 있으면 value는 기준 가격 대비 % 변화)"""
+
+    __slots__ = ("rule_id", "ticker", "direction", "value", "reference")
+
+    def __init__(self, ticker, direction, value, reference=None, rule_id=None):
+        if direction not in DIRECTIONS:
+            raise ValueError(f"알 수 없는 방향입니다: {direction}")
+        if reference is not None and reference not in REFERENCE_FIELDS:
+            raise ValueError(f"알 수 없는 기준 가격입니다: {reference}")
+        self.rule_id = rule_id
+        self.ticker = ticker
+        self.direction = direction
+        self.value = value
+        self.reference = reference
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(str(data["ticker"]), data["direction"], data["value"],
+                   data.get("reference"), data.get("id"))
+
+    def to_dict(self):
+        return {"id": self.rule_id, "ticker": self.ticker, "direction": self.direction,
+                "value": self.value, "reference": self.reference}
+
+    def threshold(self, references=None):
+        """알림 기준 가격을 반환하는 함수 (비율 규칙의 기준 가격이 없으면 None)"""
+        if self.reference is None:
+            return self.value
+        base = (references or {}).get(self.reference)
+        return None if base is None else base * (1 + self.value / 100)
+
+    def describe(self):
+        """'000660 140,000 원 이하', '000660 6개월전가격 대비 +5% 이상' 형식의 설명"""
+        word = "이상" if self.direction == "above" else "이하"
+        if self.reference is None:
+            return f"{self.ticker} {format_price(self.value)} {word}"
+        return f"{self.ticker} {REFERENCE_FIELDS[self.reference]} 대비 {self.value:+g}% {word}"
+
+    def __repr__(self):
+        return (f"AlertRule({self.ticker!r}, {self.direction!r}, {self.value!r}, "
+                f"{self.reference!r}, rule_id={self.rule_id!r})")
+
+
+def parse_rule(ticker, text):
+    """조건 문자열로 규칙을 만드는 함수 (읽을 수 없으면 ValueError)
+
+    "< 140,000", ">= 150000 원", "140000 이하", "+5% 6개월전가격", "-10% 1yr" 형식을 받습니다.
+    비율 규칙은 부호로 방향을 정합니다. (+는 이상, -는 이하)
+    """
+    text = text.strip()
+    words = text.split()
+    if words and words[0].endswith("%"):
+        if len(words) != 2 or words[1] not in _REFERENCE_ALIASES:
+            raise ValueError(f"기준 가격을 알 수 없습니다: {text} "
+                             f"(예: +5% 6개월전가격, -10% 1년전가격)")
+        try:
+            value = float(words[0][:-1])
+        except ValueError:
+            raise ValueError(f"비율을 읽을 수 없습니다: {text}")
+        direction = "below" if value < 0 else "above"
+        return AlertRule(ticker, direction, value, _REFERENCE_ALIASES[words[1]])
+
+    direction = None
+    for operator in sorted(_OPERATORS, key=len, reverse=True):
+        if text.startswith(operator):
+            direction, text = _OPERATORS[operator], text[len(operator):]
+            break
+        if text.endswith(operator):
+            direction, text = _OPERATORS[operator], text[:-len(operator)]
+            break
+    value = parse_price(text)
+    if direction is None or value is None:
+        raise ValueError(f"조건을 읽을 수 없습니다: {text} (예: < 140,000, > 150000, +5% 6개월전가격)")
+    return AlertRule(ticker, direction, value)
+
+
+def load_rules(path):
+    """규칙 파일을 읽는 함수 (파일이 없으면 빈 목록)"""
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as file:
+        data = json.load(file)
+    if not isinstance(data, list):
+        raise ValueError(f"규칙 목록이 아닙니다: {path}")
+    return [AlertRule.from_dict(item) for item in data]
+
+
+def save_rules(rules, path):
+    """규칙을 파일에 저장하는 함수 (임시 파일에 쓴 뒤 교체)"""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as file:
+        json.dump([rule.to_dict() for rule in rules], file, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, path)
+
+
+def edit_rules(path, add=(), remove=()):
+    """규칙 파일을 잠근 상태에서 읽고 규칙을 추가/삭제한 뒤 저장하는 함수
+
+    새 규칙에는 파일에서 가장 큰 번호 다음 번호를 붙이며, 저장한 전체 규칙 목록을 반환합니다.
+    """
+    remove = set(remove)
+    with FileLock(path):
+        rules = [rule for rule in load_rules(path) if rule.rule_id not in remove]
+        next_id = max((rule.rule_id or 0 for rule in rules), default=0) + 1
+        for rule in add:
+            rule.rule_id = next_id
+            next_id += 1
+            rules.append(rule)
+        save_rules(rules, path)
+    return rules
+
+
+def append_alert_log(path, alerts, now=None):
+    """알림을 로그 파일에 한 줄씩 덧붙이는 함수 (시각, 틱커, 규칙 번호, 가격, 설명)"""
+    if not alerts:
+        return
+    stamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(now))
+    with open(path, "a", encoding="utf-8") as file:
+        for rule, price in alerts:
+            file.write(f"{stamp}\t{rule.ticker}\t{rule.rule_id}\t{price}\t{rule.describe()}\n")
+
+
+def summarize_alerts(alerts):
+    """알림 목록을 알림 창에 보여 줄 여러 줄 문자열로 만드는 함수"""
+    lines = [f"{rule.describe()} (현재 {format_price(price)})"
+             for rule, price in alerts[:SUMMARY_LIMIT]]
+    if len(alerts) > SUMMARY_LIMIT:
+        lines.append(f"외 {len(alerts) - SUMMARY_LIMIT}건")
+    return "\n".join(lines)
+
+
+class AlertEngine:
+    """틱커별 정렬 기준 가격 목록으로 규칙을 확인하는 알림 엔진
+
+    - set_rules(rules): 규칙을 모두 바꿈 (마지막 가격은 유지)
+    - evaluate(rows): 가격이 바뀐 행을 확인해서 새로 만족한 (규칙, 가격) 목록을 반환
+    """
+
+    def __init__(self, rules=()):
+        self._prices = {}      # 틱커 -> 마지막으로 확인한 가격
+        self._references = {}  # 틱커 -> 비율 규칙의 기준 가격 튜플 (REFERENCE_FIELDS 순서)
+        self.set_rules(rules)
+
+    def set_rules(self, rules):
+        self.rules = list(rules)
+        self._index = {}     # 틱커 -> {방향: [(기준 가격, 규칙 번호), ...] 정렬 목록}
+        self._by_id = {}     # 규칙 번호 -> 규칙
+        self._relative = {}  # 틱커 -> 비율 규칙 목록
+        for number, rule in enumerate(self.rules):
+            key = rule.rule_id if rule.rule_id is not None else -1 - number
+            self._by_id[key] = rule
+            if rule.reference is None:
+                self._insert(rule.ticker, rule.direction, rule.value, key)
+            else:
+                self._relative.setdefault(rule.ticker, []).append((key, rule))
+        # 기준 가격은 다음 evaluate에서 행의 값으로 다시 계산합니다.
+        self._references = {}
+
+    def _insert(self, ticker, direction, threshold, key):
+        entries = self._index.setdefault(ticker, {"above": [], "below": []})[direction]
+        bisect.insort(entries, (threshold, key))
+
+    def _reindex_relative(self, ticker, references):
+        """기준 가격이 바뀐 틱커의 비율 규칙 기준 가격을 다시 계산하는 함수"""
+        values = dict(zip(REFERENCE_FIELDS, references))
+        relative = self._relative[ticker]
+        keys = {key for key, _ in relative}
+        index = self._index.setdefault(ticker, {"above": [], "below": []})
+        for direction in DIRECTIONS:
+            index[direction] = [entry for entry in index[direction] if entry[1] not in keys]
+        for key, rule in relative:
+            threshold = rule.threshold(values)
+            if threshold is not None:
+                self._insert(ticker, rule.direction, threshold, key)
+
+    def check(self, ticker, price, references=None):
+        """틱커의 가격이 price로 바뀌었을 때 새로 만족한 (규칙, 가격) 목록을 반환하는 함수
+
+        references는 비율 규칙의 기준 가격 튜플(REFERENCE_FIELDS 순서)입니다.
+        처음 보는 틱커는 이미 만족하고 있는 규칙을 모두 알립니다.
+        """
+        if price is None:
+            return []
+        if ticker in self._relative and references != self._references.get(ticker):
+            self._references[ticker] = references
+            self._reindex_relative(ticker, references or ())
+        old = self._prices.get(ticker)
+        self._prices[ticker] = price
+        index = self._index.get(ticker)
+        if index is None or old == price:
+            return []
+
+        above, below = index["above"], index["below"]
+        upper = bisect.bisect_right(above, (price, float("inf")))
+        lower = bisect.bisect_left(below, (price, float("-inf")))
+        if old is None:
+            # 기준 가격 <= 가격인 "이상" 규칙과 기준 가격 >= 가격인 "이하" 규칙
+            hits = above[:upper] + below[lower:]
+        elif price > old:
+            # 이전 가격 < 기준 가격 <= 새 가격
+            hits = above[bisect.bisect_right(above, (old, float("inf"))):upper]
+        else:
+            # 새 가격 <= 기준 가격 < 이전 가격
+            hits = below[lower:bisect.bisect_left(below, (old, float("-inf")))]
+        return [(self._by_id[key], price) for _, key in hits]
+
+    def evaluate(self, rows):
+        """행(StockRow)들의 현재가를 확인해서 새로 만족한 (규칙, 가격) 목록을 반환하는 함수"""
+        alerts = []
+        for row in rows:
+            references = None
+            if row.ticker in self._relative:
+                references = tuple(getattr(row, field) for field in REFERENCE_FIELDS)
+            alerts.extend(self.check(row.ticker, row.current_price, references))
+        return alerts
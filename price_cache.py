@@ -0,0 +1,197 @@
+import os
+import sqlite3
+import threading
+import time
+from datetime import date, timedelta
+
+import metrics
+from series_store import SeriesStore
+
+# 캐시된 시세를 새로 받지 않고 그대로 사용할 수 있는 시간(초)
+DEFAULT_TTL = 15 * 60
+
+
+def bars_from_history(hist):
+    """yfinance history DataFrame을 (날짜, 시가, 고가, 저가, 종가, 거래량) 튜플 목록으로 바꾸는 함수"""
+    bars = []
+    for row in hist.itertuples():
+        bars.append((row.Index.date().isoformat(), float(row.Open), float(row.High),
+                     float(row.Low), float(row.Close), int(row.Volume)))
+    return bars
+
+
+class PriceCache:
+    """종목/날짜별 일봉을 SQLite 파일에 보관하는 로컬 시세 캐시
+
+    여러 작업 스레드에서 동시에 사용할 수 있도록 하나의 연결을 잠금으로 보호합니다.
+    가격 계산에 쓰는 종가 시계열은 SeriesStore(series_path, 기본값은 캐시 파일 이름 + "_series.bin")에
+    배열로 따로 보관하며, 처음 필요할 때 파일을 메모리 매핑하거나 캐시에서 만듭니다.
+    """
+
+    def __init__(self, path, ttl=DEFAULT_TTL, series_path=None):
+        self.path = path
+        self.ttl = ttl
+        if series_path is None and path != ":memory:":
+            series_path = os.path.splitext(path)[0] + "_series.bin"
+        self._series = SeriesStore(series_path)
+        self._series_loaded = False
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS prices (
+                    symbol TEXT NOT NULL,
+                    date TEXT NOT NULL,
+                    open REAL, high REAL, low REAL, close REAL NOT NULL,
+                    volume INTEGER,
+                    PRIMARY KEY (symbol, date)
+                ) WITHOUT ROWID""")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS symbols (
+                    symbol TEXT PRIMARY KEY,
+                    name TEXT,
+                    fetched_at REAL,
+                    history_from TEXT
+                )""")
+            columns = [row[1] for row in self._conn.execute("PRAGMA table_info(symbols)")]
+            if "history_from" not in columns:
+                # 이전 버전의 캐시에는 일봉을 어느 날부터 받았는지 기록하지 않았습니다.
+                self._conn.execute("ALTER TABLE symbols ADD COLUMN history_from TEXT")
+            # 일봉이 바뀔 때마다 1씩 늘어나는 세대 번호 (종가 시계열 파일이 최신인지 확인)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS cache_meta (
+                    key TEXT PRIMARY KEY,
+                    value INTEGER
+                )""")
+            self._conn.execute(
+                "INSERT OR IGNORE INTO cache_meta VALUES ('generation', 0)")
+
+    def close(self):
+        with self._lock:
+            self._flush_series()
+            self._conn.close()
+
+    def _generation(self):
+        return self._conn.execute(
+            "SELECT value FROM cache_meta WHERE key = 'generation'").fetchone()[0]
+
+    def generation(self):
+        with self._lock:
+            return self._generation()
+
+    def _series_store(self):
+        """종가 시계열 저장소를 준비하는 함수 (잠금을 잡은 상태에서 호출)
+
+        저장된 파일의 세대 번호가 캐시와 같으면 메모리 매핑하고, 다르면 캐시 전체에서 다시 만듭니다.
+        """
+        if not self._series_loaded:
+            generation = self._generation()
+            if not (self._series.open() and self._series.generation == generation):
+                with metrics.timer("series_rebuild"):
+                    rows = self._conn.execute(
+                        "SELECT symbol, date, close FROM prices ORDER BY symbol, date")
+                    self._series.load_rows(rows, generation)
+            self._series_loaded = True
+        return self._series
+
+    def _flush_series(self):
+        if self._series_loaded and self._series.dirty:
+            try:
+                self._series.save()
+            except OSError as e:
+                print(f"Error saving price series: {e}")
+
+    def flush(self):
+        """바뀐 종가 시계열을 파일에 저장하는 함수 (다음 실행에서 메모리 매핑해서 사용)"""
+        with self._lock:
+            self._flush_series()
+
+    def last_date(self, symbol):
+        """캐시에 있는 마지막 거래일(date)을 반환하는 함수 (없으면 None)"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT MAX(date) FROM prices WHERE symbol = ?", (symbol,)).fetchone()
+        return date.fromisoformat(row[0]) if row[0] else None
+
+    def is_fresh(self, symbol):
+        """마지막으로 받아온 지 TTL이 지나지 않았는지 확인하는 함수"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT fetched_at FROM symbols WHERE symbol = ?", (symbol,)).fetchone()
+        return bool(row and row[0] and time.time() - row[0] < self.ttl)
+
+    def needs_history(self, symbol, start):
+        """start(date)부터의 일봉을 아직 요청한 적이 없는지 확인하는 함수"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT history_from FROM symbols WHERE symbol = ?", (symbol,)).fetchone()
+        return not (row and row[0] and row[0] <= start.isoformat())
+
+    def store(self, symbol, bars, history_from=None):
+        """일봉을 저장(같은 날짜는 덮어씀)하고 받아온 시각을 기록하는 함수
+
+        history_from(date)은 이번에 요청한 시작일이며, 이 날부터의 일봉을 받았다고 기록합니다.
+        """
+        history_from = history_from.isoformat() if history_from else None
+        with self._lock:
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO prices VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [(symbol,) + tuple(bar) for bar in bars])
+                self._conn.execute(
+                    "INSERT INTO symbols (symbol, fetched_at, history_from) VALUES (?, ?, ?) "
+                    "ON CONFLICT(symbol) DO UPDATE SET fetched_at = excluded.fetched_at, "
+                    "history_from = MIN(COALESCE(history_from, excluded.history_from), "
+                    "COALESCE(excluded.history_from, history_from))",
+                    (symbol, time.time(), history_from))
+                if bars:
+                    # 쓰기 트랜잭션 안에서 읽으므로 다른 프로그램이 그 사이에 바꿀 수 없습니다.
+                    previous = self._generation()
+                    self._conn.execute(
+                        "UPDATE cache_meta SET value = value + 1 WHERE key = 'generation'")
+            if bars:
+                if self._series_loaded and self._series.generation == previous:
+                    # 같은 잠금 안에서 합치므로 시계열 저장소의 세대 번호는 항상 내용과 일치합니다.
+                    self._series.merge(symbol, bars, previous + 1)
+                else:
+                    # 다른 프로그램이 캐시를 바꿨으면 그 일봉이 시계열에 없으므로, 세대 번호만
+                    # 따라가지 않고 다음에 사용할 때 캐시에서 다시 만듭니다.
+                    self._series_loaded = False
+
+    def get_name(self, symbol):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT name FROM symbols WHERE symbol = ?", (symbol,)).fetchone()
+        return row[0] if row else None
+
+    def set_name(self, symbol, name):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO symbols (symbol, name) VALUES (?, ?) "
+                "ON CONFLICT(symbol) DO UPDATE SET name = excluded.name",
+                (symbol, name))
+
+    def names(self):
+        """캐시된 종목명 전체를 심볼 -> 종목명 딕셔너리로 반환하는 함수"""
+        with self._lock:
+            return dict(self._conn.execute(
+                "SELECT symbol, name FROM symbols WHERE name IS NOT NULL").fetchall())
+
+    def closes(self, symbol, days=365):
+        """마지막 거래일 기준 최근 days일 동안의 (날짜, 종가) 목록을 날짜순으로 반환하는 함수"""
+        last = self.last_date(symbol)
+        if last is None:
+            return []
+        start = (last - timedelta(days=days)).isoformat()
+        with self._lock:
+            return self._conn.execute(
+                "SELECT date, close FROM prices WHERE symbol = ? AND date > ? ORDER BY date",
+                (symbol, start)).fetchall()
+
+    def pack(self, symbols):
+        """여러 심볼의 종가 시계열을 (일 번호, 종가, 구간 시작 위치) 배열로 반환하는 함수
+
+        lookback.compute_packed에 그대로 넘길 수 있으며, 캐시에 없는 심볼은 빈 구간입니다.
+        """
+        with self._lock:
+            return self._series_store().pack(symbols)
@@ -0,0 +1,180 @@
+from datetime import date, datetime, timedelta
+
+from PyQt5.QtCore import QPointF, QRectF, Qt
+from PyQt5.QtGui import QColor, QPainter, QPen, QPolygonF
+from PyQt5.QtWidgets import QWidget
+
+import metrics
+from downsample import SeriesPyramid
+
+# 휠 한 칸에 확대/축소하는 비율
+ZOOM_STEP = 0.8
+# 가장 많이 확대했을 때 화면에 남기는 최소 점 수
+MIN_VISIBLE_POINTS = 10
+# 선 하나를 그릴 때 픽셀당 점 수
+POINTS_PER_PIXEL = 1
+# 축 글자를 그릴 여백(픽셀)
+MARGIN_LEFT = 70
+MARGIN_RIGHT = 10
+MARGIN_TOP = 20
+MARGIN_BOTTOM = 20
+
+LINE_COLOR = QColor("#2E7D32")
+AXIS_COLOR = QColor("#808080")
+TEXT_COLOR = QColor("#333333")
+
+
+def format_x(value, unit):
+    """x 값(일 번호 또는 유닉스 시각)을 축 글자로 바꾸는 함수"""
+    if unit == "day":
+        return (date(1970, 1, 1) + timedelta(days=int(value))).isoformat()
+    return datetime.fromtimestamp(value).strftime("%m-%d %H:%M")
+
+
+class PriceChart(QWidget):
+    """선택한 종목의 종가 선 차트
+
+    x는 일봉이면 1970-01-01부터의 일 수(unit="day"), 분봉 등이면 유닉스 시각(unit="second")입니다.
+    마우스 휠로 확대/축소, 끌어서 이동, 두 번 클릭하면 전체 기간을 보여 줍니다.
+    그릴 때마다 보이는 구간만 픽셀 수만큼 줄여서(downsample.SeriesPyramid) 그리므로
+    10년치 일봉이나 한 달치 분봉도 전체를 다시 그리지 않습니다.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setMinimumHeight(160)
+        self.title = ""
+        self.unit = "day"
+        self.pyramid = None
+        self.view = None        # 보이는 x 구간 (x0, x1)
+        self._drag_x = None     # 끌기 시작한 마우스 x 좌표
+        self._drag_view = None
+        self._cached = None     # (보이는 구간, 너비) -> 줄인 (x, y)
+
+    def set_series(self, x, y, title="", unit="day"):
+        """차트에 그릴 시계열을 바꾸고 전체 기간을 보여 주는 함수"""
+        self.title = title
+        self.unit = unit
+        self.pyramid = SeriesPyramid(x, y) if len(x) else None
+        self.reset_view()
+
+    def clear(self, title=""):
+        self.title = title
+        self.pyramid = None
+        self.reset_view()
+
+    def reset_view(self):
+        self.view = self.pyramid.bounds() if self.pyramid else None
+        self._cached = None
+        self.update()
+
+    def plot_rect(self):
+        return QRectF(MARGIN_LEFT, MARGIN_TOP, max(1, self.width() - MARGIN_LEFT - MARGIN_RIGHT),
+                      max(1, self.height() - MARGIN_TOP - MARGIN_BOTTOM))
+
+    def set_view(self, x0, x1):
+        """보이는 구간을 바꾸는 함수 (데이터 범위와 최소 폭 안으로 맞춤)"""
+        if self.pyramid is None:
+            return
+        first, last = self.pyramid.bounds()
+        full = last - first
+        if full <= 0:
+            return
+        # 최소 폭은 평균 점 간격의 MIN_VISIBLE_POINTS배
+        min_span = min(full, full / max(1, len(self.pyramid) - 1) * MIN_VISIBLE_POINTS)
+        span = min(full, max(min_span, x1 - x0))
+        x0 = min(max(x0, first), last - span)
+        self.view = (x0, x0 + span)
+        self.update()
+
+    def visible_series(self):
+        """보이는 구간을 화면 너비에 맞게 줄인 (x, y) 배열 (같은 구간이면 다시 계산하지 않음)"""
+        width = int(self.plot_rect().width())
+        key = (self.view, width)
+        if self._cached is None or self._cached[0] != key:
+            with metrics.timer("chart_downsample"):
+                points = self.pyramid.visible(self.view[0], self.view[1],
+                                              max(3, width * POINTS_PER_PIXEL))
+            self._cached = (key, points)
+        return self._cached[1]
+
+    @metrics.timed("chart_paint")
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.Antialiasing)
+        rect = self.plot_rect()
+        painter.setPen(TEXT_COLOR)
+        painter.drawText(QRectF(MARGIN_LEFT, 0, rect.width(), MARGIN_TOP),
+                         int(Qt.AlignLeft | Qt.AlignVCenter), self.title)
+        painter.setPen(AXIS_COLOR)
+        painter.drawRect(rect)
+        if self.pyramid is None or self.view is None:
+            painter.drawText(rect, int(Qt.AlignCenter), "일봉 데이터가 없습니다")
+            return
+
+        x, y = self.visible_series()
+        if not len(x):
+            return
+        x0, x1 = self.view
+        span = (x1 - x0) or 1  # 일봉이 하나뿐이면 폭이 0
+        low, high = float(y.min()), float(y.max())
+        if high == low:
+            low, high = low - 1, high + 1
+        pad = (high - low) * 0.05
+        low, high = low - pad, high + pad
+        px = rect.left() + (x - x0) / span * rect.width()
+        py = rect.bottom() - (y - low) / (high - low) * rect.height()
+
+        painter.save()
+        painter.setClipRect(rect)
+        painter.setPen(QPen(LINE_COLOR, 1.5))
+        painter.drawPolyline(QPolygonF([QPointF(a, b) for a, b in zip(px.tolist(), py.tolist())]))
+        painter.restore()
+
+        painter.setPen(TEXT_COLOR)
+        label_width = MARGIN_LEFT - 6
+        painter.drawText(QRectF(0, rect.top() - 8, label_width, 16),
+                         int(Qt.AlignRight | Qt.AlignVCenter), f"{high:,.0f}")
+        painter.drawText(QRectF(0, rect.bottom() - 8, label_width, 16),
+                         int(Qt.AlignRight | Qt.AlignVCenter), f"{low:,.0f}")
+        painter.drawText(QRectF(rect.left(), rect.bottom(), rect.width(), MARGIN_BOTTOM),
+                         int(Qt.AlignLeft | Qt.AlignVCenter), format_x(x0, self.unit))
+        painter.drawText(QRectF(rect.left(), rect.bottom(), rect.width(), MARGIN_BOTTOM),
+                         int(Qt.AlignRight | Qt.AlignVCenter), format_x(x1, self.unit))
+
+    def wheelEvent(self, event):
+        """마우스 위치를 중심으로 확대/축소하는 함수"""
+        if self.view is None:
+            return
+        steps = event.angleDelta().y() / 120
+        if not steps:
+            return
+        rect = self.plot_rect()
+        x0, x1 = self.view
+        ratio = min(1.0, max(0.0, (event.pos().x() - rect.left()) / rect.width()))
+        center = x0 + (x1 - x0) * ratio
+        span = (x1 - x0) * ZOOM_STEP ** steps
+        self.set_view(center - span * ratio, center - span * ratio + span)
+        event.accept()
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.LeftButton and self.view is not None:
+            self._drag_x = event.pos().x()
+            self._drag_view = self.view
+        super().mousePressEvent(event)
+
+    def mouseMoveEvent(self, event):
+        """끌어서 보이는 구간을 옮기는 함수"""
+        if self._drag_x is None:
+            return
+        x0, x1 = self._drag_view
+        shift = (self._drag_x - event.pos().x()) / self.plot_rect().width() * (x1 - x0)
+        self.set_view(x0 + shift, x1 + shift)
+
+    def mouseReleaseEvent(self, event):
+        self._drag_x = None
+        self._drag_view = None
+        super().mouseReleaseEvent(event)
+
+    def mouseDoubleClickEvent(self, event):
+        self.reset_view()
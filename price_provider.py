@@ -0,0 +1,390 @@
+import json
+import os
+import random
+import threading
+import time
+import zlib
+from datetime import date, timedelta
+
+from price_cache import bars_from_history
+
+# 기간 문자열 -> 일 수 (제공자가 start 없이 받을 때 사용)
+PERIOD_DAYS = {"1mo": 31, "3mo": 92, "6mo": 183, "1y": 365, "2y": 730, "5y": 1826, "10y": 3652}
+# 합성 시세의 기준일 (이 날부터 만들어서 같은 날짜에는 항상 같은 값이 나옴)
+SYNTHETIC_EPOCH = date(2015, 1, 1)
+# 환율 심볼(yfinance 형식)의 접미사와 합성 시세에서 쓰는 기준 환율 (원)
+FX_SUFFIX = "=X"
+SYNTHETIC_FX_LEVELS = {"KRW=X": 1300.0, "JPYKRW=X": 9.0}
+# 합성 장중 시세가 바뀌는 간격(초, 분봉)과 일봉 종가 대비 변동폭(표준편차)
+QUOTE_INTERVAL = 60
+SYNTHETIC_QUOTE_VOLATILITY = 0.003
+# 야후가 없는 심볼에 대해 보내는 오류 설명
+YAHOO_NOT_FOUND = "No data found"
+
+
+class ProviderError(Exception):
+    """제공자에 접속하지 못했거나 응답이 잘못된 경우 (데이터가 없는 것과는 구분)"""
+
+
+class PriceProvider:
+    """시세 제공자 인터페이스
+
+    일봉(bar)은 (ISO 날짜, 시가, 고가, 저가, 종가, 거래량) 튜플이며 날짜순으로 반환합니다.
+    없는 심볼은 빈 목록을 반환하고, 접속 오류는 ProviderError를 발생시킵니다.
+    """
+
+    def get_name(self, symbol):
+        """심볼의 종목명을 반환하는 함수"""
+        raise NotImplementedError
+
+    def get_history(self, symbol, start=None, period="1y"):
+        """start(ISO 날짜)부터, start가 없으면 최근 period 동안의 일봉 목록을 반환하는 함수"""
+        raise NotImplementedError
+
+    def get_history_batch(self, symbols, start=None, period="1y"):
+        """여러 심볼의 일봉을 한 번에 받아서 심볼 -> 일봉 목록 딕셔너리로 반환하는 함수
+
+        기본 구현은 get_history를 차례로 호출합니다.
+        """
+        return {symbol: self.get_history(symbol, start=start, period=period)
+                for symbol in symbols}
+
+    def get_quotes(self, symbols):
+        """여러 심볼의 장중 최근 시세(분봉 종가)를 심볼 -> 가격 딕셔너리로 반환하는 함수
+
+        시세가 없는 심볼은 빠집니다. 기본 구현은 get_history_batch의 마지막 종가를 사용합니다.
+        """
+        history = self.get_history_batch(symbols, period="1mo")
+        return {symbol: bars[-1][4] for symbol, bars in history.items() if bars}
+
+
+class YFinanceProvider(PriceProvider):
+    """yfinance(야후 파이낸스)를 사용하는 제공자
+
+    모든 요청은 연결 풀과 응답 캐시를 가진 세션(http_session)을 함께 사용합니다.
+    session이 없으면 프로그램 전체에서 공유하는 세션을 씁니다.
+    """
+
+    # 종목명만 가볍게 받을 때 쓰는 검색 API (메타데이터로 캐시되도록 시세와 다른 경로 사용)
+    SEARCH_URL = "https://query2.finance.yahoo.com/v1/finance/search"
+    # 야후는 브라우저가 아닌 User-Agent의 요청을 거절합니다.
+    HEADERS = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+                             "(KHTML, like Gecko) Chrome/120.0 Safari/537.36"}
+
+    def __init__(self, session=None):
+        self._session = session
+
+    @property
+    def session(self):
+        if self._session is None:
+            from http_session import shared_session
+            self._session = shared_session()
+        return self._session
+
+    def _yf(self):
+        from stock_fetch import load_yfinance
+        return load_yfinance()
+
+    def get_name(self, symbol):
+        # .info는 여러 모듈을 한꺼번에 받는 무거운 요청이므로, 검색 API의 결과에서 먼저 찾습니다.
+        name = None
+        try:
+            response = self.session.get(self.SEARCH_URL,
+                                        params={"q": symbol, "quotesCount": 5, "newsCount": 0},
+                                        headers=self.HEADERS)
+            response.raise_for_status()
+            for quote in response.json().get("quotes", []):
+                if quote.get("symbol") == symbol:
+                    name = quote.get("longname") or quote.get("shortname")
+                    break
+        except Exception:
+            name = None
+        return name or self._yf().Ticker(symbol, session=self.session).info['longName']
+
+    def get_history(self, symbol, start=None, period="1y"):
+        stock = self._yf().Ticker(symbol, session=self.session)
+        if start is None:
+            return self._history(stock, period=period)
+        try:
+            return self._history(stock, start=start)
+        except ProviderError as e:
+            if "No timezone found" not in str(e):
+                raise
+        # start로 요청하면 yfinance가 먼저 시간대를 조회하는데, 그 실패만으로는 접속 오류인지
+        # 없는 심볼인지 알 수 없으므로 시간대 조회가 없는 기간(period) 요청으로 다시 확인합니다.
+        days = (date.today() - date.fromisoformat(start)).days
+        period = min((name for name, length in PERIOD_DAYS.items() if length >= days),
+                     key=PERIOD_DAYS.get, default="10y")
+        return [bar for bar in self._history(stock, period=period) if bar[0] >= start]
+
+    def _history(self, stock, **options):
+        """yfinance history로 일봉 목록을 받는 함수
+
+        야후가 없는 심볼이라고 답한 경우에만 빈 목록을 반환하고, 그 밖의 모든 실패(응답을 받지
+        못함, 시간대 조회 실패, 잘못된 응답 등)는 ProviderError를 발생시킵니다.
+        """
+        try:
+            hist = stock.history(raise_errors=True, **options)
+        except Exception as e:
+            # yfinance는 야후의 오류 설명("No data found, ...")을 그대로 전달하며,
+            # 응답을 받지 못한 경우에는 "No price data found" 메시지를 사용합니다.
+            if YAHOO_NOT_FOUND in str(e):
+                return []
+            raise ProviderError(str(e)) from e
+        return bars_from_history(hist)
+
+    def get_history_batch(self, symbols, start=None, period="1y"):
+        import pandas as pd
+
+        symbols = list(symbols)
+        if start is None:
+            options = {'period': period}
+        else:
+            options = {'start': start}
+        try:
+            data = self._yf().download(symbols, auto_adjust=True, group_by='column',
+                                       progress=False, session=self.session, **options)
+        except Exception as e:
+            raise ProviderError(str(e)) from e
+        result = {}
+        for symbol in symbols:
+            if data.empty:
+                result[symbol] = []
+                continue
+            if isinstance(data.columns, pd.MultiIndex):
+                hist = data.xs(symbol, axis=1, level=1)
+            else:
+                hist = data
+            result[symbol] = bars_from_history(hist.dropna(subset=['Close']))
+        return result
+
+    def get_quotes(self, symbols):
+        symbols = list(symbols)
+        try:
+            data = self._yf().download(symbols, period="1d", interval="1m", auto_adjust=True,
+                                       group_by='column', progress=False, session=self.session)
+        except Exception as e:
+            raise ProviderError(str(e)) from e
+        if data.empty:
+            return {}
+        closes = data['Close']
+        if closes.ndim == 1:
+            closes = closes.to_frame(symbols[0])
+        result = {}
+        for symbol in symbols:
+            if symbol in closes:
+                values = closes[symbol].dropna()
+                if len(values):
+                    result[symbol] = float(values.iloc[-1])
+        return result
+
+
+def synthetic_market(code):
+    """합성 시세에서 종목코드가 속한 시장 접미사(.KS/.KQ)를 반환하는 함수"""
+    return ".KQ" if zlib.crc32(code.encode("utf-8")) % 2 else ".KS"
+
+
+def synthetic_bars(symbol, start, end):
+    """심볼별로 항상 같은 값이 나오는 합성 일봉(평일만)을 만드는 함수"""
+    import numpy as np
+
+    # 시작일과 무관하게 같은 날짜에는 같은 값이 나오도록 고정된 기준일부터 계산합니다.
+    days = np.arange(np.datetime64(SYNTHETIC_EPOCH), np.datetime64(end) + 1)
+    days = days[(days.astype(np.int64) + 3) % 7 < 5]  # 1970-01-01은 목요일
+    rng = np.random.default_rng(zlib.crc32(symbol.encode("utf-8")))
+    if symbol.endswith(FX_SUFFIX):
+        # 환율은 변동이 작고 소수점 아래까지 의미가 있습니다.
+        level, drift, volatility, minimum, decimals = (SYNTHETIC_FX_LEVELS.get(symbol, 1.0),
+                                                       0.0, 0.004, 0.0, 4)
+    else:
+        level, drift, volatility, minimum, decimals = (rng.uniform(5_000, 200_000),
+                                                       0.0003, 0.02, 100.0, 0)
+    closes = level * np.cumprod(1 + rng.normal(drift, volatility, len(days)))
+    closes = np.maximum(closes, minimum)
+    opens = np.concatenate([closes[:1], closes[:-1]])
+    highs = np.maximum(opens, closes) * (1 + np.abs(rng.normal(0, 0.005, len(days))))
+    lows = np.minimum(opens, closes) * (1 - np.abs(rng.normal(0, 0.005, len(days))))
+    volumes = rng.integers(10_000, 5_000_000, len(days))
+
+    first = np.searchsorted(days, np.datetime64(start))
+    columns = [days[first:].astype(str).tolist()]
+    columns += [np.round(values[first:], decimals).tolist()
+                for values in (opens, highs, lows, closes)]
+    columns.append(volumes[first:].tolist())
+    return list(zip(*columns))
+
+
+def synthetic_quote(symbol, close, step):
+    """일봉 종가를 기준으로 step(시세 구간 번호)마다 항상 같은 값이 나오는 합성 장중 시세"""
+    rng = random.Random(zlib.crc32(f"{symbol}@{step}".encode("utf-8")))
+    decimals = 4 if symbol.endswith(FX_SUFFIX) else 0
+    return round(close * (1 + rng.gauss(0, SYNTHETIC_QUOTE_VOLATILITY)), decimals)
+
+
+class ReplayProvider(PriceProvider):
+    """기록된 픽스처 또는 합성 시세를 돌려주는 로컬 제공자 (벤치마크/부하 시험용)
+
+    fixtures 폴더에 심볼별 "<심볼>.json" 파일({"name": ..., "bars": [...]})이 있으면 그 값을,
+    없으면 synthetic이 True일 때 synthetic_bars로 만든 값을 돌려줍니다.
+    합성 시세는 종목코드마다 정해진 한 시장(markets에 없으면 종목코드로 결정한 .KS/.KQ)에만
+    있는 것으로 처리해서 시장 확인(MarketResolver)도 항상 같은 결과가 나오게 합니다.
+    latency(초)만큼 응답을 늦추고, error_rate 확률로 ProviderError를 발생시킵니다.
+    장중 시세(get_quotes)는 마지막 일봉 종가 주변에서 quote_interval초마다 바뀝니다.
+    """
+
+    def __init__(self, fixtures=None, synthetic=True, latency=0.0, error_rate=0.0,
+                 markets=None, today=None, seed=0, quote_interval=QUOTE_INTERVAL):
+        self.fixtures = fixtures
+        self.synthetic = synthetic
+        self.latency = latency
+        self.error_rate = error_rate
+        self.markets = markets or {}
+        self.today = today or date.today()
+        self.quote_interval = quote_interval
+        self._closes = {}  # 심볼 -> 마지막 일봉 종가 (장중 시세의 기준, 없으면 None)
+        self.calls = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _simulate(self):
+        with self._lock:
+            self.calls += 1
+            failed = self.error_rate > 0 and self._rng.random() < self.error_rate
+        if self.latency:
+            time.sleep(self.latency)
+        if failed:
+            raise ProviderError("injected error")
+
+    def _fixture(self, symbol):
+        if not self.fixtures:
+            return None
+        path = os.path.join(self.fixtures, f"{symbol}.json")
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r', encoding="utf-8") as file:
+            return json.load(file)
+
+    def _known(self, symbol):
+        if symbol.endswith(FX_SUFFIX):
+            return True
+        code, _, suffix = symbol.partition(".")
+        expected = self.markets.get(code)
+        if expected is None:
+            expected = synthetic_market(code)
+        return "." + suffix == expected
+
+    def _bars(self, symbol, start, period):
+        if start is None:
+            start_day = self.today - timedelta(days=PERIOD_DAYS.get(period, 365))
+        else:
+            start_day = date.fromisoformat(start)
+        fixture = self._fixture(symbol)
+        if fixture is not None:
+            return [tuple(bar) for bar in fixture["bars"] if bar[0] >= start_day.isoformat()]
+        if self.synthetic and self._known(symbol):
+            return synthetic_bars(symbol, start_day, self.today)
+        return []
+
+    def get_name(self, symbol):
+        self._simulate()
+        fixture = self._fixture(symbol)
+        if fixture is not None:
+            return fixture["name"]
+        return f"Synthetic {symbol}"
+
+    def get_history(self, symbol, start=None, period="1y"):
+        self._simulate()
+        return self._bars(symbol, start, period)
+
+    def get_history_batch(self, symbols, start=None, period="1y"):
+        self._simulate()
+        return {symbol: self._bars(symbol, start, period) for symbol in symbols}
+
+    def get_quotes(self, symbols):
+        self._simulate()
+        step = int(time.time() // self.quote_interval)
+        result = {}
+        for symbol in symbols:
+            if symbol not in self._closes:
+                bars = self._bars(symbol, None, "1mo")
+                self._closes[symbol] = bars[-1][4] if bars else None
+            close = self._closes[symbol]
+            if close is not None:
+                result[symbol] = synthetic_quote(symbol, close, step)
+        return result
+
+
+def record_fixtures(provider, symbols, directory, period="1y"):
+    """다른 제공자(예: yfinance)의 응답을 ReplayProvider용 픽스처 파일로 저장하는 함수"""
+    os.makedirs(directory, exist_ok=True)
+    for symbol in symbols:
+        fixture = {"name": provider.get_name(symbol),
+                   "bars": provider.get_history(symbol, period=period)}
+        with open(os.path.join(directory, f"{symbol}.json"), 'w', encoding='utf-8') as file:
+            json.dump(fixture, file, ensure_ascii=False)
+
+
+class HttpProvider(PriceProvider):
+    """로컬 대체 서버(standin_server)에서 시세를 받는 제공자 (yfinance와 같은 공유 세션 사용)"""
+
+    def __init__(self, base_url, session=None):
+        self.base_url = base_url.rstrip("/")
+        self._session = session
+
+    @property
+    def session(self):
+        if self._session is None:
+            from http_session import shared_session
+            self._session = shared_session()
+        return self._session
+
+    def _get(self, path, **params):
+        import requests
+
+        url = f"{self.base_url}{path}"
+        try:
+            response = self.session.get(url, params=params)
+            response.raise_for_status()
+            return response.json()
+        except (requests.RequestException, ValueError) as e:
+            raise ProviderError(f"{url}: {e}") from e
+
+    def get_name(self, symbol):
+        return self._get("/name", symbol=symbol)["name"]
+
+    def get_history(self, symbol, start=None, period="1y"):
+        params = {"symbol": symbol, "period": period}
+        if start is not None:
+            params["start"] = start
+        return [tuple(bar) for bar in self._get("/history", **params)["bars"]]
+
+    def get_history_batch(self, symbols, start=None, period="1y"):
+        params = {"symbols": ",".join(symbols), "period": period}
+        if start is not None:
+            params["start"] = start
+        data = self._get("/batch", **params)["bars"]
+        return {symbol: [tuple(bar) for bar in data.get(symbol, [])] for symbol in symbols}
+
+    def get_quotes(self, symbols):
+        return self._get("/quotes", symbols=",".join(symbols))["quotes"]
+
+
+def create_provider(spec, latency=0.0, error_rate=0.0, pool_size=None, timeout=None):
+    """문자열 설정으로 제공자를 만드는 함수
+
+    "yfinance", "replay", "replay:<픽스처 폴더>", "http://호스트:포트" 형식을 받습니다.
+    pool_size(연결 수)나 timeout(초)을 지정하면 공유 세션 대신 그 설정의 세션을 만듭니다.
+    """
+    if spec == "replay" or (spec or "").startswith("replay:"):
+        fixtures = spec.partition(":")[2] or None
+        return ReplayProvider(fixtures=fixtures, latency=latency, error_rate=error_rate)
+    session = None
+    if pool_size is not None or timeout is not None:
+        from http_session import POOL_SIZE, READ_TIMEOUT, CONNECT_TIMEOUT, create_session
+        session = create_session(pool_size=pool_size or POOL_SIZE,
+                                 timeout=(CONNECT_TIMEOUT, timeout or READ_TIMEOUT))
+    if not spec or spec == "yfinance":
+        return YFinanceProvider(session)
+    if spec.startswith(("http://", "https://")):
+        return HttpProvider(spec, session)
+    raise ValueError(f"알 수 없는 시세 제공자입니다: {spec}")
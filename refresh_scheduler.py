@@ -0,0 +1,156 @@
+import heapq
+import time
+from datetime import datetime, timedelta, timezone
+
+import metrics
+from stock_fetch import RateLimiter
+
+# 한국 표준시 (서머타임 없음)
+KST = timezone(timedelta(hours=9), "KST")
+# KRX 정규장 시간 (KST)
+MARKET_OPEN = (9, 0)
+MARKET_CLOSE = (15, 30)
+
+# 한 종목을 다시 조회하기까지의 최소 간격(초)
+DEFAULT_MAX_AGE = 15 * 60
+# 자동 새로고침 전체의 초당 최대 요청 수
+DEFAULT_RATE = 1.0
+# 동시에 진행할 최대 조회 수
+DEFAULT_MAX_IN_FLIGHT = 4
+# 오류 후 다시 시도하기까지의 대기 시간(초) - 연속 오류마다 2배, 최대 BACKOFF_MAX
+BACKOFF_BASE = 2.0
+BACKOFF_MAX = 5 * 60
+
+
+def _session(day):
+    """그날의 장 시작/종료 시각(KST datetime)을 반환하는 함수"""
+    start = day.replace(hour=MARKET_OPEN[0], minute=MARKET_OPEN[1], second=0, microsecond=0)
+    end = day.replace(hour=MARKET_CLOSE[0], minute=MARKET_CLOSE[1], second=0, microsecond=0)
+    return start, end
+
+
+def is_market_open(now=None):
+    """now(유닉스 시각)가 KRX 정규장 시간(평일 09:00~15:30 KST)인지 확인하는 함수
+
+    공휴일 휴장은 알 수 없으므로 평일은 모두 개장일로 봅니다.
+    """
+    moment = datetime.fromtimestamp(time.time() if now is None else now, KST)
+    if moment.weekday() >= 5:
+        return False
+    start, end = _session(moment)
+    return start <= moment < end
+
+
+def seconds_until_open(now=None):
+    """다음 장 시작까지 남은 시간(초)을 반환하는 함수 (장중이면 0)"""
+    now = time.time() if now is None else now
+    if is_market_open(now):
+        return 0.0
+    moment = datetime.fromtimestamp(now, KST)
+    day = moment
+    while True:
+        start, _ = _session(day)
+        if day.weekday() < 5 and start > moment:
+            return (start - moment).total_seconds()
+        day += timedelta(days=1)
+
+
+class RefreshScheduler:
+    """자동 새로고침할 종목을 고르는 스케줄러 (조회는 호출하는 쪽에서 실행)
+
+    poll()은 마지막 조회 후 max_age가 지난 종목을 가장 오래된 것부터, 초당 요청 수(rate)와
+    동시 조회 수(max_in_flight) 안에서 골라 반환합니다. 조회가 끝나면 complete()로 알려 주며,
+    실패하면 연속 실패 횟수에 따라 대기 시간을 2배씩 늘려 그동안 새 조회를 시작하지 않습니다.
+    market_hours_only가 True이면 장중에만 종목을 고릅니다.
+    """
+
+    def __init__(self, max_age=DEFAULT_MAX_AGE, rate=DEFAULT_RATE,
+                 max_in_flight=DEFAULT_MAX_IN_FLIGHT, backoff_base=BACKOFF_BASE,
+                 backoff_max=BACKOFF_MAX, market_hours_only=True, clock=time.time):
+        self.max_age = max_age
+        self.max_in_flight = max_in_flight
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.market_hours_only = market_hours_only
+        self.clock = clock
+        self.limiter = RateLimiter(rate)
+        self.failures = 0
+        self.paused_until = 0.0
+        self._refreshed = {}  # 틱커 -> 마지막으로 조회에 성공한 시각 (한 번도 없으면 0)
+        self._heap = []       # (마지막 조회 시각, 틱커) - 오래된 순, 지난 항목은 꺼낼 때 버림
+        self.in_flight = set()
+
+    def set_tickers(self, tickers):
+        """새로고침할 종목 목록을 바꾸는 함수 (이미 있는 종목의 조회 시각은 유지)"""
+        tickers = set(tickers)
+        for ticker in list(self._refreshed):
+            if ticker not in tickers:
+                del self._refreshed[ticker]
+        for ticker in tickers:
+            if ticker not in self._refreshed:
+                self._refreshed[ticker] = 0.0
+                heapq.heappush(self._heap, (0.0, ticker))
+        if len(self._heap) > 2 * len(self._refreshed) + 64:
+            # 지운 종목의 항목이 쌓이면 힙을 다시 만듭니다.
+            self._heap = [(refreshed, ticker) for ticker, refreshed in self._refreshed.items()
+                          if ticker not in self.in_flight]
+            heapq.heapify(self._heap)
+
+    def mark_refreshed(self, ticker, now=None):
+        """다른 경로(전체 새로고침, 입력창 조회 등)로 조회된 종목의 시각을 갱신하는 함수"""
+        if ticker in self._refreshed and ticker not in self.in_flight:
+            now = self.clock() if now is None else now
+            self._refreshed[ticker] = now
+            heapq.heappush(self._heap, (now, ticker))
+
+    def is_active(self, now=None):
+        now = self.clock() if now is None else now
+        return not self.market_hours_only or is_market_open(now)
+
+    def poll(self, now=None):
+        """지금 조회를 시작할 종목 목록을 반환하는 함수"""
+        now = self.clock() if now is None else now
+        if not self.is_active(now) or now < self.paused_until:
+            return []
+        tickers = []
+        while self._heap and len(self.in_flight) < self.max_in_flight:
+            refreshed, ticker = self._heap[0]
+            if self._refreshed.get(ticker) != refreshed or ticker in self.in_flight:
+                heapq.heappop(self._heap)  # 지워졌거나 이미 갱신된 종목
+                continue
+            if now - refreshed < self.max_age or not self.limiter.try_acquire():
+                break
+            heapq.heappop(self._heap)
+            self.in_flight.add(ticker)
+            tickers.append(ticker)
+        metrics.inc("scheduler_dispatched_total", len(tickers))
+        return tickers
+
+    def complete(self, ticker, ok, now=None):
+        """조회가 끝났음을 알리는 함수 (ok가 False이면 대기 시간을 늘림)"""
+        now = self.clock() if now is None else now
+        self.in_flight.discard(ticker)
+        if ok:
+            self.failures = 0
+        else:
+            self.failures += 1
+            delay = min(self.backoff_max, self.backoff_base * 2 ** (self.failures - 1))
+            self.paused_until = max(self.paused_until, now + delay)
+            metrics.inc("scheduler_backoffs_total")
+        if ticker in self._refreshed:
+            if ok:
+                self._refreshed[ticker] = now
+            # 실패한 종목은 조회 시각을 그대로 두어 대기 후 가장 먼저 다시 시도합니다.
+            heapq.heappush(self._heap, (self._refreshed[ticker], ticker))
+
+    def next_poll_delay(self, now=None):
+        """다음에 poll()을 호출하면 좋은 시점까지의 시간(초)을 반환하는 함수"""
+        now = self.clock() if now is None else now
+        if not self.is_active(now):
+            return seconds_until_open(now)
+        if now < self.paused_until:
+            return self.paused_until - now
+        stalest = min(self._refreshed.values(), default=None)
+        if stalest is None:
+            return self.max_age
+        return max(0.0, stalest + self.max_age - now)
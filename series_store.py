@@ -0,0 +1,249 @@
+"""종목별 종가 시계열을 하나의 연속된 배열로 보관하는 저장소
+
+일 번호(1970-01-01부터의 일 수, int32)와 종가(float32) 배열을 모든 종목이 함께 쓰고,
+종목별 시작 위치(offsets)로 구분합니다. 파일은 그대로 메모리 매핑해서 읽으므로 파싱이 없고,
+종목 수천 개의 수년치 일봉도 몇 MB 안에 들어갑니다.
+
+원본 데이터는 SQLite 시세 캐시(PriceCache)이며, 이 파일은 캐시의 세대 번호(generation)와 함께
+저장한 스냅샷입니다. 세대 번호가 다르면 캐시에서 다시 만듭니다.
+"""
+import json
+import os
+import struct
+import threading
+
+import metrics
+
+MAGIC = b"KSSERIES"
+VERSION = 1
+# 매직, 버전, 캐시 세대 번호, 종목 수, 일봉 수, 종목 목록(JSON) 길이
+_HEADER = struct.Struct("<8sIqqqq")
+
+
+def _aligned(size, alignment=8):
+    return (size + alignment - 1) // alignment * alignment
+
+
+def _merge(days, closes, new_days, new_closes):
+    """기존 시계열에 새 일봉을 합치는 함수 (같은 날짜는 새 값으로 바꿈)"""
+    import numpy as np
+
+    all_days = np.concatenate([days, new_days])
+    all_closes = np.concatenate([closes, new_closes])
+    order = np.argsort(all_days, kind="stable")
+    all_days = all_days[order]
+    all_closes = all_closes[order]
+    # 안정 정렬이므로 같은 날짜 중 마지막(새 값)만 남깁니다.
+    keep = np.append(all_days[1:] != all_days[:-1], True)
+    return all_days[keep], all_closes[keep]
+
+
+def bars_to_arrays(bars):
+    """(ISO 날짜, 시가, 고가, 저가, 종가, 거래량) 목록을 (일 번호, 종가) 배열로 바꾸는 함수"""
+    import numpy as np
+
+    days = np.array([bar[0] for bar in bars], dtype="datetime64[D]").astype(np.int32)
+    closes = np.array([bar[4] for bar in bars], dtype=np.float32)
+    return days, closes
+
+
+class SeriesStore:
+    """메모리 매핑한 스냅샷과 이후 바뀐 종목(overlay)으로 이루어진 종가 시계열 저장소
+
+    여러 작업 스레드에서 함께 사용할 수 있도록 잠금으로 보호합니다.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.generation = None
+        self._lock = threading.Lock()
+        self._index = {}      # 심볼 -> 스냅샷 안의 종목 번호
+        self._offsets = None
+        self._days = None
+        self._closes = None
+        self._overlay = {}    # 심볼 -> (일 번호, 종가) - 스냅샷 이후 바뀐 종목
+        self.dirty = False
+
+    def __len__(self):
+        with self._lock:
+            return len(self._index.keys() | self._overlay.keys())
+
+    def open(self):
+        """스냅샷 파일을 메모리 매핑하는 함수 (없거나 형식이 다르면 False)"""
+        with self._lock:
+            return self._map()
+
+    def _map(self):
+        import numpy as np
+
+        if self.path is None:
+            return False
+        try:
+            with open(self.path, "rb") as file:
+                header = file.read(_HEADER.size)
+                magic, version, generation, count, points, names_size = _HEADER.unpack(header)
+                if magic != MAGIC or version != VERSION:
+                    return False
+                names = json.loads(file.read(names_size).decode("utf-8"))
+        except (OSError, struct.error, ValueError):
+            return False
+        position = _aligned(_HEADER.size + names_size)
+        offsets = np.memmap(self.path, dtype=np.int64, mode="r", offset=position,
+                            shape=(count + 1,))
+        position += offsets.nbytes
+        days = np.memmap(self.path, dtype=np.int32, mode="r", offset=position,
+                         shape=(points,)) if points else np.empty(0, dtype=np.int32)
+        position += _aligned(points * 4)
+        closes = np.memmap(self.path, dtype=np.float32, mode="r", offset=position,
+                           shape=(points,)) if points else np.empty(0, dtype=np.float32)
+        self._index = {name: i for i, name in enumerate(names)}
+        self._offsets, self._days, self._closes = offsets, days, closes
+        self._overlay = {}
+        self.generation = generation
+        self.dirty = False
+        return True
+
+    def load_rows(self, rows, generation):
+        """(심볼, ISO 날짜, 종가) 행(심볼, 날짜순)으로 메모리 안의 시계열을 새로 만드는 함수"""
+        import numpy as np
+
+        names = []
+        starts = []
+        dates = []
+        values = []
+        for symbol, day, close in rows:
+            if not names or names[-1] != symbol:
+                names.append(symbol)
+                starts.append(len(dates))
+            dates.append(day)
+            values.append(close)
+        offsets = np.array(starts + [len(dates)], dtype=np.int64)
+        days = np.array(dates, dtype="datetime64[D]").astype(np.int32)
+        closes = np.array(values, dtype=np.float32)
+        with self._lock:
+            self._index = {name: i for i, name in enumerate(names)}
+            self._offsets, self._days, self._closes = offsets, days, closes
+            self._overlay = {}
+            self.generation = generation
+            self.dirty = True
+
+    def _series(self, symbol):
+        series = self._overlay.get(symbol)
+        if series is not None:
+            return series
+        i = self._index.get(symbol)
+        if i is None:
+            return None
+        start, end = int(self._offsets[i]), int(self._offsets[i + 1])
+        return self._days[start:end], self._closes[start:end]
+
+    def series(self, symbol):
+        """심볼의 (일 번호, 종가) 배열 복사본을 반환하는 함수 (없으면 빈 배열)"""
+        import numpy as np
+
+        with self._lock:
+            series = self._series(symbol)
+            if series is None:
+                return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32)
+            return np.array(series[0]), np.array(series[1])
+
+    def merge(self, symbol, bars, generation=None):
+        """새로 받은 일봉을 심볼의 시계열에 합치는 함수"""
+        import numpy as np
+
+        if not bars:
+            return
+        new_days, new_closes = bars_to_arrays(bars)
+        with self._lock:
+            series = self._series(symbol)
+            if series is None:
+                series = (np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32))
+            self._overlay[symbol] = _merge(series[0], series[1], new_days, new_closes)
+            if generation is not None:
+                self.generation = generation
+            self.dirty = True
+
+    def pack(self, symbols):
+        """여러 심볼의 시계열을 (일 번호, 종가, 구간 시작 위치) 배열로 모으는 함수
+
+        lookback.compute_packed에 그대로 넘길 수 있으며, 없는 심볼은 빈 구간이 됩니다.
+        스냅샷에 있는 종목은 한 번의 인덱싱으로 모읍니다.
+        """
+        import numpy as np
+
+        with self._lock:
+            count = len(symbols)
+            base = np.array([-1 if symbol in self._overlay else self._index.get(symbol, -1)
+                             for symbol in symbols], dtype=np.int64)
+            lengths = np.zeros(count, dtype=np.int64)
+            in_base = base >= 0
+            source_start = np.empty(0, dtype=np.int64)
+            if in_base.any():
+                source_start = np.asarray(self._offsets[base[in_base]])
+                lengths[in_base] = self._offsets[base[in_base] + 1] - source_start
+            overlay = [(i, self._overlay[symbol]) for i, symbol in enumerate(symbols)
+                       if symbol in self._overlay]
+            for i, (days, _) in overlay:
+                lengths[i] = len(days)
+
+            offsets = np.zeros(count + 1, dtype=np.int64)
+            np.cumsum(lengths, out=offsets[1:])
+            days = np.empty(int(offsets[-1]), dtype=np.int64)
+            closes = np.empty(int(offsets[-1]), dtype=np.float64)
+            if in_base.any():
+                base_lengths = lengths[in_base]
+                # 각 구간 안에서의 위치 (0, 1, 2, ..., 0, 1, ...)
+                within = (np.arange(base_lengths.sum())
+                          - np.repeat(np.cumsum(base_lengths) - base_lengths, base_lengths))
+                target = np.repeat(offsets[:-1][in_base], base_lengths) + within
+                source = np.repeat(source_start, base_lengths) + within
+                days[target] = self._days[source]
+                closes[target] = self._closes[source]
+            for i, (series_days, series_closes) in overlay:
+                days[offsets[i]:offsets[i + 1]] = series_days
+                closes[offsets[i]:offsets[i + 1]] = series_closes
+        return days, closes, offsets
+
+    def save(self):
+        """스냅샷과 overlay를 합쳐서 파일로 저장하고 다시 메모리 매핑하는 함수"""
+        import numpy as np
+
+        with self._lock:
+            if self.path is None:
+                return
+            names = sorted(self._index.keys() | self._overlay.keys())
+            parts = [self._series(name) for name in names]
+            days = (np.concatenate([part[0] for part in parts]).astype(np.int32)
+                    if parts else np.empty(0, dtype=np.int32))
+            closes = (np.concatenate([part[1] for part in parts]).astype(np.float32)
+                      if parts else np.empty(0, dtype=np.float32))
+            offsets = np.zeros(len(names) + 1, dtype=np.int64)
+            np.cumsum([len(part[0]) for part in parts], out=offsets[1:])
+            parts = None
+
+            with metrics.timer("series_save"):
+                names_blob = json.dumps(names).encode("utf-8")
+                tmp_path = self.path + ".tmp"
+                try:
+                    with open(tmp_path, "wb") as file:
+                        file.write(_HEADER.pack(MAGIC, VERSION, self.generation or 0, len(names),
+                                                len(days), len(names_blob)))
+                        file.write(names_blob)
+                        file.write(b"\0" * (_aligned(file.tell()) - file.tell()))
+                        file.write(offsets.tobytes())
+                        file.write(days.tobytes())
+                        file.write(b"\0" * (_aligned(file.tell()) - file.tell()))
+                        file.write(closes.tobytes())
+                    # Windows에서는 매핑된 파일을 바꿀 수 없으므로 바꾸기 직전에 매핑을 놓습니다.
+                    self._index, self._offsets, self._days, self._closes = {}, None, None, None
+                    self._overlay = {}
+                    os.replace(tmp_path, self.path)
+                except OSError:
+                    # 저장하지 못해도 모은 배열로 메모리 안의 시계열을 그대로 유지합니다.
+                    self._index = {name: i for i, name in enumerate(names)}
+                    self._offsets, self._days, self._closes = offsets, days, closes
+                    self._overlay = {}
+                    if os.path.exists(tmp_path):
+                        os.remove(tmp_path)
+                    raise
+            self._map()
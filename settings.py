@@ -0,0 +1,50 @@
+import os
+import shutil
+import sys
+
+
+def resource_path(relative_path):
+    """PyInstaller로 패키징된 실행 파일에서 리소스를 올바르게 찾기 위한 함수"""
+    try:
+        # PyInstaller가 사용하는 임시 폴더로부터 리소스를 가져옵니다.
+        base_path = sys._MEIPASS
+    except Exception:
+        base_path = os.path.abspath(".")
+
+    return os.path.join(base_path, relative_path)
+
+
+def copy_resource_files():
+    """QSS 및 JSON 파일을 실행 파일과 동일한 폴더로 복사하는 함수"""
+    files_to_copy = ["style.qss", "stock_data.json"]
+    exec_dir = os.path.dirname(os.path.abspath(
+        sys.executable))  # 실행 파일의 실제 디렉토리
+
+    for file in files_to_copy:
+        source = resource_path(file)
+        destination = os.path.join(exec_dir, file)
+        if not os.path.exists(destination):
+            shutil.copyfile(source, destination)
+
+
+# 현재 경로 설정
+current_dir = os.path.dirname(os.path.abspath(__file__))
+# QSS 파일 경로
+qss_path = os.path.join(current_dir, "style.qss")
+# JSON 파일 경로
+json_path = os.path.join(current_dir, "stock_data.json")
+# 가격 알림 규칙 파일과 알림 기록 파일 경로
+alerts_path = os.path.join(current_dir, "alert_rules.json")
+alert_log_path = os.path.join(current_dir, "alerts.log")
+# 포트폴리오 저장소(SQLite) 파일 경로
+db_path = os.path.join(current_dir, "stock_data.db")
+# KRX 종목 목록 파일 경로
+symbols_path = os.path.join(current_dir, "krx_symbols.json")
+# 시세 캐시 파일 경로
+price_cache_path = os.path.join(current_dir, "price_cache.db")
+# 포트폴리오 스냅샷 기록 파일 경로
+history_path = os.path.join(current_dir, "portfolio_history.bin")
+# HTTP 응답 캐시 파일 경로
+http_cache_path = os.path.join(current_dir, "http_cache.db")
+# 지표(metrics) 저장 파일 경로 (Prometheus 형식은 확장자만 .prom)
+metrics_path = os.path.join(current_dir, "metrics.json")
@@ -0,0 +1,402 @@
+"""포트폴리오 스냅샷 기록 (새로고침할 때마다 그날의 1년전/6개월전/현재 가격을 보관)
+
+스냅샷은 하루에 하나이며(같은 날 다시 새로고침하면 바꿈), 파일 하나에 열(필드 x 종목) 단위
+정수 배열로 보관합니다. 스냅샷은 BLOCK_SIZE개씩 블록으로 묶고, 블록마다 첫 스냅샷 값(int64)과
+이후 스냅샷의 전날 대비 차이값만 저장합니다. 차이값은 열(필드 x 종목)마다 블록 안의 값이 들어가는
+가장 작은 정수형(int8/16/32/64)을 골라 같은 정수형의 열끼리 모아 저장하므로, 비싼 종목 하나 때문에
+다른 열이 커지지 않고 수백 종목의 수년치 일별 스냅샷도 몇 MB 안에 들어갑니다.
+
+파일은 그대로 메모리 매핑해서 읽으며, 특정 날짜의 스냅샷은 블록 하나의 차이값만 더하면 되므로
+몇 밀리초 안에 만들 수 있습니다. 값이 없는 가격은 0으로 저장합니다.
+
+덧붙일 때는 마지막 블록만 다시 만들어 이름 목록, 블록 목록과 함께 파일 끝에 쓰고, 마지막으로
+헤더의 블록 목록 위치를 바꿉니다. 지난 블록은 그대로 두므로 덧붙이는 비용은 기록 길이와 상관없고,
+중간에 종료되어도 헤더는 이전 블록 목록을 가리킵니다. 바뀌기 전의 마지막 블록과 블록 목록은
+빈 공간으로 남으며, 빈 공간이 사용 중인 크기보다 커지면 파일 전체를 새로 써서 정리합니다.
+"""
+import json
+import os
+import struct
+import threading
+from datetime import date
+
+import metrics
+from file_lock import FileLock
+from stock_model import PRICE_FIELDS
+
+MAGIC = b"KSHISTRY"
+VERSION = 2
+# 블록 하나에 담는 스냅샷 수 (날짜 하나를 조회할 때 더하는 차이값의 최대 개수)
+BLOCK_SIZE = 32
+# 매직, 버전, 필드 수, 종목 수, 블록 수, 이름 목록(JSON) 길이, 이름 목록과 블록 목록의 위치
+_HEADER = struct.Struct("<8sIIqqqq")
+# 블록 목록의 열: 첫 날짜, 마지막 날짜, 스냅샷 수, 종목 수, 블록 바이트 수, 파일 안의 위치
+_BLOCK_FIELDS = 6
+# 빈 공간이 사용 중인 크기의 이 배를 넘으면 파일 전체를 새로 씀
+_COMPACT_RATIO = 1
+# 차이값 바이트 수 -> 정수형
+_DELTA_TYPES = {1: "<i1", 2: "<i2", 4: "<i4", 8: "<i8"}
+_WIDTHS = tuple(_DELTA_TYPES)
+
+
+def _aligned(size, alignment=8):
+    return (size + alignment - 1) // alignment * alignment
+
+
+def day_number(value):
+    """날짜(date 또는 ISO 문자열)를 1970-01-01부터의 일 수로 바꾸는 함수"""
+    import numpy as np
+
+    return int(np.datetime64(value, "D").astype(np.int64))
+
+
+def day_to_date(day):
+    """일 수를 datetime.date로 바꾸는 함수"""
+    import numpy as np
+
+    return np.datetime64(int(day), "D").item()
+
+
+def _padding(size):
+    return b"\0" * (_aligned(size) - size)
+
+
+def _encode_block(days, values):
+    """(스냅샷 수) 날짜와 (스냅샷 수, 필드 수, 종목 수) 값을 블록 바이트로 만드는 함수
+
+    블록은 날짜(int32), 첫 스냅샷 값(int64), 열별 차이값 바이트 수(uint8), 바이트 수별로 모은
+    차이값 배열 순서이며, 각 부분은 8바이트 단위로 정렬합니다.
+    """
+    import numpy as np
+
+    values = values.reshape(len(values), -1)
+    deltas = np.diff(values, axis=0)
+    widths = np.ones(values.shape[1], dtype=np.uint8)
+    if len(deltas):
+        low, high = deltas.min(axis=0), deltas.max(axis=0)
+        for width in _WIDTHS[:-1]:
+            info = np.iinfo(_DELTA_TYPES[width])
+            widths[(low < info.min) | (high > info.max)] = width * 2
+    parts = [np.asarray(days, dtype="<i4").tobytes()]
+    parts.append(_padding(len(parts[0])))
+    parts.append(np.ascontiguousarray(values[0], dtype="<i8").tobytes())
+    parts.append(widths.tobytes() + _padding(len(widths)))
+    for width in _WIDTHS:
+        group = deltas[:, widths == width].astype(_DELTA_TYPES[width]).tobytes()
+        parts.append(group + _padding(len(group)))
+    return b"".join(parts)
+
+
+class SnapshotHistory:
+    """날짜별 포트폴리오 가격 스냅샷을 블록 단위 차이값으로 보관하는 메모리 매핑 저장소
+
+    - append(rows, day): 그날의 스냅샷을 덧붙임 (다른 프로그램과 함께 쓸 수 있도록 파일을 잠금)
+    - snapshot(day): 그날(없으면 그 이전 가장 가까운 날)의 (날짜, 틱커 -> 필드 값 튜플)
+    - series(ticker, start, end): 한 종목의 기간 내 (일 수 배열, 값 배열)
+
+    여러 작업 스레드에서 함께 사용할 수 있도록 잠금으로 보호합니다.
+    """
+
+    def __init__(self, path, fields=PRICE_FIELDS):
+        self.path = path
+        self.fields = tuple(fields)
+        self._lock = threading.Lock()
+        self._stat = None
+        self._clear()
+
+    def _clear(self):
+        import numpy as np
+
+        self._tickers = []
+        self._ticker_index = {}
+        self._blocks = np.zeros((0, _BLOCK_FIELDS), dtype=np.int64)
+        self._data = None
+
+    def __len__(self):
+        with self._lock:
+            self._refresh()
+            return int(self._blocks[:, 2].sum())
+
+    def _file_stat(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+    def _refresh(self):
+        """파일이 바뀌었으면(다른 프로그램이 덧붙인 경우 등) 다시 메모리 매핑하는 함수"""
+        stat = self._file_stat()
+        if stat != self._stat:
+            self._map()
+            self._stat = stat
+
+    def _map(self):
+        import numpy as np
+
+        self._clear()
+        try:
+            with open(self.path, "rb") as file:
+                header = file.read(_HEADER.size)
+                magic, version, field_count, ticker_count, block_count, names_size, footer = \
+                    _HEADER.unpack(header)
+                if magic != MAGIC or version != VERSION:
+                    print(f"Error reading snapshot history: 형식이 다른 파일입니다 ({self.path})")
+                    return False
+                file.seek(footer)
+                names = json.loads(file.read(names_size).decode("utf-8"))
+        except FileNotFoundError:
+            return False
+        except (OSError, struct.error, ValueError) as e:
+            print(f"Error reading snapshot history: {e}")
+            return False
+        if tuple(names["fields"]) != self.fields or len(names["tickers"]) != ticker_count:
+            print(f"Error reading snapshot history: 필드 목록이 다릅니다 ({self.path})")
+            return False
+        position = _aligned(footer + names_size)
+        data = np.memmap(self.path, dtype=np.uint8, mode="r")
+        self._blocks = (data[position:position + block_count * _BLOCK_FIELDS * 8]
+                        .view("<i8").reshape(block_count, _BLOCK_FIELDS))
+        self._data = data
+        self._tickers = names["tickers"]
+        self._ticker_index = {ticker: i for i, ticker in enumerate(self._tickers)}
+        return True
+
+    def _block(self, number):
+        """블록의 (날짜 배열, 첫 스냅샷 값, [(열 번호 배열, 차이값 배열), ...])을 반환하는 함수
+
+        첫 스냅샷 값은 (필드 수 x 종목 수) 1차원 배열이고, 차이값은 바이트 수별로
+        (스냅샷 수 - 1, 열 수) 배열입니다. 모두 파일을 매핑한 배열입니다.
+        """
+        import numpy as np
+
+        count, tickers, offset = (int(value) for value in self._blocks[number][[2, 3, 5]])
+        columns = len(self.fields) * tickers
+        start = offset
+        days = self._data[start:start + count * 4].view("<i4")
+        start += _aligned(count * 4)
+        base = self._data[start:start + columns * 8].view("<i8")
+        start += columns * 8
+        widths = self._data[start:start + columns]
+        start += _aligned(columns)
+        groups = []
+        for width in _WIDTHS:
+            group_columns = np.flatnonzero(widths == width)
+            size = (count - 1) * len(group_columns) * width
+            deltas = (self._data[start:start + size].view(_DELTA_TYPES[width])
+                      .reshape(count - 1, len(group_columns)))
+            groups.append((group_columns, deltas))
+            start += _aligned(size)
+        return days, base, groups
+
+    def _block_values(self, number):
+        """블록의 모든 스냅샷 값을 (스냅샷 수, 필드 수, 종목 수) 배열로 풀어내는 함수"""
+        import numpy as np
+
+        days, base, groups = self._block(number)
+        values = np.empty((len(days), len(base)), dtype=np.int64)
+        values[0] = base
+        for group_columns, deltas in groups:
+            values[1:, group_columns] = np.cumsum(deltas, axis=0, dtype=np.int64)
+        values[1:] += base
+        return np.array(days), values.reshape(len(days), len(self.fields), -1)
+
+    def _find(self, day):
+        """day 이전(같은 날 포함) 마지막 스냅샷의 (블록 번호, 블록 안의 위치)를 반환하는 함수"""
+        import numpy as np
+
+        number = int(np.searchsorted(self._blocks[:, 0], day, side="right")) - 1
+        if number < 0:
+            return None
+        days, _, _ = self._block(number)
+        return number, int(np.searchsorted(days, day, side="right")) - 1
+
+    def dates(self):
+        """스냅샷이 있는 날짜(datetime.date) 목록을 반환하는 함수 (오래된 순)"""
+        with self._lock:
+            self._refresh()
+            return [day_to_date(day) for number in range(len(self._blocks))
+                    for day in self._block(number)[0]]
+
+    @metrics.timed("history_query")
+    def snapshot(self, day):
+        """day(또는 그 이전 가장 가까운 날)의 (날짜, 틱커 -> 필드 값 튜플)을 반환하는 함수
+
+        day 이전의 스냅샷이 없으면 None을 반환하며, 값이 없는 필드는 None입니다.
+        """
+        import numpy as np
+
+        with self._lock:
+            self._refresh()
+            found = self._find(day_number(day))
+            if found is None:
+                return None
+            number, index = found
+            days, base, groups = self._block(number)
+            values = np.array(base)
+            for group_columns, deltas in groups:
+                values[group_columns] += deltas[:index].sum(axis=0, dtype=np.int64)
+            values = values.reshape(len(self.fields), -1)
+            tickers = self._tickers[:values.shape[1]]
+            found_day = int(days[index])
+        present = values.any(axis=0)
+        columns = values.T.tolist()
+        result = {}
+        for ticker, has_value, column in zip(tickers, present.tolist(), columns):
+            if has_value:
+                result[ticker] = tuple(value or None for value in column)
+        return day_to_date(found_day), result
+
+    @metrics.timed("history_query")
+    def series(self, ticker, start=None, end=None):
+        """한 종목의 기간(start~end, 양 끝 포함) 스냅샷을 (일 수 배열, (스냅샷 수, 필드 수) 값 배열)로 반환하는 함수
+
+        값이 없는 필드는 0이며, 그 종목을 기록하기 전의 스냅샷도 0으로 채웁니다.
+        """
+        import numpy as np
+
+        start = None if start is None else day_number(start)
+        end = None if end is None else day_number(end)
+        days_parts = []
+        value_parts = []
+        with self._lock:
+            self._refresh()
+            column = self._ticker_index.get(ticker)
+            for number, (first_day, last_day, count, tickers, _, _) in enumerate(
+                    self._blocks.tolist()):
+                if (start is not None and last_day < start) or (end is not None and first_day > end):
+                    continue
+                days, base, groups = self._block(number)
+                values = np.zeros((count, len(self.fields)), dtype=np.int64)
+                if column is not None and column < tickers:
+                    # 필드별 열 번호 (필드 번호 x 종목 수 + 종목 번호)
+                    wanted = np.arange(len(self.fields)) * tickers + column
+                    values[:] = base[wanted]
+                    for group_columns, deltas in groups:
+                        found = np.searchsorted(group_columns, wanted)
+                        hit = found < len(group_columns)
+                        hit[hit] = group_columns[found[hit]] == wanted[hit]
+                        if hit.any():
+                            values[1:, hit] += np.cumsum(deltas[:, found[hit]], axis=0,
+                                                         dtype=np.int64)
+                keep = np.ones(count, dtype=bool)
+                if start is not None:
+                    keep &= days >= start
+                if end is not None:
+                    keep &= days <= end
+                days_parts.append(np.array(days[keep]))
+                value_parts.append(values[keep])
+        if not days_parts:
+            return np.empty(0, dtype=np.int32), np.empty((0, len(self.fields)), dtype=np.int64)
+        return np.concatenate(days_parts), np.concatenate(value_parts)
+
+    def append(self, rows, day=None):
+        """행(StockRow 등)들의 가격을 day(기본값: 오늘)의 스냅샷으로 덧붙이는 함수
+
+        같은 날짜의 스냅샷이 있으면 바꾸며, 마지막 스냅샷보다 이전 날짜면 ValueError를 냅니다.
+        같은 틱커의 행이 여러 개면 마지막 행의 값을 사용합니다.
+        """
+        import numpy as np
+
+        day = day_number(date.today() if day is None else day)
+        latest = {row.ticker: row for row in rows if row.ticker}
+        with FileLock(self.path), self._lock, metrics.timer("history_append"):
+            # 다른 프로그램이 덧붙인 스냅샷부터 읽습니다.
+            self._refresh()
+            tickers = list(self._tickers)
+            for ticker in latest:
+                if ticker not in self._ticker_index:
+                    tickers.append(ticker)
+            index = {ticker: i for i, ticker in enumerate(tickers)}
+            snapshot = np.zeros((len(self.fields), len(tickers)), dtype=np.int64)
+            for ticker, row in latest.items():
+                snapshot[:, index[ticker]] = [getattr(row, field) or 0 for field in self.fields]
+
+            blocks = self._blocks.tolist()
+            keep = len(blocks)
+            days, values = [day], snapshot[np.newaxis]
+            if blocks:
+                first_day, last_day, count = blocks[-1][:3]
+                if day < last_day:
+                    raise ValueError(f"마지막 스냅샷({day_to_date(last_day)})보다 이전 날짜입니다: "
+                                     f"{day_to_date(day)}")
+                if day == last_day or count < BLOCK_SIZE:
+                    # 마지막 블록을 풀어서 종목 수를 맞추고 스냅샷을 바꾸거나 덧붙입니다.
+                    keep -= 1
+                    old_days, old_values = self._block_values(keep)
+                    padded = np.zeros((count, len(self.fields), len(tickers)), dtype=np.int64)
+                    padded[:, :, :old_values.shape[2]] = old_values
+                    if day == last_day:
+                        old_days, padded = old_days[:-1], padded[:-1]
+                    days = np.append(old_days, day)
+                    values = np.concatenate([padded, snapshot[np.newaxis]])
+            block = _encode_block(days, values)
+            directory = blocks[:keep] + [[int(days[0]), int(days[-1]), len(days), len(tickers),
+                                          len(block), 0]]
+            names_blob = json.dumps({"fields": self.fields, "tickers": tickers},
+                                    ensure_ascii=False).encode("utf-8")
+            footer_size = _aligned(len(names_blob)) + len(directory) * _BLOCK_FIELDS * 8
+            used = _aligned(_HEADER.size) + sum(entry[4] for entry in directory) + footer_size
+            try:
+                if self._data is not None and (_aligned(len(self._data)) + len(block) + footer_size
+                                               - used <= used * _COMPACT_RATIO):
+                    self._write_end(block, directory, names_blob)
+                else:
+                    self._rewrite(block, directory, names_blob)
+            finally:
+                # 실패해도 파일은 이전 상태 그대로이므로 다음 조회 때 다시 매핑합니다.
+                self._stat = None
+            self._refresh()
+
+    def _header(self, directory, names_blob, footer):
+        # 마지막 블록의 종목 수가 전체 종목 수입니다.
+        return _HEADER.pack(MAGIC, VERSION, len(self.fields), directory[-1][3], len(directory),
+                            len(names_blob), footer)
+
+    def _write_end(self, block, directory, names_blob):
+        """새 블록과 이름 목록, 블록 목록을 파일 끝에 쓴 뒤 헤더가 그 위치를 가리키게 하는 함수"""
+        import numpy as np
+
+        position = _aligned(len(self._data))
+        directory[-1][5] = position
+        with open(self.path, "r+b") as file:
+            file.seek(position)
+            file.write(block)
+            file.write(names_blob + _padding(len(names_blob)))
+            file.write(np.array(directory, dtype="<i8").tobytes())
+            file.flush()
+            os.fsync(file.fileno())
+            # 새 내용이 디스크에 기록된 뒤에 헤더를 바꾸므로, 그 전에 종료되면 이전 상태가 남습니다.
+            file.seek(0)
+            file.write(self._header(directory, names_blob, position + len(block)))
+            file.flush()
+            os.fsync(file.fileno())
+
+    def _rewrite(self, block, directory, names_blob):
+        """남겨 둘 블록만 모아 파일 전체를 임시 파일에 새로 쓴 뒤 바꾸는 함수 (빈 공간 정리)"""
+        import numpy as np
+
+        sources = [(entry[5], entry[4]) for entry in directory[:-1]]
+        position = _aligned(_HEADER.size)
+        for entry in directory:
+            entry[5] = position
+            position += entry[4]
+        tmp_path = self.path + ".tmp"
+        try:
+            with open(tmp_path, "wb") as file:
+                file.write(self._header(directory, names_blob, position))
+                file.write(_padding(_HEADER.size))
+                for offset, size in sources:
+                    file.write(self._data[offset:offset + size])
+                file.write(block)
+                file.write(names_blob + _padding(len(names_blob)))
+                file.write(np.array(directory, dtype="<i8").tobytes())
+                file.flush()
+                os.fsync(file.fileno())
+            # Windows에서는 매핑된 파일을 바꿀 수 없으므로 바꾸기 직전에 매핑을 놓습니다.
+            self._clear()
+            os.replace(tmp_path, self.path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
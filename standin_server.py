@@ -0,0 +1,75 @@
+import json
+import threading
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from price_provider import ProviderError
+
+# 대체 서버의 기본 주소
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+
+class StandinHandler(BaseHTTPRequestHandler):
+    """/name, /history, /batch, /quotes 요청을 서버의 제공자(ReplayProvider 등)로 처리하는 핸들러"""
+
+    # 클라이언트가 연결을 다시 쓸 수 있도록(keep-alive) HTTP/1.1로 응답합니다.
+    protocol_version = "HTTP/1.1"
+    # 헤더와 본문을 따로 보내므로, 연결을 다시 쓸 때 지연 ACK를 기다리지 않도록 Nagle을 끕니다.
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        url = urllib.parse.urlsplit(self.path)
+        params = {key: values[-1] for key, values in urllib.parse.parse_qs(url.query).items()}
+        provider = self.server.provider
+        start = params.get("start")
+        period = params.get("period", "1y")
+        try:
+            if url.path == "/name":
+                body = {"name": provider.get_name(params["symbol"])}
+            elif url.path == "/history":
+                body = {"bars": provider.get_history(params["symbol"], start=start, period=period)}
+            elif url.path == "/batch":
+                symbols = [symbol for symbol in params.get("symbols", "").split(",") if symbol]
+                body = {"bars": provider.get_history_batch(symbols, start=start, period=period)}
+            elif url.path == "/quotes":
+                symbols = [symbol for symbol in params.get("symbols", "").split(",") if symbol]
+                body = {"quotes": provider.get_quotes(symbols)}
+            else:
+                self.send_error(404)
+                return
+        except KeyError as e:
+            self.send_error(400, f"missing parameter {e}")
+            return
+        except ProviderError as e:
+            # 주입된 오류는 서버 오류(503)로 응답해서 클라이언트가 접속 오류로 처리하게 합니다.
+            self.send_error(503, str(e))
+            return
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+def create_server(provider, host=DEFAULT_HOST, port=DEFAULT_PORT, verbose=False):
+    """provider의 응답을 HTTP로 제공하는 서버를 만드는 함수 (port가 0이면 빈 포트 사용)"""
+    server = ThreadingHTTPServer((host, port), StandinHandler)
+    server.daemon_threads = True
+    server.provider = provider
+    server.verbose = verbose
+    return server
+
+
+def start_background(provider, host=DEFAULT_HOST, port=0):
+    """서버를 백그라운드 스레드에서 실행하고 (서버, 주소)를 반환하는 함수 (벤치마크용)"""
+    server = create_server(provider, host, port)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    host, port = server.server_address[:2]
+    return server, f"http://{host}:{port}"
@@ -0,0 +1,32 @@
+import sys
+import time
+
+# 이 모듈을 처음 불러온 시각 (main.py가 가장 먼저 불러옴)
+START_TIME = time.perf_counter()
+
+_enabled = False
+_marks = []
+
+
+def enable():
+    """시작 시간 측정을 켜는 함수"""
+    global _enabled
+    _enabled = True
+
+
+def is_enabled():
+    return _enabled
+
+
+def mark(name):
+    """시작 후 경과 시간을 이름과 함께 기록하고 표준 오류로 출력하는 함수 (측정이 켜진 경우만)"""
+    if not _enabled:
+        return
+    elapsed = (time.perf_counter() - START_TIME) * 1000
+    _marks.append((name, elapsed))
+    print(f"[startup] {elapsed:8.1f} ms  {name}", file=sys.stderr)
+
+
+def marks():
+    """지금까지 기록한 (이름, 경과 ms) 목록을 반환하는 함수"""
+    return list(_marks)
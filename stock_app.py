@@ -0,0 +1,1166 @@
+import json
+import os
+import sqlite3
+import sys
+import time
+from datetime import date
+
+from PyQt5.QtWidgets import QDesktopWidget, QApplication, QWidget, QLabel, QLineEdit, QPushButton, QVBoxLayout, QAbstractItemView, QHBoxLayout, QGridLayout, QHeaderView, QCompleter, QComboBox, QFileDialog, QInputDialog, QStyle, QSystemTrayIcon
+from PyQt5.QtGui import QStandardItem, QStandardItemModel
+from PyQt5.QtCore import Qt, QObject, QRunnable, QThreadPool, QTimer, pyqtSignal
+import metrics
+import startup_profile
+from fx_rates import CURRENCIES, FxRates
+from portfolio_io import read_rows, write_rows
+from portfolio_store import PortfolioStore
+from price_alerts import (AlertEngine, append_alert_log, edit_rules, load_rules, parse_rule,
+                          summarize_alerts)
+from price_chart import PriceChart
+from refresh_scheduler import RefreshScheduler
+from settings import (alert_log_path, alerts_path, db_path, history_path, json_path, metrics_path,
+                      qss_path, symbols_path)
+from snapshot_history import SnapshotHistory
+from stock_fetch import StockFetcher, load_yfinance
+from stock_model import StockRow, format_price
+from stock_table import (COMPARE_COLUMNS, LOOKBACK_COLUMNS, StockFilterProxyModel, StockTableModel,
+                         StockTableView)
+from symbol_master import refresh_symbols
+
+# 틱커 입력 후 조회를 시작하기까지 기다리는 시간(ms)
+FETCH_DEBOUNCE_MS = 400
+# 동시에 실행할 조회 작업 수
+FETCH_MAX_THREADS = 4
+# 자동완성 목록에 보여 줄 최대 종목 수
+COMPLETION_LIMIT = 20
+# 지표 패널을 다시 그리는 간격(ms)
+METRICS_REFRESH_MS = 1000
+# 자동 새로고침 스케줄러를 다시 확인하는 최소/최대 간격(ms)
+AUTO_REFRESH_MIN_DELAY_MS = 200
+AUTO_REFRESH_MAX_DELAY_MS = 60 * 1000
+# 가격이 바뀐 뒤 기간 수익률을 다시 계산하기까지 기다리는 시간(ms) (연속된 갱신을 한 번에 계산)
+LOOKBACK_DELAY_MS = 500
+# 가져오기/내보내기 파일 선택 창의 형식 목록
+PORTFOLIO_FILE_FILTER = "종목 목록 (*.csv *.xlsx *.jsonl *.json)"
+# 실시간 시세를 받은 뒤 다음 요청까지 기다리는 시간(ms)과 강조 표시를 지우는 확인 간격(ms)
+LIVE_POLL_MS = 3000
+FLASH_CHECK_MS = 250
+# 다른 프로그램(다른 PC의 GUI, 명령줄 모드)이 저장소를 바꿨는지 확인하는 간격(ms)
+EXTERNAL_CHECK_MS = 1000
+# 자동 새로고침 결과를 스냅샷 기록에 반영하는 최소 간격(ms) (그 사이의 갱신은 한 번에 기록)
+HISTORY_DELAY_MS = 60 * 1000
+
+
+class FetchSignals(QObject):
+    """작업 스레드의 조회 결과를 GUI 스레드로 전달하는 시그널 모음"""
+    finished = pyqtSignal(int, str, object)  # 요청 번호, 틱커, 결과 (취소된 경우 None)
+    failed = pyqtSignal(int, str, str)       # 요청 번호, 틱커, 오류 메시지
+
+
+class FetchWorker(QRunnable):
+    """종목 조회 함수를 스레드 풀에서 실행하는 작업"""
+
+    def __init__(self, request_id, ticker, fetch, is_current):
+        super().__init__()
+        self.request_id = request_id
+        self.ticker = ticker
+        self.fetch = fetch  # 틱커 -> StockRow 조회 함수
+        # 요청 번호가 아직 최신인지 확인하는 함수 (더 새로운 요청이 들어오면 결과를 버림)
+        self.is_current = is_current
+        self.signals = FetchSignals()
+        # 스레드 풀이 아닌 StockApp이 수명을 관리합니다. (대기열에서 꺼내 취소할 수 있도록)
+        self.setAutoDelete(False)
+
+    def run(self):
+        if not self.is_current(self.request_id):
+            self.signals.finished.emit(self.request_id, self.ticker, None)
+            return
+        try:
+            result = self.fetch(self.ticker)
+        except Exception as e:
+            self.signals.failed.emit(self.request_id, self.ticker, str(e))
+            return
+        self.signals.finished.emit(self.request_id, self.ticker, result)
+
+
+class TaskSignals(QObject):
+    """백그라운드 작업 결과를 GUI 스레드로 전달하는 시그널 모음"""
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+
+class TaskWorker(QRunnable):
+    """임의의 함수를 스레드 풀에서 실행하고 반환값을 시그널로 전달하는 작업
+    (전체 새로고침, 종목 목록 갱신 등)"""
+
+    def __init__(self, func, *args):
+        super().__init__()
+        self.func = func
+        self.args = args
+        self.signals = TaskSignals()
+
+    def run(self):
+        try:
+            result = self.func(*self.args)
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+            return
+        self.signals.finished.emit(result)
+
+
+class StockApp(QWidget):
+    def __init__(self, portfolio_store=None, fetcher=None, history=None):
+        super().__init__()
+        # 포트폴리오 저장소와 종목 조회기 (시세 캐시, 종목 목록, 시장 확인 포함)
+        # 벤치마크 등에서는 다른 파일을 쓰는 저장소와 조회기, 스냅샷 기록을 넘겨받습니다.
+        self.portfolio_store = portfolio_store or PortfolioStore(db_path)
+        self.fetcher = fetcher or StockFetcher()
+        self.history = history if history is not None else SnapshotHistory(history_path)
+
+        # 백그라운드 조회용 스레드 풀과 요청 상태
+        self.thread_pool = QThreadPool(self)
+        self.thread_pool.setMaxThreadCount(FETCH_MAX_THREADS)
+        self.fetch_request_id = 0
+        self.fetch_workers = {}  # 요청 번호 -> 실행 중이거나 대기 중인 작업
+        self.refresh_worker = None
+        self.symbols_worker = None
+        self.warm_up_worker = None
+        self.first_painted = False
+
+        # 키 입력이 멈춘 뒤에만 조회하도록 하는 디바운스 타이머
+        self.fetch_timer = QTimer(self)
+        self.fetch_timer.setSingleShot(True)
+        self.fetch_timer.setInterval(FETCH_DEBOUNCE_MS)
+        self.fetch_timer.timeout.connect(self.load_stock_data)
+
+        # 지표 패널이 보이는 동안만 내용을 갱신하는 타이머
+        self.metrics_timer = QTimer(self)
+        self.metrics_timer.setInterval(METRICS_REFRESH_MS)
+        self.metrics_timer.timeout.connect(self.update_metrics_panel)
+
+        # 장중 자동 새로고침 (오래된 종목부터, 초당 요청 수 제한과 오류 시 대기 포함)
+        self.scheduler = RefreshScheduler(max_age=self.fetcher.cache.ttl)
+        self.auto_refresh_workers = {}  # 틱커 -> 실행 중인 조회 작업
+        self.auto_refresh_timer = QTimer(self)
+        self.auto_refresh_timer.setSingleShot(True)
+        self.auto_refresh_timer.timeout.connect(self.run_auto_refresh)
+
+        # 실시간 시세 (장중 분봉 현재가를 묶음으로 받아서 바뀐 셀만 다시 그림)
+        self.live_worker = None
+        self.live_timer = QTimer(self)
+        self.live_timer.setSingleShot(True)
+        self.live_timer.setInterval(LIVE_POLL_MS)
+        self.live_timer.timeout.connect(self.poll_live_quotes)
+        self.flash_timer = QTimer(self)
+        self.flash_timer.setInterval(FLASH_CHECK_MS)
+        self.flash_timer.timeout.connect(self.expire_flashes)
+
+        # 기간 수익률 열 (캐시된 일봉으로 계산, 열을 켠 경우에만)
+        self.lookback_worker = None
+        self.lookback_timer = QTimer(self)
+        self.lookback_timer.setSingleShot(True)
+        self.lookback_timer.setInterval(LOOKBACK_DELAY_MS)
+        self.lookback_timer.timeout.connect(self.update_lookbacks)
+
+        # 새로고침할 때마다 그날의 가격을 스냅샷 기록에 덧붙임 (파일 쓰기는 백그라운드에서)
+        self.history_worker = None
+        self.history_timer = QTimer(self)
+        self.history_timer.setSingleShot(True)
+        self.history_timer.setInterval(HISTORY_DELAY_MS)
+        self.history_timer.timeout.connect(self.record_snapshot)
+
+        # 선택한 종목의 가격 차트 (차트를 켠 경우에만 캐시된 일봉을 불러옴)
+        self.chart_worker = None
+        self.chart_ticker = None
+
+        # 표시 통화 환율 (시세 캐시에 함께 보관, 처음 고를 때만 받아옴)
+        self.fx_rates = FxRates(self.fetcher.cache, self.fetcher.provider)
+        self.fx_worker = None
+
+        # 종목 목록 가져오기/내보내기 (파일 읽기/쓰기는 백그라운드에서)
+        self.import_worker = None
+        self.export_worker = None
+
+        # 가격 알림 (규칙 파일이 바뀌면 다시 읽고, 가격이 바뀐 행만 확인)
+        self.alerts = AlertEngine()
+        self.alerts_mtime = None
+        self.tray = None
+        self.load_alert_rules()
+
+        # 다른 프로그램이 저장한 변경 감지 (마지막으로 반영한 변경 번호 이후의 행만 다시 읽음)
+        self.store_revision = 0
+        self.store_version = None
+        self.external_timer = QTimer(self)
+        self.external_timer.setInterval(EXTERNAL_CHECK_MS)
+        self.external_timer.timeout.connect(self.check_external_changes)
+
+        self.initUI()
+        self.external_timer.start()
+
+    def initUI(self):
+        # 윈도우 설정
+        self.setWindowTitle('한국주식 현재주가')
+        self.setGeometry(100, 100, 800, 800)
+
+        # 창을 중앙에 위치시키기
+        self.center()
+
+    def center(self):
+        """윈도우를 화면 중앙에 위치시키는 함수"""
+        qr = self.frameGeometry()
+        cp = QDesktopWidget().availableGeometry().center()
+        qr.moveCenter(cp)
+        self.move(qr.topLeft())
+
+        # 입력폼 타이틀 설정
+        title_label = QLabel('한국주식 현재주가', self)
+        title_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        title_label.setStyleSheet("font-size: 20pt; font-weight: bold;")
+
+        # 그리드 레이아웃 설정 (필드명과 입력 필드를 함께 배치)
+        grid_layout = QGridLayout()
+
+        # 틱커명 필드
+        ticker_label = QLabel('틱커명:', self)
+        self.ticker_input = QLineEdit(self)
+        self.ticker_input.setPlaceholderText("6자리 숫자, 종목명 또는 초성 입력")
+        self.ticker_input.textChanged.connect(self.schedule_stock_data)
+        self.ticker_input.textEdited.connect(self.update_completions)
+
+        # 종목코드/종목명/초성 자동완성 (로컬 종목 목록 검색 결과를 그대로 보여 줌)
+        self.completion_model = QStandardItemModel(self)
+        self.completer = QCompleter(self.completion_model, self)
+        self.completer.setCompletionMode(QCompleter.UnfilteredPopupCompletion)
+        self.completer.setCompletionRole(Qt.UserRole)  # 선택하면 종목코드만 입력
+        self.completer.activated[str].connect(self.on_symbol_chosen)
+        self.ticker_input.setCompleter(self.completer)
+
+        grid_layout.addWidget(ticker_label, 0, 0)
+        grid_layout.addWidget(self.ticker_input, 0, 1)
+
+        # 종목명 필드
+        name_label = QLabel('종목명:', self)
+        self.name_input = QLineEdit(self)
+        self.name_input.setPlaceholderText("종목명")
+
+        grid_layout.addWidget(name_label, 1, 0)
+        grid_layout.addWidget(self.name_input, 1, 1)
+
+        # 1년전가격 필드
+        price_1yr_label = QLabel('1년전가격:', self)
+        self.price_1yr_input = QLineEdit(self)
+        self.price_1yr_input.setPlaceholderText("1년전가격")
+
+        grid_layout.addWidget(price_1yr_label, 2, 0)
+        grid_layout.addWidget(self.price_1yr_input, 2, 1)
+
+        # 6개월전가격 필드
+        price_6mo_label = QLabel('6개월전가격:', self)
+        self.price_6mo_input = QLineEdit(self)
+        self.price_6mo_input.setPlaceholderText("6개월전가격")
+
+        grid_layout.addWidget(price_6mo_label, 3, 0)
+        grid_layout.addWidget(self.price_6mo_input, 3, 1)
+
+        # 현재가격 필드
+        current_price_label = QLabel('현재가격:', self)
+        self.current_price_input = QLineEdit(self)
+        self.current_price_input.setPlaceholderText("현재가격")
+
+        grid_layout.addWidget(current_price_label, 4, 0)
+        grid_layout.addWidget(self.current_price_input, 4, 1)
+
+        # 보유 수량 필드
+        quantity_label = QLabel('수량:', self)
+        self.quantity_input = QLineEdit(self)
+        self.quantity_input.setPlaceholderText("보유 수량 (주)")
+
+        grid_layout.addWidget(quantity_label, 5, 0)
+        grid_layout.addWidget(self.quantity_input, 5, 1)
+
+        # 평균 매입 단가 필드
+        avg_cost_label = QLabel('평균단가:', self)
+        self.avg_cost_input = QLineEdit(self)
+        self.avg_cost_input.setPlaceholderText("평균 매입 단가")
+
+        grid_layout.addWidget(avg_cost_label, 6, 0)
+        grid_layout.addWidget(self.avg_cost_input, 6, 1)
+
+        # 버튼 생성
+        add_button = QPushButton('추가', self)
+        update_button = QPushButton('수정', self)
+        delete_button = QPushButton('삭제', self)
+        reset_button = QPushButton('초기화', self)
+        self.refresh_button = QPushButton('전체 새로고침', self)
+        self.symbols_button = QPushButton('종목 목록 갱신', self)
+        self.import_button = QPushButton('가져오기', self)
+        self.import_button.setToolTip("CSV, XLSX, JSON Lines, JSON 파일의 종목을 한 번에 추가합니다")
+        self.export_button = QPushButton('내보내기', self)
+        self.auto_refresh_button = QPushButton('자동 새로고침', self)
+        self.auto_refresh_button.setCheckable(True)
+        self.auto_refresh_button.setToolTip("장중(09:00~15:30)에 오래된 종목부터 가격을 새로 조회합니다")
+        self.live_button = QPushButton('실시간', self)
+        self.live_button.setCheckable(True)
+        self.live_button.setToolTip("모든 종목의 장중 현재가를 몇 초마다 받아서 바뀐 가격만 표시합니다")
+        self.lookback_button = QPushButton('기간 수익률', self)
+        self.lookback_button.setCheckable(True)
+        self.lookback_button.setToolTip("1주/1개월/3개월/6개월/연초/1년/3년 수익률과 CAGR, 최대 낙폭 열을 표시합니다")
+        self.compare_button = QPushButton('비교', self)
+        self.compare_button.setCheckable(True)
+        self.compare_button.setToolTip("기록된 날짜의 1년전/6개월전/현재 가격과 지금 가격 대비 변화율 열을 표시합니다")
+        self.chart_button = QPushButton('차트', self)
+        self.chart_button.setCheckable(True)
+        self.chart_button.setToolTip("선택한 종목의 가격 차트를 표시합니다 (휠: 확대/축소, 끌기: 이동, 두 번 클릭: 전체)")
+        self.alert_button = QPushButton('알림', self)
+        self.alert_button.setToolTip("선택한 종목의 가격 알림을 추가합니다 (예: < 140,000, +5% 6개월전가격)")
+        self.metrics_button = QPushButton('지표', self)
+        self.metrics_button.setCheckable(True)
+        self.currency_combo = QComboBox(self)
+        self.currency_combo.addItems(CURRENCIES)
+        self.currency_combo.setToolTip("가격과 평가금액을 표시할 통화 (1년전/6개월전 가격은 그 시점의 환율)")
+
+        # 검색 필드
+        self.search_input = QLineEdit(self)
+        self.search_input.setPlaceholderText("틱커명 또는 종목명 검색")
+
+        # 테이블 생성 (모델/뷰: 화면에 보이는 셀만 그림)
+        self.table_model = StockTableModel(self)
+        self.table_model.totals_changed.connect(self.update_totals)
+        self.proxy_model = StockFilterProxyModel(self)
+        self.proxy_model.setSourceModel(self.table_model)
+        self.search_input.textChanged.connect(self.proxy_model.set_search_text)
+
+        self.table = StockTableView(self)
+        self.table.setModel(self.proxy_model)
+        self.table.setSortingEnabled(True)
+        self.table.sortByColumn(-1, Qt.AscendingOrder)  # 처음에는 저장된 순서대로 표시
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        # 행 높이를 고정하면 많은 행에서도 스크롤 시 높이 계산을 하지 않습니다.
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.table.clicked.connect(self.load_row_data)
+
+        # 평가금액/손익 합계
+        self.totals_label = QLabel(self)
+        self.totals_label.setAlignment(Qt.AlignmentFlag.AlignRight)
+
+        # 버튼 레이아웃 설정
+        button_layout = QHBoxLayout()
+        button_layout.addWidget(add_button)
+        button_layout.addWidget(update_button)
+        button_layout.addWidget(delete_button)
+        button_layout.addWidget(reset_button)
+        button_layout.addWidget(self.refresh_button)
+        button_layout.addWidget(self.symbols_button)
+        button_layout.addWidget(self.import_button)
+        button_layout.addWidget(self.export_button)
+        button_layout.addWidget(self.auto_refresh_button)
+        button_layout.addWidget(self.live_button)
+        button_layout.addWidget(self.lookback_button)
+        button_layout.addWidget(self.compare_button)
+        button_layout.addWidget(self.chart_button)
+        button_layout.addWidget(self.alert_button)
+        button_layout.addWidget(self.metrics_button)
+        button_layout.addWidget(self.currency_combo)
+
+        # 가격 차트 (처음에는 숨김)
+        self.chart = PriceChart(self)
+        self.chart.hide()
+
+        # 지표 패널 (조회 지연 시간, 캐시 적중률, 저장 시간 등, 처음에는 숨김)
+        self.metrics_panel = QWidget(self)
+        self.metrics_label = QLabel(self.metrics_panel)
+        self.metrics_label.setStyleSheet("font-size: 9pt;")
+        self.metrics_label.setTextInteractionFlags(Qt.TextSelectableByMouse)
+        metrics_save_button = QPushButton('지표 저장', self.metrics_panel)
+        metrics_layout = QHBoxLayout(self.metrics_panel)
+        metrics_layout.setContentsMargins(0, 0, 0, 0)
+        metrics_layout.addWidget(self.metrics_label, 1)
+        metrics_layout.addWidget(metrics_save_button)
+        self.metrics_panel.hide()
+
+        # 메인 레이아웃 설정
+        main_layout = QVBoxLayout()
+        main_layout.addWidget(title_label)
+        main_layout.addLayout(grid_layout)
+        main_layout.addLayout(button_layout)
+        main_layout.addWidget(self.search_input)
+        main_layout.addWidget(self.table)
+        main_layout.addWidget(self.totals_label)
+        main_layout.addWidget(self.chart)
+        main_layout.addWidget(self.metrics_panel)
+
+        # 인용구 레이아웃
+        quote_label = QLabel('made by 나종춘(2024)', self)
+        quote_label.setAlignment(Qt.AlignmentFlag.AlignRight)
+        quote_label.setStyleSheet("font-size: 10pt;")
+
+        main_layout.addWidget(quote_label)
+
+        self.setLayout(main_layout)
+
+        # QSS 스타일 적용
+        self.apply_stylesheet()
+
+        # 데이터 로드
+        self.load_data()
+
+        # 버튼 연결
+        add_button.clicked.connect(self.add_data)
+        update_button.clicked.connect(self.update_data)
+        delete_button.clicked.connect(self.delete_data)
+        reset_button.clicked.connect(self.reset_fields)
+        self.refresh_button.clicked.connect(self.refresh_all)
+        self.symbols_button.clicked.connect(self.refresh_symbol_master)
+        self.import_button.clicked.connect(self.import_file)
+        self.export_button.clicked.connect(self.export_file)
+        self.auto_refresh_button.toggled.connect(self.toggle_auto_refresh)
+        self.live_button.toggled.connect(self.toggle_live_quotes)
+        self.lookback_button.toggled.connect(self.toggle_lookback_columns)
+        self.compare_button.toggled.connect(self.toggle_compare_columns)
+        self.chart_button.toggled.connect(self.toggle_chart)
+        self.currency_combo.currentTextChanged.connect(self.change_currency)
+        self.alert_button.clicked.connect(self.add_alert_rule)
+        self.metrics_button.toggled.connect(self.toggle_metrics_panel)
+        metrics_save_button.clicked.connect(self.save_metrics)
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not self.first_painted:
+            self.first_painted = True
+            startup_profile.mark("first paint")
+            # 창이 그려진 뒤에 조회용 모듈(yfinance, pandas 등)을 미리 불러옵니다.
+            QTimer.singleShot(0, self.warm_up)
+
+    def closeEvent(self, event):
+        # 이번 실행에서 받은 일봉을 종가 시계열 파일에 저장해서 다음 실행에서 바로 사용합니다.
+        self.fetcher.cache.flush()
+        # 예약해 둔 스냅샷 기록(자동 새로고침 결과)은 닫기 전에 바로 기록합니다.
+        if self.history_timer.isActive():
+            self.history_timer.stop()
+            try:
+                self.history.append(self.table_model.rows())
+            except (OSError, ValueError) as e:
+                print(f"Error recording snapshot: {e}")
+        super().closeEvent(event)
+
+    def warm_up(self):
+        """yfinance를 백그라운드에서 미리 불러와서 첫 조회를 빠르게 하는 함수"""
+        self.warm_up_worker = TaskWorker(load_yfinance)
+        self.warm_up_worker.signals.finished.connect(self.on_warm_up_finished)
+        self.warm_up_worker.signals.failed.connect(self.on_warm_up_finished)
+        self.thread_pool.start(self.warm_up_worker)
+
+    def on_warm_up_finished(self, _result):
+        self.warm_up_worker = None
+        startup_profile.mark("yfinance loaded (background)")
+
+    def apply_stylesheet(self):
+        """QSS 스타일 시트를 적용하는 함수"""
+        try:
+            with open(qss_path, "r", encoding="utf-8") as file:
+                self.setStyleSheet(file.read())
+        except FileNotFoundError:
+            print(f"QSS 파일을 찾을 수 없습니다: {qss_path}")
+            # 필요시 예외 처리 추가 (기본 스타일을 설정하거나, 경고 메시지를 표시)
+
+
+    def schedule_stock_data(self):
+        """틱커 입력이 바뀔 때마다 이전 요청을 무효화하고 디바운스 타이머를 다시 시작하는 함수"""
+        self.cancel_stock_data()
+        self.fetch_timer.start()
+
+    def cancel_stock_data(self):
+        """진행 중이거나 대기 중인 조회 요청을 취소하는 함수"""
+        self.fetch_timer.stop()
+        # 요청 번호를 올리면 이미 실행 중인 작업의 결과는 무시됩니다.
+        self.fetch_request_id += 1
+        for request_id, worker in list(self.fetch_workers.items()):
+            # 아직 시작되지 않은 작업은 스레드 풀 대기열에서 제거합니다.
+            if self.thread_pool.tryTake(worker):
+                del self.fetch_workers[request_id]
+
+    def is_current_request(self, request_id):
+        """요청 번호가 가장 최근 요청인지 확인하는 함수 (작업 스레드에서도 호출됨)"""
+        return request_id == self.fetch_request_id
+
+    def load_stock_data(self):
+        """틱커명을 입력하면 종목명과 가격 데이터를 백그라운드에서 로드하는 함수"""
+        ticker = self.ticker_input.text()
+        if len(ticker) == 6 and ticker.isdigit():
+            worker = FetchWorker(self.fetch_request_id, ticker, self.fetcher.fetch,
+                                 self.is_current_request)
+            worker.signals.finished.connect(self.on_stock_data_loaded)
+            worker.signals.failed.connect(self.on_stock_data_failed)
+            worker.started_at = time.perf_counter()
+            self.fetch_workers[worker.request_id] = worker
+            self.thread_pool.start(worker)
+
+    def on_stock_data_loaded(self, request_id, ticker, result):
+        """조회가 끝나면 결과를 입력 필드에 반영하는 함수"""
+        worker = self.fetch_workers.pop(request_id, None)
+        if (result is None or not self.is_current_request(request_id)
+                or ticker != self.ticker_input.text()):
+            return
+        if worker is not None:
+            # 대기열에서 기다린 시간까지 포함한, 입력 후 결과가 표시되기까지의 시간
+            metrics.observe("stock_lookup_seconds", time.perf_counter() - worker.started_at)
+        self.name_input.setText(result.name)
+        self.price_1yr_input.setText(format_price(result.price_1yr))
+        self.price_6mo_input.setText(format_price(result.price_6mo))
+        self.current_price_input.setText(format_price(result.current_price))
+
+    def on_stock_data_failed(self, request_id, ticker, message):
+        """조회 중 오류가 발생했을 때 호출되는 함수"""
+        self.fetch_workers.pop(request_id, None)
+        if self.is_current_request(request_id):
+            print(f"Error loading stock data: {message}")
+
+    def update_completions(self, text):
+        """입력한 내용으로 로컬 종목 목록을 검색해서 자동완성 목록을 채우는 함수"""
+        if len(text) == 6 and text.isdigit():
+            return
+        self.completion_model.clear()
+        for symbol in self.fetcher.symbols.search(text, COMPLETION_LIMIT):
+            item = QStandardItem(f"{symbol.code}  {symbol.name}  {symbol.name_en}".rstrip())
+            item.setData(symbol.code, Qt.UserRole)
+            self.completion_model.appendRow(item)
+
+    def on_symbol_chosen(self, code):
+        """자동완성에서 종목을 고르면 종목명을 바로 채우는 함수"""
+        name = self.fetcher.symbols.name_of(code)
+        if name:
+            self.name_input.setText(name)
+
+    def refresh_symbol_master(self):
+        """KRX 종목 목록을 새로 받아서 로컬 파일과 색인을 갱신하는 함수"""
+        if self.symbols_worker is not None:
+            return
+        english_names = {symbol.split('.')[0]: name
+                         for symbol, name in self.fetcher.cache.names().items()}
+        self.symbols_worker = TaskWorker(refresh_symbols, symbols_path, english_names)
+        self.symbols_worker.signals.finished.connect(self.on_symbols_refreshed)
+        self.symbols_worker.signals.failed.connect(self.on_symbols_failed)
+        self.symbols_button.setEnabled(False)
+        self.thread_pool.start(self.symbols_worker)
+
+    def on_symbols_refreshed(self, symbol_index):
+        self.symbols_worker = None
+        self.symbols_button.setEnabled(True)
+        self.fetcher.set_symbols(symbol_index)
+
+    def on_symbols_failed(self, message):
+        self.symbols_worker = None
+        self.symbols_button.setEnabled(True)
+        print(f"Error refreshing symbol list: {message}")
+
+    def import_file(self):
+        path, _ = QFileDialog.getOpenFileName(self, "종목 가져오기", "", PORTFOLIO_FILE_FILTER)
+        if path:
+            self.import_rows(path)
+
+    def import_rows(self, path):
+        """파일의 종목을 백그라운드에서 읽는 함수 (읽은 뒤 on_import_read에서 한 번에 추가)"""
+        if self.import_worker is not None:
+            return
+        self.import_worker = TaskWorker(read_rows, path)
+        self.import_worker.path = path
+        self.import_worker.signals.finished.connect(self.on_import_read)
+        self.import_worker.signals.failed.connect(self.on_import_failed)
+        self.import_button.setEnabled(False)
+        self.thread_pool.start(self.import_worker)
+
+    def on_import_read(self, rows):
+        """읽은 행을 하나의 트랜잭션으로 저장하고 테이블에 한 번의 삽입으로 추가하는 함수"""
+        path = self.import_worker.path
+        self.import_worker = None
+        self.import_button.setEnabled(True)
+        try:
+            self.portfolio_store.insert_many(rows)
+        except sqlite3.Error as e:
+            print(f"Error importing {path}: {e}")
+            return
+        # 추가하는 동안 화면을 다시 그리지 않고, 끝난 뒤 한 번만 그립니다.
+        self.table.setUpdatesEnabled(False)
+        try:
+            self.table_model.append_rows(rows)
+            self.table_model.resort()
+        finally:
+            self.table.setUpdatesEnabled(True)
+        self.alerts.evaluate(rows)
+        self.sync_auto_refresh()
+        self.schedule_lookbacks()
+        print(f"{len(rows)}개 종목을 가져왔습니다: {path}")
+
+    def on_import_failed(self, message):
+        self.import_worker = None
+        self.import_button.setEnabled(True)
+        print(f"Error importing rows: {message}")
+
+    def export_file(self):
+        path, _ = QFileDialog.getSaveFileName(self, "종목 내보내기", "stock_data.csv",
+                                              PORTFOLIO_FILE_FILTER)
+        if path:
+            self.export_rows(path)
+
+    def export_rows(self, path):
+        """테이블의 행을 현재 순서대로 백그라운드에서 파일에 쓰는 함수"""
+        if self.export_worker is not None:
+            return
+        self.export_worker = TaskWorker(write_rows, path, list(self.table_model.rows()))
+        self.export_worker.signals.finished.connect(self.on_export_finished)
+        self.export_worker.signals.failed.connect(self.on_export_failed)
+        self.export_button.setEnabled(False)
+        self.thread_pool.start(self.export_worker)
+
+    def on_export_finished(self, count):
+        self.export_worker = None
+        self.export_button.setEnabled(True)
+        print(f"{count}개 종목을 내보냈습니다")
+
+    def on_export_failed(self, message):
+        self.export_worker = None
+        self.export_button.setEnabled(True)
+        print(f"Error exporting rows: {message}")
+
+    def refresh_all(self):
+        """테이블의 모든 종목 가격을 일괄 다운로드로 새로고침하는 함수"""
+        if self.refresh_worker is not None:
+            return
+        tickers = [row.ticker for row in self.table_model.rows()
+                   if len(row.ticker) == 6 and row.ticker.isdigit()]
+        if not tickers:
+            return
+
+        self.refresh_worker = TaskWorker(self.fetcher.fetch_batch, tickers)
+        self.refresh_worker.signals.finished.connect(self.on_refresh_finished)
+        self.refresh_worker.signals.failed.connect(self.on_refresh_failed)
+        self.refresh_button.setEnabled(False)
+        self.thread_pool.start(self.refresh_worker)
+
+    def on_refresh_finished(self, prices):
+        """일괄 조회 결과를 테이블에 한 번에 반영하고 바뀐 행만 저장하는 함수"""
+        self.refresh_worker = None
+        self.refresh_button.setEnabled(True)
+
+        updates = []
+        positions = []
+        for position, row in enumerate(self.table_model.rows()):
+            values = prices.get(row.ticker)
+            if values is None:
+                continue
+            row.price_1yr, row.price_6mo, row.current_price = values
+            updates.append(row)
+            positions.append(position)
+        self.portfolio_store.update_prices(updates)
+        self.table_model.rows_changed(positions)
+        self.check_alerts(updates)
+        self.schedule_lookbacks()
+        self.record_snapshot()
+        for ticker in prices:
+            self.scheduler.mark_refreshed(ticker)
+
+    def on_refresh_failed(self, message):
+        """일괄 조회 중 오류가 발생했을 때 호출되는 함수"""
+        self.refresh_worker = None
+        self.refresh_button.setEnabled(True)
+        print(f"Error refreshing stock data: {message}")
+
+    def toggle_auto_refresh(self, enabled):
+        """자동 새로고침을 켜거나 끄는 함수"""
+        if enabled:
+            self.sync_auto_refresh()
+            self.schedule_auto_refresh(0)
+        else:
+            self.auto_refresh_timer.stop()
+
+    def sync_auto_refresh(self):
+        """테이블의 종목 목록을 스케줄러에 반영하는 함수"""
+        self.scheduler.set_tickers(row.ticker for row in self.table_model.rows()
+                                   if len(row.ticker) == 6 and row.ticker.isdigit())
+
+    def schedule_auto_refresh(self, delay_ms=None):
+        """다음 자동 새로고침 확인 시점을 예약하는 함수 (장외 시간에는 장 시작 때까지 쉼)"""
+        if not self.auto_refresh_button.isChecked():
+            return
+        if delay_ms is None:
+            delay_ms = self.scheduler.next_poll_delay() * 1000
+        delay_ms = max(AUTO_REFRESH_MIN_DELAY_MS, min(AUTO_REFRESH_MAX_DELAY_MS, int(delay_ms)))
+        self.auto_refresh_timer.start(delay_ms)
+
+    def run_auto_refresh(self):
+        """스케줄러가 고른 종목의 조회를 시작하는 함수"""
+        for ticker in self.scheduler.poll():
+            worker = FetchWorker(0, ticker, self.fetcher.fetch, lambda _request_id: True)
+            worker.signals.finished.connect(self.on_auto_refreshed)
+            worker.signals.failed.connect(self.on_auto_refresh_failed)
+            self.auto_refresh_workers[ticker] = worker
+            self.thread_pool.start(worker)
+        self.schedule_auto_refresh()
+
+    def on_auto_refreshed(self, _request_id, ticker, result):
+        """자동 새로고침 결과를 같은 틱커의 모든 행에 반영하는 함수"""
+        self.auto_refresh_workers.pop(ticker, None)
+        self.scheduler.complete(ticker, True)
+        updates = []
+        positions = []
+        for position, row in enumerate(self.table_model.rows()):
+            if row.ticker == ticker:
+                row.price_1yr = result.price_1yr
+                row.price_6mo = result.price_6mo
+                row.current_price = result.current_price
+                updates.append(row)
+                positions.append(position)
+        if updates:
+            self.portfolio_store.update_prices(updates)
+            self.table_model.rows_changed(positions)
+            self.check_alerts(updates)
+            self.schedule_lookbacks()
+            self.schedule_snapshot()
+        self.schedule_auto_refresh()
+
+    def on_auto_refresh_failed(self, _request_id, ticker, message):
+        """자동 새로고침이 실패하면 스케줄러가 대기 시간을 늘리도록 알리는 함수"""
+        self.auto_refresh_workers.pop(ticker, None)
+        self.scheduler.complete(ticker, False)
+        print(f"Error auto-refreshing {ticker}: {message}")
+        self.schedule_auto_refresh()
+
+    def toggle_live_quotes(self, enabled):
+        """실시간 시세를 켜거나 끄는 함수"""
+        if enabled:
+            self.poll_live_quotes()
+        else:
+            self.live_timer.stop()
+
+    def poll_live_quotes(self):
+        """테이블 종목의 장중 현재가를 백그라운드에서 묶음으로 조회하는 함수"""
+        if self.live_worker is not None:
+            return
+        tickers = [row.ticker for row in self.table_model.rows()
+                   if len(row.ticker) == 6 and row.ticker.isdigit()]
+        if not tickers:
+            self.live_timer.start()
+            return
+        self.live_worker = TaskWorker(self.fetcher.quotes, tickers)
+        self.live_worker.signals.finished.connect(self.on_live_quotes)
+        self.live_worker.signals.failed.connect(self.on_live_quotes_failed)
+        self.thread_pool.start(self.live_worker)
+
+    def on_live_quotes(self, quotes):
+        """이전 값과 다른 현재가만 테이블에 반영하는 함수 (장중 시세는 저장하지 않음)"""
+        self.live_worker = None
+        changed = self.table_model.apply_quotes(quotes)
+        if changed:
+            self.check_alerts([self.table_model.row(position) for position in changed])
+            if not self.flash_timer.isActive():
+                self.flash_timer.start()
+        # 응답을 받은 뒤에 다음 요청을 예약하므로 느린 제공자에 요청이 쌓이지 않습니다.
+        if self.live_button.isChecked():
+            self.live_timer.start()
+
+    def on_live_quotes_failed(self, message):
+        self.live_worker = None
+        print(f"Error loading live quotes: {message}")
+        if self.live_button.isChecked():
+            self.live_timer.start()
+
+    def expire_flashes(self):
+        if not self.table_model.expire_flashes():
+            self.flash_timer.stop()
+
+    def update_extra_columns(self):
+        """켜져 있는 기간 수익률/비교일 열을 테이블에 반영하는 함수"""
+        names = []
+        if self.lookback_button.isChecked():
+            names += [name for name, _ in LOOKBACK_COLUMNS]
+        if self.compare_button.isChecked():
+            names += [name for name, _ in COMPARE_COLUMNS]
+        self.table_model.set_extra_columns(names)
+
+    def toggle_lookback_columns(self, visible):
+        """기간 수익률 열을 보이거나 숨기는 함수"""
+        self.update_extra_columns()
+        if visible:
+            self.update_lookbacks()
+
+    def toggle_compare_columns(self, visible):
+        """비교할 날짜를 골라서 그날의 스냅샷 열을 보이거나 숨기는 함수"""
+        if visible and not self.choose_comparison():
+            # 날짜를 고르지 않았으면 버튼을 다시 끕니다. (이때 다시 호출되어 열을 정리함)
+            self.compare_button.setChecked(False)
+            return
+        self.update_extra_columns()
+
+    def choose_comparison(self):
+        """스냅샷 기록의 날짜를 고르게 하고 그날의 가격을 테이블에 넘기는 함수 (고르지 않으면 False)"""
+        dates = [day.isoformat() for day in reversed(self.history.dates())]
+        if not dates:
+            print("비교할 스냅샷 기록이 없습니다. 전체 새로고침을 하면 그날의 가격이 기록됩니다.")
+            return False
+        # 오늘 기록이 있으면 그 이전 기록을 먼저 고릅니다.
+        current = 1 if len(dates) > 1 and dates[0] == date.today().isoformat() else 0
+        text, ok = QInputDialog.getItem(self, "비교", "비교할 날짜 (YYYY-MM-DD, 그날 기록이 없으면 이전 기록)",
+                                        dates, current, True)
+        if not ok:
+            return False
+        try:
+            found = self.history.snapshot(text.strip())
+        except ValueError as e:
+            print(f"Error reading date: {e}")
+            return False
+        if found is None:
+            print(f"{text} 이전의 스냅샷 기록이 없습니다.")
+            return False
+        day, prices = found
+        self.table_model.set_comparison(day.isoformat(), prices)
+        return True
+
+    def schedule_snapshot(self):
+        """잠시 뒤 스냅샷을 기록하도록 예약하는 함수 (이미 예약되어 있으면 그대로 둠)"""
+        if not self.history_timer.isActive():
+            self.history_timer.start()
+
+    def record_snapshot(self):
+        """테이블의 현재 가격을 오늘의 스냅샷으로 백그라운드에서 기록하는 함수"""
+        if self.history_worker is not None:
+            # 기록 중이면 끝난 뒤 다시 기록합니다.
+            self.schedule_snapshot()
+            return
+        self.history_timer.stop()
+        # 작업 스레드에서 읽는 동안 테이블 값이 바뀌지 않도록 가격만 복사해서 넘깁니다.
+        rows = [StockRow(row.ticker, "", row.price_1yr, row.price_6mo, row.current_price)
+                for row in self.table_model.rows()]
+        self.history_worker = TaskWorker(self.history.append, rows)
+        self.history_worker.signals.finished.connect(self.on_snapshot_recorded)
+        self.history_worker.signals.failed.connect(self.on_snapshot_failed)
+        self.thread_pool.start(self.history_worker)
+
+    def on_snapshot_recorded(self, _result):
+        self.history_worker = None
+
+    def on_snapshot_failed(self, message):
+        self.history_worker = None
+        print(f"Error recording snapshot: {message}")
+
+    def schedule_lookbacks(self):
+        """기간 수익률 열이 보이면 잠시 뒤 다시 계산하도록 예약하는 함수"""
+        if self.lookback_button.isChecked():
+            self.lookback_timer.start()
+
+    def update_lookbacks(self):
+        """테이블 종목의 기간 수익률을 백그라운드에서 계산하는 함수"""
+        if self.lookback_worker is not None:
+            # 계산 중이면 끝난 뒤 다시 계산합니다.
+            self.lookback_timer.start()
+            return
+        tickers = [row.ticker for row in self.table_model.rows()]
+        self.lookback_worker = TaskWorker(self.fetcher.lookbacks, tickers)
+        self.lookback_worker.signals.finished.connect(self.on_lookbacks_computed)
+        self.lookback_worker.signals.failed.connect(self.on_lookbacks_failed)
+        self.thread_pool.start(self.lookback_worker)
+
+    def on_lookbacks_computed(self, lookbacks):
+        self.lookback_worker = None
+        self.table_model.set_lookbacks(lookbacks)
+
+    def on_lookbacks_failed(self, message):
+        self.lookback_worker = None
+        print(f"Error computing lookback returns: {message}")
+
+    def toggle_chart(self, visible):
+        """가격 차트를 보이거나 숨기는 함수 (보이면 선택한 행의 종목을 표시)"""
+        self.chart.setVisible(visible)
+        if visible:
+            position = self.current_position()
+            if position >= 0:
+                self.update_chart(self.table_model.row(position).ticker)
+
+    def update_chart(self, ticker):
+        """캐시된 일봉을 백그라운드에서 읽어서 차트에 표시하는 함수"""
+        self.chart_ticker = ticker
+        if self.chart_worker is not None:
+            # 읽는 중이면 끝난 뒤 마지막으로 선택한 종목을 다시 읽습니다.
+            return
+        self.chart_worker = TaskWorker(self.fetcher.history, ticker)
+        self.chart_worker.ticker = ticker
+        self.chart_worker.signals.finished.connect(self.on_chart_loaded)
+        self.chart_worker.signals.failed.connect(self.on_chart_failed)
+        self.thread_pool.start(self.chart_worker)
+
+    def on_chart_loaded(self, series):
+        ticker = self.chart_worker.ticker
+        self.chart_worker = None
+        if ticker != self.chart_ticker:
+            self.update_chart(self.chart_ticker)
+            return
+        name = self.fetcher.symbols.name_of(ticker) or ""
+        days, closes = series
+        self.chart.set_series(days, closes, f"{ticker} {name}".strip())
+
+    def on_chart_failed(self, message):
+        self.chart_worker = None
+        print(f"Error loading price history: {message}")
+
+    @metrics.timed("load_data")
+    def load_data(self):
+        """저장소에서 데이터를 불러오는 함수 (처음 실행 시 기존 JSON 파일을 가져옴)"""
+        try:
+            self.portfolio_store.import_json(json_path)
+        except (json.JSONDecodeError, ValueError, TypeError):
+            # JSON 파일이 비어있거나 포맷이 잘못된 경우
+            print("JSON 파일을 가져오는 중 오류가 발생했습니다. 빈 목록으로 시작합니다.")
+        # 변경 번호를 먼저 읽어야 불러오는 사이에 다른 프로그램이 저장한 행을 놓치지 않습니다.
+        self.store_version = self.portfolio_store.data_version()
+        self.store_revision = self.portfolio_store.revision()
+        self.table_model.set_rows(self.portfolio_store.load())
+        # 저장된 가격을 알림 기준으로 삼습니다. (이후 가격이 바뀔 때만 알림)
+        self.alerts.evaluate(self.table_model.rows())
+        self.sync_auto_refresh()
+        self.schedule_lookbacks()
+
+    def check_external_changes(self):
+        """다른 프로그램이 저장소에 커밋했으면 바뀐 행만 테이블에 반영하는 함수"""
+        self.load_alert_rules()
+        try:
+            version = self.portfolio_store.data_version()
+            if version == self.store_version:
+                return
+            self.store_version = version
+            changes = self.portfolio_store.changes_since(self.store_revision)
+        except sqlite3.Error as e:
+            # 다른 프로그램이 오래 쓰고 있으면 다음 확인 때 다시 시도합니다.
+            self.store_version = None
+            print(f"Error checking portfolio changes: {e}")
+            return
+        if changes is None:
+            # 너무 오래된 상태라 삭제 기록이 없으면 전체를 다시 불러옵니다.
+            self.load_data()
+            return
+        rows, deleted_ids, self.store_revision = changes
+        if self.table_model.apply_changes(rows, deleted_ids):
+            self.check_alerts(rows)
+            self.sync_auto_refresh()
+            self.schedule_lookbacks()
+
+    def load_alert_rules(self):
+        """알림 규칙 파일이 바뀌었으면 다시 읽는 함수 (명령줄 모드나 다른 PC에서 수정한 경우)"""
+        mtime = os.path.getmtime(alerts_path) if os.path.exists(alerts_path) else None
+        if mtime == self.alerts_mtime:
+            return
+        # 읽지 못한 파일도 다시 바뀔 때까지는 다시 읽지 않습니다.
+        self.alerts_mtime = mtime
+        try:
+            self.alerts.set_rules(load_rules(alerts_path))
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Error loading alert rules: {e}")
+
+    def add_alert_rule(self):
+        """선택한 행(또는 입력한 틱커)의 가격 알림 규칙을 추가하는 함수"""
+        position = self.current_position()
+        ticker = (self.table_model.row(position).ticker if position >= 0
+                  else self.ticker_input.text().strip())
+        if not ticker:
+            print("알림을 추가할 종목을 먼저 선택하세요.")
+            return
+        text, ok = QInputDialog.getText(
+            self, "가격 알림", f"{ticker} 알림 조건 (예: < 140,000, > 150000, +5% 6개월전가격, -10% 1년전가격)")
+        if not ok or not text.strip():
+            return
+        try:
+            rules = edit_rules(alerts_path, add=[parse_rule(ticker, text)])
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Error adding alert rule: {e}")
+            return
+        self.alerts.set_rules(rules)
+        self.alerts_mtime = os.path.getmtime(alerts_path)
+        print(f"알림을 추가했습니다: {rules[-1].describe()}")
+
+    def check_alerts(self, rows):
+        """가격이 바뀐 행의 알림 규칙을 확인하고, 새로 만족한 규칙을 알리는 함수"""
+        alerts = self.alerts.evaluate(rows)
+        if not alerts:
+            return
+        try:
+            append_alert_log(alert_log_path, alerts)
+        except OSError as e:
+            print(f"Error writing alert log: {e}")
+        message = summarize_alerts(alerts)
+        if self.tray is None and QSystemTrayIcon.isSystemTrayAvailable():
+            self.tray = QSystemTrayIcon(self.style().standardIcon(QStyle.SP_MessageBoxInformation), self)
+            self.tray.show()
+        if self.tray is not None:
+            self.tray.showMessage("가격 알림", message, QSystemTrayIcon.Information, 5000)
+        else:
+            print(f"가격 알림:\n{message}")
+
+    def change_currency(self, currency):
+        """표시 통화를 바꾸는 함수 (환율은 백그라운드에서 구한 뒤 표 전체에 한 번에 반영)"""
+        if self.fx_worker is not None:
+            # 환율을 구하는 중이면 끝난 뒤 마지막으로 고른 통화를 다시 적용합니다.
+            return
+        self.fx_worker = TaskWorker(self.fx_rates.field_rates, currency)
+        self.fx_worker.currency = currency
+        self.fx_worker.signals.finished.connect(self.on_fx_rates_loaded)
+        self.fx_worker.signals.failed.connect(self.on_fx_rates_failed)
+        self.thread_pool.start(self.fx_worker)
+
+    def on_fx_rates_loaded(self, rates):
+        currency = self.fx_worker.currency
+        self.fx_worker = None
+        if currency != self.currency_combo.currentText():
+            self.change_currency(self.currency_combo.currentText())
+            return
+        self.table_model.set_currency(currency, rates)
+
+    def on_fx_rates_failed(self, message):
+        self.fx_worker = None
+        print(f"Error loading exchange rates: {message}")
+        # 환율을 구하지 못하면 원래 표시 통화로 되돌립니다.
+        self.currency_combo.blockSignals(True)
+        self.currency_combo.setCurrentText(self.table_model.currency)
+        self.currency_combo.blockSignals(False)
+
+    def update_totals(self):
+        """평가금액/손익 합계를 표시하는 함수 (보유 수량이 입력된 종목이 없으면 숨김)"""
+        totals = self.table_model.valuation.totals()
+        if not totals["market_value"] and not totals["cost"]:
+            self.totals_label.hide()
+            return
+        text = f"총 평가금액 {self.table_model.format_amount(totals['market_value'])}"
+        if totals["pnl_rate"] is not None:
+            text += (f"  |  평가손익 {self.table_model.format_amount(totals['pnl'], signed=True)} "
+                     f"({totals['pnl_rate']:+.1%})")
+        self.totals_label.setText(text)
+        self.totals_label.show()
+
+    def toggle_metrics_panel(self, visible):
+        """지표 패널을 보이거나 숨기는 함수"""
+        self.metrics_panel.setVisible(visible)
+        if visible:
+            self.update_metrics_panel()
+            self.metrics_timer.start()
+        else:
+            self.metrics_timer.stop()
+
+    def update_metrics_panel(self):
+        """지표 요약을 패널에 표시하는 함수"""
+        def latency(name):
+            histogram = metrics.registry.histogram(name + "_seconds")
+            if histogram is None:
+                return "-"
+            return f"p50 {histogram['p50'] * 1000:.1f} / p95 {histogram['p95'] * 1000:.1f} ms"
+
+        def rate(value):
+            return "-" if value is None else f"{value:.0%}"
+
+        registry = metrics.registry
+        lines = [
+            f"조회 {registry.counter('fetch_requests_total')}건 "
+            f"(오류 {registry.counter('fetch_errors_total')}) {latency('fetch')}  |  "
+            f"제공자 오류 {registry.counter('provider_errors_total')}  |  "
+            f"시세 캐시 적중 "
+            f"{rate(registry.hit_rate('price_cache_hits_total', 'price_cache_misses_total'))}  |  "
+            f"HTTP 캐시 적중 "
+            f"{rate(registry.hit_rate('http_cache_hits_total', 'http_cache_misses_total'))} "
+            f"(재검증 {registry.counter('http_cache_revalidated_total')}) {latency('http_request')}",
+            f"저장 {latency('store_save')}  |  불러오기 {latency('load_data')}  |  "
+            f"표 갱신 {latency('table_update')}  |  그리기 {latency('table_paint')}",
+        ]
+        self.metrics_label.setText("\n".join(lines))
+
+    def save_metrics(self):
+        """지표를 JSON 파일과 Prometheus 텍스트 파일로 저장하는 함수"""
+        prometheus_path = os.path.splitext(metrics_path)[0] + ".prom"
+        try:
+            metrics.registry.dump(metrics_path)
+            metrics.registry.dump(prometheus_path)
+        except OSError as e:
+            print(f"Error saving metrics: {e}")
+            return
+        print(f"지표를 저장했습니다: {metrics_path}, {prometheus_path}")
+
+    def current_position(self):
+        """선택된 행의 모델 행 번호를 반환하는 함수 (선택이 없으면 -1)"""
+        index = self.table.currentIndex()
+        if not index.isValid():
+            return -1
+        return self.proxy_model.mapToSource(index).row()
+
+    def form_row(self):
+        """입력 필드의 값으로 StockRow를 만드는 함수"""
+        return StockRow.from_values([
+            self.ticker_input.text(),
+            self.name_input.text(),
+            self.price_1yr_input.text(),
+            self.price_6mo_input.text(),
+            self.current_price_input.text(),
+            self.quantity_input.text(),
+            self.avg_cost_input.text()
+        ])
+
+    def add_data(self):
+        """입력된 데이터를 테이블에 추가하고 저장하는 함수"""
+        row = self.form_row()
+        self.portfolio_store.insert(row)
+        self.table_model.append_row(row)
+        self.check_alerts([row])
+        self.sync_auto_refresh()
+        self.schedule_lookbacks()
+        self.reset_fields()  # 데이터 추가 후 필드 초기화
+
+    def load_row_data(self, index):
+        """테이블의 데이터를 클릭하면 입력 필드에 로드하는 함수"""
+        row = self.table_model.row(self.proxy_model.mapToSource(index).row())
+        row_data = row.display_values()
+        self.ticker_input.setText(row_data[0])
+        self.name_input.setText(row_data[1])
+        self.price_1yr_input.setText(row_data[2])
+        self.price_6mo_input.setText(row_data[3])
+        self.current_price_input.setText(row_data[4])
+        self.quantity_input.setText(row_data[5])
+        self.avg_cost_input.setText(row_data[6])
+        if self.chart_button.isChecked():
+            self.update_chart(row.ticker)
+
+    def update_data(self):
+        """선택된 행의 데이터를 수정하고 저장하는 함수"""
+        position = self.current_position()
+        if position >= 0:
+            row = self.form_row()
+            row.row_id = self.table_model.row(position).row_id
+            self.portfolio_store.update(row)
+            self.table_model.replace_row(position, row)
+            self.check_alerts([row])
+            self.sync_auto_refresh()
+            self.schedule_lookbacks()
+            self.reset_fields()  # 수정 후 필드 초기화
+
+    def delete_data(self):
+        """선택된 행을 삭제하고 저장하는 함수"""
+        position = self.current_position()
+        if position >= 0:
+            self.portfolio_store.delete(self.table_model.row(position).row_id)
+            self.table_model.remove_row(position)
+            self.sync_auto_refresh()
+            self.reset_fields()  # 삭제 후 필드 초기화
+
+    def reset_fields(self):
+        """입력 필드를 초기화하는 함수"""
+        self.ticker_input.clear()
+        self.name_input.clear()
+        self.price_1yr_input.clear()
+        self.price_6mo_input.clear()
+        self.current_price_input.clear()
+        self.quantity_input.clear()
+        self.avg_cost_input.clear()
+
+
+def run_gui(argv=None):
+    """GUI를 실행하는 함수"""
+    app = QApplication(sys.argv if argv is None else [sys.argv[0]] + list(argv))
+    startup_profile.mark("QApplication created")
+    ex = StockApp()
+    startup_profile.mark(f"window built ({ex.table_model.rowCount()} rows loaded)")
+    ex.show()
+    return app.exec_()
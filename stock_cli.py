@@ -0,0 +1,412 @@
+import argparse
+import csv
+import json
+import os
+import sqlite3
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import metrics
+from file_lock import FileLock
+from portfolio_io import iter_row_chunks, write_rows
+from portfolio_store import PortfolioStore
+from price_alerts import AlertEngine, append_alert_log, edit_rules, load_rules, parse_rule
+from price_provider import ReplayProvider, create_provider
+from settings import alert_log_path, alerts_path, db_path, history_path, json_path
+from snapshot_history import SnapshotHistory, day_to_date
+from stock_fetch import RateLimiter, StockFetcher
+from stock_model import FIELDS, PRICE_FIELDS, dump_rows_json, load_rows_json
+
+OUTPUT_FIELDS = FIELDS + ("error",)
+# refresh --update가 포트폴리오 파일에 다시 쓰는 필드 (종목명은 이번에 새로 조회한 경우만)
+REFRESHED_FIELDS = ("name",) + PRICE_FIELDS
+
+
+def open_store(path):
+    """포트폴리오 저장소를 여는 함수 (기본 저장소이면 기존 JSON 파일을 먼저 가져옴)"""
+    store = PortfolioStore(path)
+    if os.path.abspath(path) == db_path:
+        # GUI를 한 번도 실행하지 않은 경우에도 기존 JSON 파일을 가져옵니다.
+        store.import_json(json_path)
+    return store
+
+
+def read_portfolio(path):
+    """포트폴리오 파일(JSON 또는 SQLite 저장소)에서 StockRow 목록을 읽는 함수"""
+    if path.endswith(".db"):
+        store = open_store(path)
+        try:
+            return store.load()
+        finally:
+            store.close()
+    return load_rows_json(path)
+
+
+def write_portfolio(path, rows, named_rows=()):
+    """조회에 성공한 행의 가격(named_rows는 종목명도)을 원래 포트폴리오 파일에 다시 저장하는 함수
+
+    조회하는 동안 다른 프로그램이 추가/수정한 행을 덮어쓰지 않도록 저장소는 해당 열만 수정하고,
+    JSON 파일은 잠근 상태에서 다시 읽어서 같은 틱커의 행에만 가격을 반영합니다.
+    rows와 named_rows는 겹치지 않아야 합니다.
+    """
+    if path.endswith(".db"):
+        store = PortfolioStore(path)
+        try:
+            store.update_many(rows, PRICE_FIELDS)
+            store.update_many(named_rows, REFRESHED_FIELDS)
+        finally:
+            store.close()
+        return
+    refreshed = {row.ticker: (row, PRICE_FIELDS) for row in rows}
+    refreshed.update((row.ticker, (row, REFRESHED_FIELDS)) for row in named_rows)
+    with FileLock(path):
+        current = load_rows_json(path)
+        for row in current:
+            source, fields = refreshed.get(row.ticker, (None, ()))
+            for field in fields:
+                setattr(row, field, getattr(source, field))
+        dump_rows_json(current, path)
+
+
+class RowWriter:
+    """결과 행을 하나씩 바로 출력하는 스트림 (csv, jsonl, json)"""
+
+    def __init__(self, stream, fmt):
+        self.stream = stream
+        self.fmt = fmt
+        self.count = 0
+        if fmt == "csv":
+            self._csv = csv.writer(stream)
+            self._csv.writerow(OUTPUT_FIELDS)
+        elif fmt == "json":
+            stream.write("[")
+
+    def write(self, row, error=None):
+        record = row.to_dict()
+        record["error"] = error
+        if self.fmt == "csv":
+            self._csv.writerow(["" if record[field] is None else record[field]
+                                for field in OUTPUT_FIELDS])
+        else:
+            text = json.dumps(record, ensure_ascii=False)
+            if self.fmt == "json":
+                text = ("," if self.count else "") + "\n" + text
+            else:
+                text += "\n"
+            self.stream.write(text)
+        self.count += 1
+        self.stream.flush()
+
+    def close(self):
+        if self.fmt == "json":
+            self.stream.write("\n]\n")
+        self.stream.flush()
+
+
+def guess_format(path):
+    extension = os.path.splitext(path or "")[1].lower()
+    return {".csv": "csv", ".json": "json", ".jsonl": "jsonl"}.get(extension, "jsonl")
+
+
+def refresh_rows(fetcher, rows, concurrency=4, rate=0.0, batch=False):
+    """행마다 (갱신된 StockRow, 오류 메시지 또는 None)을 입력 순서대로 내보내는 제너레이터"""
+    if batch:
+        prices = fetcher.fetch_batch([row.ticker for row in rows])
+        for row in rows:
+            values = prices.get(row.ticker)
+            if values is None:
+                yield row, "가격 데이터가 없습니다"
+                continue
+            row.price_1yr, row.price_6mo, row.current_price = values
+            yield row, None
+        return
+
+    limiter = RateLimiter(rate)
+
+    def fetch(row):
+        limiter.acquire()
+        try:
+            result = fetcher.fetch(row.ticker)
+        except Exception as e:
+            return row, str(e)
+        result.row_id = row.row_id
+        # 조회 결과에는 보유 정보가 없으므로 입력 행의 값을 그대로 둡니다.
+        result.quantity, result.avg_cost = row.quantity, row.avg_cost
+        return result, None
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        # map은 입력 순서를 지키면서 앞쪽 결과가 준비되는 대로 바로 내보냅니다.
+        yield from executor.map(fetch, rows)
+
+
+def cmd_refresh(args):
+    rows = read_portfolio(args.input)
+    # 조회 전 가격을 기준으로, 조회 후 새로 만족한 알림 규칙만 알립니다.
+    alerts = AlertEngine(load_rules(args.rules))
+    alerts.evaluate(rows)
+    options = {}
+    if args.ttl is not None:
+        options["ttl"] = args.ttl
+    if args.provider is not None:
+        options["provider"] = create_provider(args.provider, args.latency, args.error_rate,
+                                              args.pool_size, args.timeout)
+    fetcher = StockFetcher(**options)
+    fmt = args.format or guess_format(args.output)
+    if args.output in (None, "-"):
+        stream = sys.stdout
+    else:
+        stream = open(args.output, "w", encoding="utf-8", newline="")
+
+    refreshed = []
+    # 다시 저장할 행 (실패한 행은 처음 읽은 값이므로 그 사이 다른 곳에서 고친 값을 덮어쓰지 않음)
+    priced = []
+    named = []
+    triggered = []
+    errors = 0
+    writer = RowWriter(stream, fmt)
+    try:
+        for row, error in refresh_rows(fetcher, rows, args.concurrency, args.rate, args.batch):
+            writer.write(row, error)
+            refreshed.append(row)
+            if error:
+                errors += 1
+                print(f"{row.ticker}: {error}", file=sys.stderr)
+            else:
+                # 일괄 다운로드는 가격만 받으므로 종목명은 종목별 조회로 받은 경우에만 씁니다.
+                (priced if args.batch or not row.name else named).append(row)
+                triggered.extend(alerts.evaluate([row]))
+    finally:
+        writer.close()
+        if stream is not sys.stdout:
+            stream.close()
+        fetcher.cache.flush()
+
+    if args.update:
+        write_portfolio(args.input, priced, named)
+    # 포트폴리오 파일을 고치지 않는 새로고침도 그날의 가격을 스냅샷 기록에 남깁니다.
+    try:
+        SnapshotHistory(args.history).append(refreshed)
+    except (OSError, ValueError) as e:
+        print(f"Error recording snapshot {args.history}: {e}", file=sys.stderr)
+    for rule, price in triggered:
+        print(f"알림: {rule.describe()} (현재 {price:,} 원)", file=sys.stderr)
+    append_alert_log(args.alert_log, triggered)
+    if args.metrics_out:
+        metrics.registry.dump(args.metrics_out)
+    print(f"{len(refreshed) - errors}/{len(refreshed)} rows refreshed", file=sys.stderr)
+    return 1 if errors else 0
+
+
+def cmd_import(args):
+    store = open_store(args.db)
+    try:
+        rows = []
+        for chunk in iter_row_chunks(args.input, args.format):
+            rows.extend(chunk)
+        store.insert_many(rows)
+    except (OSError, ValueError, sqlite3.Error) as e:
+        print(f"Error importing {args.input}: {e}", file=sys.stderr)
+        return 1
+    finally:
+        store.close()
+    print(f"{len(rows)} rows imported into {args.db}", file=sys.stderr)
+    return 0
+
+
+def cmd_export(args):
+    store = open_store(args.db)
+    try:
+        count = write_rows(args.output, store.load(), args.format)
+    except (OSError, ValueError) as e:
+        print(f"Error exporting {args.output}: {e}", file=sys.stderr)
+        return 1
+    finally:
+        store.close()
+    print(f"{count} rows exported to {args.output}", file=sys.stderr)
+    return 0
+
+
+def cmd_alerts(args):
+    try:
+        if args.action == "add":
+            rules = edit_rules(args.rules, add=[parse_rule(args.ticker, args.condition)])
+            print(f"{rules[-1].rule_id}: {rules[-1].describe()}")
+            return 0
+        if args.action == "remove":
+            edit_rules(args.rules, remove=args.ids)
+            return 0
+        for rule in load_rules(args.rules):
+            print(f"{rule.rule_id}: {rule.describe()}")
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Error editing alert rules {args.rules}: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+def cmd_history(args):
+    history = SnapshotHistory(args.history)
+    writer = csv.writer(sys.stdout, lineterminator="\n")
+    try:
+        if args.ticker:
+            days, values = history.series(args.ticker, args.start, args.end)
+            writer.writerow(("date",) + history.fields)
+            for day, row in zip(days.tolist(), values.tolist()):
+                writer.writerow([day_to_date(day).isoformat()] + [value or "" for value in row])
+            return 0
+        if args.date:
+            found = history.snapshot(args.date)
+            if found is None:
+                print(f"{args.date} 이전의 스냅샷 기록이 없습니다", file=sys.stderr)
+                return 1
+            day, prices = found
+            print(f"snapshot {day.isoformat()}", file=sys.stderr)
+            writer.writerow(("ticker",) + history.fields)
+            for ticker, row in prices.items():
+                writer.writerow([ticker] + ["" if value is None else value for value in row])
+            return 0
+    except ValueError as e:
+        print(f"Error reading snapshot history {args.history}: {e}", file=sys.stderr)
+        return 1
+    dates = history.dates()
+    if dates:
+        print(f"{len(dates)} snapshots ({dates[0].isoformat()} ~ {dates[-1].isoformat()})")
+    else:
+        print("no snapshots")
+    return 0
+
+
+def cmd_serve_standin(args):
+    from standin_server import create_server
+
+    provider = ReplayProvider(fixtures=args.fixtures, latency=args.latency,
+                              error_rate=args.error_rate, seed=args.seed)
+    server = create_server(provider, args.host, args.port, verbose=args.verbose)
+    host, port = server.server_address[:2]
+    print(f"stand-in price server on http://{host}:{port}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+def add_injection_arguments(parser):
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="대체 제공자의 응답 지연 시간(초)")
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="대체 제공자가 접속 오류를 낼 확률 (0~1)")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="main.py", description="한국주식 현재주가 (명령줄 모드)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    refresh = commands.add_parser(
+        "refresh", help="포트폴리오의 가격을 새로 조회합니다",
+        description="포트폴리오의 가격을 새로 조회해서 한 행씩 출력합니다. "
+                    "실패한 행이 있으면 종료 코드 1을 반환합니다.")
+    refresh.add_argument("--in", dest="input", default=db_path,
+                         help="포트폴리오 파일 (.json 또는 .db, 기본값: stock_data.db)")
+    refresh.add_argument("--out", dest="output", default=None,
+                         help="결과 파일 (생략하거나 '-'이면 표준 출력)")
+    refresh.add_argument("--format", choices=("csv", "json", "jsonl"), default=None,
+                         help="출력 형식 (기본값: 결과 파일 확장자, 표준 출력은 jsonl)")
+    refresh.add_argument("--concurrency", type=int, default=4, help="동시에 조회할 종목 수")
+    refresh.add_argument("--rate", type=float, default=0.0,
+                         help="초당 최대 요청 수 (0이면 제한 없음)")
+    refresh.add_argument("--batch", action="store_true",
+                         help="종목별 조회 대신 일괄 다운로드를 사용합니다")
+    refresh.add_argument("--ttl", type=float, default=None,
+                         help="시세 캐시 유효 시간(초)")
+    refresh.add_argument("--update", action="store_true",
+                         help="조회한 가격을 입력 파일에 다시 저장합니다")
+    refresh.add_argument("--provider", default=None,
+                         help="시세 제공자: yfinance, replay, replay:<픽스처 폴더>, "
+                              "http://호스트:포트 (기본값: 환경 변수 STOCK_PRICE_PROVIDER 또는 yfinance)")
+    refresh.add_argument("--pool-size", type=int, default=None,
+                         help="HTTP 연결 풀 크기 (기본값: 8)")
+    refresh.add_argument("--timeout", type=float, default=None,
+                         help="HTTP 응답 대기 시간(초, 기본값: 20)")
+    refresh.add_argument("--metrics-out", default=None,
+                         help="조회 지연 시간/캐시 적중률 등 지표를 저장할 파일 "
+                              "(.prom이면 Prometheus 텍스트, 그 외는 JSON)")
+    refresh.add_argument("--rules", default=alerts_path,
+                         help="가격 알림 규칙 파일 (기본값: alert_rules.json)")
+    refresh.add_argument("--alert-log", default=alert_log_path,
+                         help="알림 기록 파일 (기본값: alerts.log)")
+    refresh.add_argument("--history", default=history_path,
+                         help="그날의 가격을 덧붙일 스냅샷 기록 파일 "
+                              "(기본값: portfolio_history.bin)")
+    add_injection_arguments(refresh)
+    refresh.set_defaults(func=cmd_refresh)
+
+    file_formats = ("csv", "jsonl", "json", "xlsx")
+    import_parser = commands.add_parser(
+        "import", help="파일의 종목을 포트폴리오 저장소에 한 번에 추가합니다")
+    import_parser.add_argument("--in", dest="input", required=True,
+                               help="가져올 파일 (.csv, .xlsx, .jsonl, .json)")
+    import_parser.add_argument("--format", choices=file_formats, default=None,
+                               help="파일 형식 (기본값: 확장자)")
+    import_parser.add_argument("--db", default=db_path, help="포트폴리오 저장소 (기본값: stock_data.db)")
+    import_parser.set_defaults(func=cmd_import)
+
+    export_parser = commands.add_parser(
+        "export", help="포트폴리오 저장소의 종목을 파일로 내보냅니다")
+    export_parser.add_argument("--out", dest="output", required=True,
+                               help="내보낼 파일 (.csv, .xlsx, .jsonl, .json)")
+    export_parser.add_argument("--format", choices=file_formats, default=None,
+                               help="파일 형식 (기본값: 확장자)")
+    export_parser.add_argument("--db", default=db_path, help="포트폴리오 저장소 (기본값: stock_data.db)")
+    export_parser.set_defaults(func=cmd_export)
+
+    alerts = commands.add_parser(
+        "alerts", help="가격 알림 규칙을 보거나 추가/삭제합니다",
+        description="규칙은 GUI와 refresh가 가격을 갱신할 때마다 확인합니다. "
+                    "조건 예: '< 140,000', '> 150000', '+5%% 6개월전가격', '-10%% 1년전가격'")
+    alerts.add_argument("--rules", default=alerts_path,
+                        help="가격 알림 규칙 파일 (기본값: alert_rules.json)")
+    actions = alerts.add_subparsers(dest="action")
+    actions.add_parser("list", help="규칙 목록을 출력합니다")
+    add_rule = actions.add_parser("add", help="규칙을 추가합니다")
+    add_rule.add_argument("ticker", help="종목코드")
+    add_rule.add_argument("condition", help="조건 (예: '< 140,000', '+5%% 6개월전가격')")
+    remove_rule = actions.add_parser("remove", help="규칙을 삭제합니다")
+    remove_rule.add_argument("ids", type=int, nargs="+", help="규칙 번호")
+    alerts.set_defaults(func=cmd_alerts)
+
+    history = commands.add_parser(
+        "history", help="포트폴리오 스냅샷 기록을 조회합니다",
+        description="옵션이 없으면 기록된 날짜 범위를, --date는 그날(없으면 이전 기록)의 모든 종목을, "
+                    "--ticker는 한 종목의 기간별 가격을 CSV로 출력합니다.")
+    history.add_argument("--history", default=history_path,
+                         help="스냅샷 기록 파일 (기본값: portfolio_history.bin)")
+    history.add_argument("--date", default=None, help="조회할 날짜 (YYYY-MM-DD)")
+    history.add_argument("--ticker", default=None, help="기간별 가격을 조회할 종목코드")
+    history.add_argument("--from", dest="start", default=None, help="기간 시작일 (YYYY-MM-DD)")
+    history.add_argument("--to", dest="end", default=None, help="기간 종료일 (YYYY-MM-DD)")
+    history.set_defaults(func=cmd_history)
+
+    standin = commands.add_parser(
+        "serve-standin", help="오프라인 시험용 로컬 시세 서버를 실행합니다",
+        description="기록된 픽스처 또는 합성 시세를 HTTP로 제공합니다. "
+                    "refresh --provider http://호스트:포트 로 사용합니다.")
+    standin.add_argument("--host", default="127.0.0.1")
+    standin.add_argument("--port", type=int, default=8765)
+    standin.add_argument("--fixtures", default=None,
+                         help="심볼별 <심볼>.json 픽스처 폴더 (없는 심볼은 합성 시세)")
+    standin.add_argument("--seed", type=int, default=0, help="오류 주입 난수 시드")
+    standin.add_argument("--verbose", action="store_true", help="요청 로그를 출력합니다")
+    add_injection_arguments(standin)
+    standin.set_defaults(func=cmd_serve_standin)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
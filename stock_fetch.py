@@ -0,0 +1,348 @@
+import math
+import os
+import threading
+import time
+from concurrent.futures import Future
+from datetime import date, timedelta
+from functools import partial
+
+import metrics
+from lookback import HISTORY_DAYS, compute_packed, lookback_rows
+from market_resolver import MarketResolver
+from price_cache import PriceCache
+from price_provider import create_provider
+from settings import price_cache_path, symbols_path
+from stock_model import StockRow
+from symbol_master import SymbolIndex, load_symbols
+
+# 캐시된 시세를 다시 받지 않고 사용할 시간(초)
+PRICE_CACHE_TTL = 15 * 60
+# 전체 새로고침 시 한 번의 다운로드 요청에 묶을 종목 수
+REFRESH_BATCH_SIZE = 100
+# 시세 제공자를 지정하는 환경 변수 (price_provider.create_provider 형식)
+PROVIDER_ENV = "STOCK_PRICE_PROVIDER"
+
+
+def load_yfinance():
+    """yfinance를 처음 필요할 때 불러오는 함수
+
+    yfinance는 pandas/numpy/requests까지 함께 불러오므로 시간이 오래 걸립니다.
+    프로그램 시작 시에는 불러오지 않고, GUI는 창을 띄운 뒤 백그라운드에서 미리 호출합니다.
+    """
+    import yfinance
+    return yfinance
+
+
+def history_start():
+    """가장 긴 조회 기간(3년)을 계산하는 데 필요한 일봉 시작일을 반환하는 함수"""
+    return date.today() - timedelta(days=HISTORY_DAYS)
+
+
+def update_price_cache(cache, provider, symbol):
+    """캐시가 TTL보다 오래되었으면 마지막 캐시 날짜 이후의 일봉만 받아서 합치는 함수
+
+    처음 받는 종목이나 이전 버전에서 1년치만 받아 둔 종목은 3년 전부터 다시 받습니다.
+    """
+    start = history_start()
+    backfill = cache.needs_history(symbol, start)
+    if cache.is_fresh(symbol) and not backfill:
+        metrics.inc("price_cache_hits_total")
+        return
+    metrics.inc("price_cache_misses_total")
+    last = cache.last_date(symbol)
+    try:
+        with metrics.timer("provider_history", errors="provider_errors_total"):
+            if last is None or backfill:
+                bars = provider.get_history(symbol, start=start.isoformat())
+            else:
+                # 마지막 날의 일봉은 장중에 받은 값일 수 있으므로 그날부터 다시 받습니다.
+                bars = provider.get_history(symbol, start=last.isoformat())
+    except Exception as e:
+        if last is None:
+            raise
+        # 네트워크 오류 시에는 캐시된 데이터로 계속 진행합니다.
+        print(f"Error updating price cache for {symbol}: {e}")
+        return
+    if not bars:
+        # 받은 일봉이 없으면 그 기간을 받았다고 기록하지 않고 다음에 다시 요청합니다.
+        return
+    cache.store(symbol, bars, history_from=start if last is None or backfill else None)
+
+
+def probe_symbol(cache, provider, symbol):
+    """심볼의 일봉을 받아 보고, 데이터가 있으면 시세 캐시에 저장한 뒤 True를 반환하는 함수
+
+    MarketResolver가 .KS/.KQ를 확인할 때 사용하며, 받은 일봉을 캐시에 넣어 두므로
+    시장을 확인한 뒤 같은 종목을 다시 요청하지 않습니다.
+    접속 오류(ProviderError)는 그대로 전달해서 없는 종목으로 기억하지 않도록 합니다.
+    """
+    start = history_start()
+    with metrics.timer("provider_probe", errors="provider_errors_total"):
+        bars = provider.get_history(symbol, start=start.isoformat())
+    if not bars:
+        return False
+    cache.store(symbol, bars, history_from=start)
+    return True
+
+
+def fetch_stock_data(ticker, cache, provider, symbols=None, resolver=None):
+    """틱커(6자리 숫자)로 종목명과 1년전/6개월전/현재 가격을 조회하는 함수
+
+    가격은 로컬 시세 캐시에서 계산하며, 캐시가 오래된 경우에만 provider(PriceProvider)에서
+    새 일봉을 받아옵니다. 종목명은 로컬 종목 목록(symbols)이나 캐시에 없을 때만 조회합니다.
+    resolver(MarketResolver)가 있으면 유가증권(.KS)/코스닥(.KQ) 시장을 자동으로 찾습니다.
+    네트워크 호출이 포함될 수 있으므로 GUI 스레드가 아닌 작업 스레드에서 호출합니다.
+    """
+    metrics.inc("fetch_requests_total")
+    with metrics.timer("fetch", errors="fetch_errors_total"):
+        return _fetch_stock_data(ticker, cache, provider, symbols, resolver)
+
+
+def _fetch_stock_data(ticker, cache, provider, symbols, resolver):
+    if resolver is None:
+        symbol = f'{ticker}.KS'  # 한국 주식 코드 형식
+    else:
+        symbol = resolver.resolve(ticker)
+        if symbol is None:
+            raise ValueError(f"{ticker}: 유가증권/코스닥에서 찾을 수 없는 종목코드입니다")
+    update_price_cache(cache, provider, symbol)
+
+    name = (symbols.name_of(ticker) if symbols else None) or cache.get_name(symbol)
+    if name:
+        metrics.inc("name_cache_hits_total")
+    else:
+        metrics.inc("name_cache_misses_total")
+        with metrics.timer("provider_name", errors="provider_errors_total"):
+            name = provider.get_name(symbol)
+        cache.set_name(symbol, name)
+
+    prices = extract_prices(*cache.pack([symbol]))[0]
+    if prices is None:
+        raise ValueError(f"{symbol}: 가격 데이터가 없습니다")
+    price_1yr, price_6mo, current_price = prices
+    return StockRow(ticker, name, price_1yr=price_1yr, price_6mo=price_6mo,
+                    current_price=current_price)
+
+
+def extract_prices(days, closes, offsets):
+    """PriceCache.pack이 모은 종가 시계열에서 1년전/6개월전/현재 가격을 한 번에 계산하는 함수
+
+    1년전/6개월전 가격은 마지막 거래일에서 달력으로 1년/6개월 전 날짜(휴장일이면 그 이전
+    마지막 거래일)의 종가이며, 일봉이 그만큼 길지 않으면 None입니다.
+    결과는 종목 순서대로 (1년전, 6개월전, 현재) 튜플 또는 일봉이 없으면 None인 목록입니다.
+    """
+    result = compute_packed(days, closes, offsets)
+    prices = []
+    for values in zip(result["price_1Y"].tolist(), result["price_6M"].tolist(),
+                      result["last_close"].tolist()):
+        if math.isnan(values[2]):
+            prices.append(None)
+        else:
+            prices.append(tuple(None if math.isnan(value) else int(value) for value in values))
+    return prices
+
+
+def fetch_batch_prices(tickers, cache, provider, resolver=None):
+    """여러 틱커의 가격을 종목 묶음 단위의 일괄 다운로드로 조회하는 함수
+
+    TTL이 지난 종목만 마지막 캐시 날짜 이후 구간을 받아 캐시에 합친 뒤, 가격은 캐시에서 계산합니다.
+    결과는 틱커 -> (1년전, 6개월전, 현재 가격) 딕셔너리이며, 데이터가 없는 틱커는 빠집니다.
+    """
+    metrics.inc("refresh_requests_total")
+    with metrics.timer("refresh", errors="refresh_errors_total"):
+        return _fetch_batch_prices(tickers, cache, provider, resolver)
+
+
+def resolve_symbols(tickers, resolver=None):
+    """틱커의 시장을 확인해서 심볼 -> 틱커 딕셔너리를 만드는 함수 (시장을 모르는 틱커는 빠짐)"""
+    if resolver is None:
+        return {f'{ticker}.KS': ticker for ticker in tickers}
+    return {symbol: ticker for ticker, symbol in resolver.resolve_many(tickers).items()
+            if symbol}
+
+
+def _fetch_batch_prices(tickers, cache, provider, resolver):
+    ticker_of = resolve_symbols(tickers, resolver)
+    symbols = list(ticker_of)
+    history_from = history_start()
+    backfill = {symbol for symbol in symbols if cache.needs_history(symbol, history_from)}
+    stale = [symbol for symbol in symbols if symbol in backfill or not cache.is_fresh(symbol)]
+    metrics.inc("price_cache_hits_total", len(symbols) - len(stale))
+    metrics.inc("price_cache_misses_total", len(stale))
+    for start in range(0, len(stale), REFRESH_BATCH_SIZE):
+        chunk = stale[start:start + REFRESH_BATCH_SIZE]
+        last_dates = [cache.last_date(symbol) for symbol in chunk]
+        full = None in last_dates or any(symbol in backfill for symbol in chunk)
+        if full:
+            period = {'start': history_from.isoformat()}
+        else:
+            period = {'start': min(last_dates).isoformat()}
+        try:
+            with metrics.timer("provider_batch", errors="provider_errors_total"):
+                history = provider.get_history_batch(chunk, **period)
+        except Exception as e:
+            # 네트워크 오류 시에는 캐시된 데이터로 계속 진행합니다.
+            print(f"Error downloading price data: {e}")
+            continue
+        for symbol in chunk:
+            bars = history.get(symbol)
+            # 묶음 안에서 일봉을 받지 못한 종목은 받았다고 기록하지 않고 다음에 다시 요청합니다.
+            if bars:
+                cache.store(symbol, bars, history_from=history_from if full else None)
+
+    with metrics.timer("extract_prices"):
+        prices = extract_prices(*cache.pack(symbols))
+    return {ticker_of[symbol]: values for symbol, values in zip(symbols, prices)
+            if values is not None}
+
+
+def fetch_quotes(tickers, provider, resolver=None):
+    """여러 틱커의 장중 현재가를 종목 묶음 단위로 조회하는 함수
+
+    결과는 틱커 -> 정수 가격 딕셔너리이며, 시세가 없는 틱커는 빠집니다.
+    장중 시세는 일봉이 아니므로 시세 캐시에는 저장하지 않습니다.
+    """
+    metrics.inc("quote_requests_total")
+    with metrics.timer("quotes", errors="quote_errors_total"):
+        ticker_of = resolve_symbols(tickers, resolver)
+        symbols = list(ticker_of)
+        result = {}
+        for start in range(0, len(symbols), REFRESH_BATCH_SIZE):
+            try:
+                with metrics.timer("provider_quotes", errors="provider_errors_total"):
+                    quotes = provider.get_quotes(symbols[start:start + REFRESH_BATCH_SIZE])
+            except Exception as e:
+                # 한 묶음이 실패해도 나머지 묶음은 계속 조회합니다. (실패한 종목은 이전 값 유지)
+                print(f"Error downloading quotes: {e}")
+                continue
+            for symbol, price in quotes.items():
+                if symbol in ticker_of and price is not None:
+                    result[ticker_of[symbol]] = int(round(price))
+        return result
+
+
+class RateLimiter:
+    """초당 요청 수를 제한하는 토큰 버킷 (여러 스레드에서 함께 사용)"""
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _take(self):
+        """토큰이 있으면 하나 쓰고 0을, 없으면 다음 토큰까지 기다릴 시간(초)을 반환하는 함수"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0
+            return (1 - self._tokens) / self.rate
+
+    def acquire(self):
+        """토큰을 하나 얻을 때까지 기다리는 함수 (rate가 0 이하이면 제한 없음)"""
+        if not self.rate or self.rate <= 0:
+            return
+        while True:
+            wait = self._take()
+            if not wait:
+                return
+            time.sleep(wait)
+
+    def try_acquire(self):
+        """기다리지 않고 토큰을 하나 얻어 보는 함수 (얻으면 True)"""
+        if not self.rate or self.rate <= 0:
+            return True
+        return not self._take()
+
+
+class StockFetcher:
+    """시세 캐시, 종목 목록, 시장 확인기를 묶어서 종목을 조회하는 클래스
+
+    GUI(StockApp)와 명령줄 모드(stock_cli)가 같은 조회/계산 로직을 사용하도록 합니다.
+    """
+
+    def __init__(self, cache_path=price_cache_path, symbols_file=symbols_path,
+                 ttl=PRICE_CACHE_TTL, provider=None):
+        self.cache = PriceCache(cache_path, ttl=ttl)
+        # 시세 제공자 (기본값: 환경 변수 STOCK_PRICE_PROVIDER, 없으면 yfinance)
+        if provider is None:
+            provider = create_provider(os.environ.get(PROVIDER_ENV))
+        self.provider = provider
+        # 로컬 KRX 종목 목록 (종목명과 시장 정보에 사용)
+        self.symbols = SymbolIndex(load_symbols(symbols_file))
+        # 종목코드별 시장(.KS/.KQ) 확인 결과 캐시
+        self.resolver = MarketResolver(cache_path, partial(probe_symbol, self.cache, self.provider),
+                                       symbols=self.symbols)
+        # 진행 중인 종목별 조회 (같은 종목의 동시 요청은 하나의 조회 결과를 함께 사용)
+        self._in_flight = {}
+        self._in_flight_lock = threading.Lock()
+
+    def set_symbols(self, symbol_index):
+        """종목 목록 색인을 바꾸는 함수"""
+        self.symbols = symbol_index
+        self.resolver.symbols = symbol_index
+
+    def fetch(self, ticker):
+        """한 종목을 조회해서 StockRow로 반환하는 함수
+
+        같은 종목을 이미 다른 스레드에서 조회하고 있으면 새로 요청하지 않고 그 결과를 기다립니다.
+        (입력창 조회와 자동 새로고침이 겹치는 경우 등)
+        """
+        with self._in_flight_lock:
+            future = self._in_flight.get(ticker)
+            owner = future is None
+            if owner:
+                future = self._in_flight[ticker] = Future()
+        if not owner:
+            metrics.inc("fetch_coalesced_total")
+            # 호출한 쪽에서 row_id 등을 바꿀 수 있으므로 각자 다른 객체를 받습니다.
+            return StockRow(*future.result().values())
+
+        try:
+            result = fetch_stock_data(ticker, self.cache, self.provider, self.symbols,
+                                      self.resolver)
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._in_flight_lock:
+                del self._in_flight[ticker]
+
+    def fetch_batch(self, tickers):
+        """여러 종목의 가격을 일괄 조회하는 함수 (틱커 -> (1년전, 6개월전, 현재 가격))"""
+        prices = fetch_batch_prices(tickers, self.cache, self.provider, self.resolver)
+        self.cache.flush()
+        return prices
+
+    def quotes(self, tickers):
+        """여러 종목의 장중 현재가를 조회하는 함수 (틱커 -> 현재가)"""
+        return fetch_quotes(list(dict.fromkeys(tickers)), self.provider, self.resolver)
+
+    def lookbacks(self, tickers):
+        """캐시된 일봉으로 틱커별 기간 수익률, CAGR, 최대 낙폭을 계산하는 함수 (네트워크 없음)
+
+        시장을 아직 모르는 틱커는 결과에서 빠집니다. 값은 lookback.compute_lookbacks를 참고합니다.
+        """
+        symbols = {}
+        for ticker in dict.fromkeys(tickers):
+            symbol = self.resolver.cached(ticker)
+            if symbol:
+                symbols[ticker] = symbol
+        with metrics.timer("lookbacks"):
+            return lookback_rows(list(symbols), *self.cache.pack(list(symbols.values())))
+
+    def history(self, ticker):
+        """캐시된 일봉에서 틱커의 (일 번호 배열, 종가 배열)을 반환하는 함수 (네트워크 없음)
+
+        시장을 아직 모르거나 일봉이 없으면 빈 배열입니다.
+        """
+        symbol = self.resolver.cached(ticker)
+        days, closes, _ = self.cache.pack([symbol] if symbol else [])
+        return days, closes
@@ -0,0 +1,126 @@
+import json
+import os
+
+import metrics
+
+# 가격 필드 (정수 원 단위, 값이 없으면 None)
+PRICE_FIELDS = ("price_1yr", "price_6mo", "current_price")
+# 보유 수량(주)과 평균 매입 단가(원) (정수, 보유하지 않은 종목은 None)
+HOLDING_FIELDS = ("quantity", "avg_cost")
+# 정수 값 필드 (가격과 보유 정보)
+NUMERIC_FIELDS = PRICE_FIELDS + HOLDING_FIELDS
+# 행의 필드 순서 (기존 stock_data.json의 각 행과 같은 순서, 보유 정보는 뒤에 추가)
+FIELDS = ("ticker", "name") + PRICE_FIELDS + HOLDING_FIELDS
+
+
+def parse_price(value):
+    """가격 값을 정수(원)로 바꾸는 함수
+
+    정수뿐 아니라 기존 형식의 "14,624 원" 같은 표시용 문자열도 읽습니다.
+    비어 있거나 읽을 수 없는 값은 None을 반환합니다.
+    """
+    if value is None or isinstance(value, int):
+        return value
+    if isinstance(value, float):
+        return int(value)
+    digits = str(value).replace(",", "").replace("원", "").strip()
+    try:
+        return int(float(digits))
+    except ValueError:
+        return None
+
+
+def format_price(value):
+    """정수 가격을 화면 표시용 "14,624 원" 문자열로 바꾸는 함수"""
+    return "" if value is None else f"{value:,} 원"
+
+
+def format_quantity(value):
+    """보유 수량을 화면 표시용 "1,200" 문자열로 바꾸는 함수"""
+    return "" if value is None else f"{value:,}"
+
+
+def format_field(field, value):
+    """필드 값을 화면 표시용 문자열로 바꾸는 함수"""
+    if field == "quantity":
+        return format_quantity(value)
+    if field in NUMERIC_FIELDS:
+        return format_price(value)
+    return value
+
+
+class StockRow:
+    """포트폴리오의 한 행 (가격은 정수 원 단위로 보관하고 화면에 그릴 때만 문자열로 변환)"""
+
+    __slots__ = ("row_id",) + FIELDS
+
+    def __init__(self, ticker="", name="", price_1yr=None, price_6mo=None,
+                 current_price=None, quantity=None, avg_cost=None, row_id=None):
+        self.row_id = row_id
+        self.ticker = ticker
+        self.name = name
+        self.price_1yr = price_1yr
+        self.price_6mo = price_6mo
+        self.current_price = current_price
+        self.quantity = quantity
+        self.avg_cost = avg_cost
+
+    @classmethod
+    def from_values(cls, values, row_id=None):
+        """[틱커, 종목명, 1년전, 6개월전, 현재가격, 수량, 평균단가] 목록으로 행을 만드는 함수
+
+        기존 문자열 형식과 보유 정보가 없는 5개 값 목록도 읽습니다.
+        """
+        values = list(values) + [None] * (len(FIELDS) - len(values))
+        return cls(str(values[0] or ""), str(values[1] or ""),
+                   *(parse_price(value) for value in values[2:len(FIELDS)]),
+                   row_id=row_id)
+
+    @classmethod
+    def from_dict(cls, data, row_id=None):
+        return cls.from_values([data.get(field) for field in FIELDS], row_id=row_id)
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in FIELDS}
+
+    def values(self):
+        """필드 값을 FIELDS 순서의 튜플로 반환하는 함수"""
+        return tuple(getattr(self, field) for field in FIELDS)
+
+    def display_values(self):
+        """화면에 표시할 문자열 목록을 반환하는 함수"""
+        return [format_field(field, getattr(self, field)) for field in FIELDS]
+
+    def __eq__(self, other):
+        return isinstance(other, StockRow) and self.values() == other.values()
+
+    def __repr__(self):
+        return f"StockRow({', '.join(repr(value) for value in self.values())})"
+
+
+@metrics.timed("json_load")
+def load_rows_json(path):
+    """JSON 파일에서 StockRow 목록을 읽는 함수
+
+    새 형식(필드 이름을 키로 하는 객체 목록)과 기존 형식(문자열 가격을 담은 행 목록)을 모두 읽습니다.
+    """
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r', encoding="utf-8") as file:
+        data = json.load(file)
+    if not isinstance(data, list):
+        raise ValueError(f"행 목록이 아닙니다: {path}")
+    return [StockRow.from_dict(item) if isinstance(item, dict) else StockRow.from_values(item)
+            for item in data]
+
+
+@metrics.timed("json_save")
+def dump_rows_json(rows, path):
+    """StockRow 목록을 JSON 파일로 저장하는 함수 (임시 파일에 쓴 뒤 교체)"""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as file:
+        json.dump([row.to_dict() for row in rows], file, ensure_ascii=False,
+                  separators=(",", ":"))
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmp_path, path)
@@ -0,0 +1,490 @@
+import time
+
+from PyQt5.QtCore import (Qt, QAbstractItemModel, QAbstractTableModel, QModelIndex,
+                          QSortFilterProxyModel, pyqtSignal)
+from PyQt5.QtGui import QBrush, QColor
+from PyQt5.QtWidgets import QTableView
+
+import metrics
+
+from fx_rates import BASE_CURRENCY, format_money
+from stock_model import FIELDS, NUMERIC_FIELDS, format_field
+from valuation import PortfolioValuation
+
+HEADERS = ["틱커명", "종목명", "1년전가격", "6개월전가격", "현재가격", "수량", "평균단가"]
+# 보유 정보로 계산하는 평가 열 (valuation.PortfolioValuation.row_values의 이름, 헤더)
+VALUATION_COLUMNS = [
+    ("market_value", "평가금액"),
+    ("pnl", "평가손익"),
+    ("pnl_rate", "수익률"),
+    ("weight", "비중"),
+]
+# 선택해서 표시하는 기간 수익률 열 (lookback.compute_lookbacks 결과 이름, 헤더)
+LOOKBACK_COLUMNS = [
+    ("return_1W", "1주"),
+    ("return_1M", "1개월"),
+    ("return_3M", "3개월"),
+    ("return_6M", "6개월"),
+    ("return_YTD", "연초대비"),
+    ("return_1Y", "1년"),
+    ("return_3Y", "3년"),
+    ("cagr", "CAGR(3년)"),
+    ("mdd", "최대낙폭(3년)"),
+]
+_LOOKBACK_HEADERS = dict(LOOKBACK_COLUMNS)
+# 비교일 스냅샷 열 (snapshot_history의 필드 순서 가격과 현재가격의 변화율, 헤더 앞에는 비교일 표시)
+COMPARE_COLUMNS = [
+    ("compare_price_1yr", "1년전가격"),
+    ("compare_price_6mo", "6개월전가격"),
+    ("compare_current_price", "현재가격"),
+    ("compare_change", "대비"),
+]
+_COMPARE_HEADERS = dict(COMPARE_COLUMNS)
+_COMPARE_PRICES = {name: number for number, (name, _) in enumerate(COMPARE_COLUMNS[:-1])}
+# 기간 수익률/비교일 열이 시작되는 열 번호
+_FIXED_COLUMNS = len(HEADERS) + len(VALUATION_COLUMNS)
+_WEIGHT_COLUMN = len(HEADERS) + [name for name, _ in VALUATION_COLUMNS].index("weight")
+# 실시간 시세가 바뀌면 다시 그리는 열 구간 (현재가격, 평가금액~수익률)
+_PRICE_COLUMN = FIELDS.index("current_price")
+_QUOTE_COLUMN_RANGES = ((_PRICE_COLUMN, _PRICE_COLUMN), (len(HEADERS), _WEIGHT_COLUMN - 1))
+# 실시간 시세가 오르거나 내린 셀을 강조하는 시간(초)과 배경색 (상승 빨강, 하락 파랑)
+FLASH_SECONDS = 1.5
+_FLASH_BRUSHES = {1: QBrush(QColor("#FFD6D6")), -1: QBrush(QColor("#D6E4FF"))}
+
+_ALIGN_CENTER = int(Qt.AlignmentFlag.AlignCenter)
+_ALIGN_RIGHT = int(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+_ALIGN_LEFT = int(Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter)
+
+
+def format_percent(value):
+    """비율(0.123)을 "+12.3%" 형식으로 바꾸는 함수 (값이 없으면 빈 문자열)"""
+    return "" if value is None else f"{value:+.1%}"
+
+
+def format_valuation(name, value, currency=BASE_CURRENCY, rate=None):
+    """평가 열 값을 화면 표시용 문자열로 바꾸는 함수 (금액은 rate로 통화를 바꿈)"""
+    if value is None:
+        return ""
+    if name == "weight":
+        return f"{value:.1%}"
+    if name == "pnl_rate":
+        return format_percent(value)
+    if name == "pnl":
+        return ("+" if value >= 0 else "-") + format_money(abs(value), currency, rate)
+    return format_money(value, currency, rate)
+
+
+def contiguous_ranges(positions):
+    """행 번호 목록을 연속된 (시작, 끝) 구간 목록으로 묶는 함수"""
+    ranges = []
+    for position in sorted(set(positions)):
+        if ranges and ranges[-1][1] == position - 1:
+            ranges[-1][1] = position
+        else:
+            ranges.append([position, position])
+    return [tuple(item) for item in ranges]
+
+
+class StockTableModel(QAbstractTableModel):
+    """StockRow 목록을 그대로 보여 주는 테이블 모델
+
+    셀 값은 뷰가 요청할 때(화면에 보이는 셀)만 만들어지며, 가격은 이때 문자열로 변환됩니다.
+    평가금액/손익 합계(valuation)는 행이 바뀔 때 그 행만 다시 계산하며, 합계가 바뀌면
+    totals_changed 시그널을 보냅니다.
+    """
+
+    totals_changed = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.valuation = PortfolioValuation()
+        self._rows = []
+        self._positions = None  # 저장소 행 번호 -> 모델 행 번호 (필요할 때 다시 만듦)
+        self._ticker_positions = None  # 틱커 -> 모델 행 번호 목록 (실시간 시세용)
+        self._flashes = {}        # 저장소 행 번호 -> (1 상승/-1 하락, 강조가 끝나는 시각)
+        self._sort_column = -1
+        self._sort_order = Qt.AscendingOrder
+        self._extra_columns = []  # 표시 중인 기간 수익률/비교일 열 이름
+        self._lookbacks = {}      # 틱커 -> {이름: 값}
+        self._compare_label = ""  # 비교일 (열 머리글에 표시)
+        self._comparison = {}     # 틱커 -> 비교일의 (1년전, 6개월전, 현재) 가격
+        self.currency = BASE_CURRENCY
+        self._rates = {}          # 가격 필드 -> 1통화당 원 환율 ("current": 그 외 금액)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else _FIXED_COLUMNS + len(self._extra_columns)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            if section >= _FIXED_COLUMNS:
+                name = self._extra_columns[section - _FIXED_COLUMNS]
+                if name in _COMPARE_HEADERS:
+                    return f"{self._compare_label} {_COMPARE_HEADERS[name]}"
+                return _LOOKBACK_HEADERS[name]
+            if section >= len(HEADERS):
+                return VALUATION_COLUMNS[section - len(HEADERS)][1]
+            return HEADERS[section]
+        return super().headerData(section, orientation, role)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row = self._rows[index.row()]
+        if index.column() >= _FIXED_COLUMNS:
+            if role == Qt.DisplayRole:
+                value = self.extra_value(row, index.column())
+                if self._extra_columns[index.column() - _FIXED_COLUMNS] in _COMPARE_PRICES:
+                    if self._rates:
+                        return format_money(value, self.currency, self._rates.get("current"))
+                    return format_field("current_price", value)
+                return format_percent(value)
+            if role == Qt.TextAlignmentRole:
+                return _ALIGN_RIGHT
+            return None
+        if index.column() >= len(HEADERS):
+            if role == Qt.DisplayRole:
+                name = VALUATION_COLUMNS[index.column() - len(HEADERS)][0]
+                return format_valuation(name, self.valuation_value(row, index.column()),
+                                        self.currency, self._rates.get("current"))
+            if role == Qt.TextAlignmentRole:
+                return _ALIGN_RIGHT
+            return None
+        field = FIELDS[index.column()]
+        if role == Qt.BackgroundRole:
+            if index.column() == _PRICE_COLUMN and row.row_id in self._flashes:
+                return _FLASH_BRUSHES[self._flashes[row.row_id][0]]
+            return None
+        if role == Qt.DisplayRole:
+            if self._rates and field in NUMERIC_FIELDS and field != "quantity":
+                return format_money(getattr(row, field), self.currency,
+                                    self._rates.get(field, self._rates.get("current")))
+            return format_field(field, getattr(row, field))
+        if role == Qt.TextAlignmentRole:
+            if index.column() == 0:
+                return _ALIGN_CENTER
+            return _ALIGN_RIGHT if field in NUMERIC_FIELDS else _ALIGN_LEFT
+        return None
+
+    def extra_value(self, row, column):
+        name = self._extra_columns[column - _FIXED_COLUMNS]
+        if name in _COMPARE_HEADERS:
+            prices = self._comparison.get(row.ticker)
+            if prices is None:
+                return None
+            if name != "compare_change":
+                return prices[_COMPARE_PRICES[name]]
+            then = prices[_COMPARE_PRICES["compare_current_price"]]
+            if not then or row.current_price is None:
+                return None
+            return row.current_price / then - 1
+        return self._lookbacks.get(row.ticker, {}).get(name)
+
+    def valuation_value(self, row, column):
+        name = VALUATION_COLUMNS[column - len(HEADERS)][0]
+        return self.valuation.row_values(row)[name]
+
+    def set_extra_columns(self, names):
+        """표시할 기간 수익률/비교일 열을 바꾸는 함수 (LOOKBACK_COLUMNS, COMPARE_COLUMNS의 이름 목록)"""
+        self.beginResetModel()
+        self._extra_columns = list(names)
+        if self._sort_column >= _FIXED_COLUMNS + len(self._extra_columns):
+            self._sort_column = -1
+        self.endResetModel()
+
+    def set_currency(self, currency, rates=None):
+        """금액을 표시할 통화와 필드별 환율(fx_rates.FxRates.field_rates)을 바꾸는 함수
+
+        값은 원으로 그대로 두고 화면에 그리는 셀만 바꾸므로 행 수와 관계없이 바로 끝납니다.
+        (양수 환율로 나누므로 정렬 순서도 바뀌지 않음)
+        """
+        self.currency = currency
+        self._rates = dict(rates or {}) if currency != BASE_CURRENCY else {}
+        if self._rows:
+            self.dataChanged.emit(self.index(0, 0),
+                                  self.index(len(self._rows) - 1, self.columnCount() - 1),
+                                  [Qt.DisplayRole])
+        self.totals_changed.emit()
+
+    def format_amount(self, value, signed=False):
+        """합계 등 금액을 현재 통화로 표시하는 함수"""
+        return format_valuation("pnl" if signed else "market_value", value, self.currency,
+                                self._rates.get("current"))
+
+    def set_lookbacks(self, lookbacks):
+        """틱커별 기간 수익률 계산 결과를 바꾸고 해당 열만 다시 그리게 하는 함수"""
+        self._lookbacks = lookbacks
+        if self._extra_columns and self._rows:
+            self.dataChanged.emit(self.index(0, _FIXED_COLUMNS),
+                                  self.index(len(self._rows) - 1, self.columnCount() - 1),
+                                  [Qt.DisplayRole])
+
+    def set_comparison(self, label, prices):
+        """비교일 표시와 틱커별 그날의 가격을 바꾸고 비교일 열만 다시 그리게 하는 함수"""
+        self._compare_label = label
+        self._comparison = prices
+        columns = [column for column, name in enumerate(self._extra_columns, _FIXED_COLUMNS)
+                   if name in _COMPARE_HEADERS]
+        if columns:
+            self.headerDataChanged.emit(Qt.Horizontal, columns[0], columns[-1])
+            if self._rows:
+                self.dataChanged.emit(self.index(0, columns[0]),
+                                      self.index(len(self._rows) - 1, columns[-1]),
+                                      [Qt.DisplayRole])
+
+    def row(self, position):
+        return self._rows[position]
+
+    def rows(self):
+        return self._rows
+
+    def position_of(self, row_id):
+        """저장소 행 번호에 해당하는 모델 행 번호를 반환하는 함수 (없으면 -1)"""
+        if self._positions is None:
+            self._positions = {row.row_id: position for position, row in enumerate(self._rows)}
+        return self._positions.get(row_id, -1)
+
+    @metrics.timed("table_update")
+    def set_rows(self, rows):
+        """모든 행을 한 번에 바꾸는 함수"""
+        self.beginResetModel()
+        self._rows = list(rows)
+        self._positions = None
+        self._ticker_positions = None
+        self._flashes = {}
+        self.valuation.set_rows(self._rows)
+        if self._sort_column >= 0:
+            self._rows.sort(key=self._sort_key(self._sort_column),
+                            reverse=self._sort_order == Qt.DescendingOrder)
+        self.endResetModel()
+        self.totals_changed.emit()
+
+    def _sort_key(self, column):
+        if column < 0:
+            return lambda row: row.row_id or 0
+        if column >= len(HEADERS):
+            value_of = self.extra_value if column >= _FIXED_COLUMNS else self.valuation_value
+
+            def key(row):
+                # 값이 없는 행은 가장 작은 값으로 정렬합니다.
+                value = value_of(row, column)
+                return float("-inf") if value is None else value
+            return key
+        field = FIELDS[column]
+        if field in NUMERIC_FIELDS:
+            # 가격이 없는 행은 가장 작은 값으로 정렬합니다.
+            return lambda row: -1 if getattr(row, field) is None else getattr(row, field)
+        return lambda row: getattr(row, field)
+
+    @metrics.timed("table_update")
+    def sort(self, column, order=Qt.AscendingOrder):
+        """표시 문자열이 아닌 원래 값(정수 가격 등)으로 행을 정렬하는 함수
+
+        열 번호가 -1이면 저장된 순서(행 번호 순)로 되돌립니다.
+        """
+        self._sort_column = column
+        self._sort_order = order
+        self.layoutAboutToBeChanged.emit([], QAbstractItemModel.VerticalSortHint)
+        key = self._sort_key(column)
+        old_rows = self._rows
+        order_index = sorted(range(len(old_rows)), key=lambda i: key(old_rows[i]),
+                             reverse=order == Qt.DescendingOrder)
+        self._rows = [old_rows[i] for i in order_index]
+        self._positions = None
+        self._ticker_positions = None
+
+        # 선택 등 뷰가 들고 있는 인덱스를 새 위치로 옮깁니다.
+        new_position = [0] * len(order_index)
+        for position, old in enumerate(order_index):
+            new_position[old] = position
+        persistent = self.persistentIndexList()
+        self.changePersistentIndexList(
+            persistent, [self.index(new_position[index.row()], index.column())
+                         for index in persistent])
+        self.layoutChanged.emit([], QAbstractItemModel.VerticalSortHint)
+
+    @metrics.timed("table_update")
+    def append_rows(self, rows):
+        """여러 행을 한 번의 삽입 알림으로 끝에 추가하는 함수"""
+        rows = list(rows)
+        if not rows:
+            return
+        first = len(self._rows)
+        self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+        self._rows.extend(rows)
+        self._ticker_positions = None
+        if self._positions is not None:
+            for position, row in enumerate(rows, first):
+                self._positions[row.row_id] = position
+        self.endInsertRows()
+        self._valuation_changed(rows)
+
+    def resort(self):
+        """정렬된 상태이면 현재 정렬 기준으로 다시 정렬하는 함수 (여러 행을 추가한 뒤 등)"""
+        if self._sort_column >= 0:
+            self.sort(self._sort_column, self._sort_order)
+
+    def append_row(self, row):
+        self.append_rows([row])
+
+    def replace_row(self, position, row):
+        """한 행을 새 StockRow로 바꾸는 함수"""
+        old_id = self._rows[position].row_id
+        self._rows[position] = row
+        self._ticker_positions = None
+        if old_id != row.row_id:
+            self.valuation.remove(old_id)
+        if self._positions is not None:
+            self._positions.pop(old_id, None)
+            self._positions[row.row_id] = position
+        self.rows_changed([position])
+
+    @metrics.timed("table_update")
+    def remove_row(self, position):
+        self.beginRemoveRows(QModelIndex(), position, position)
+        self.valuation.remove(self._rows[position].row_id)
+        del self._rows[position]
+        self._positions = None
+        self._ticker_positions = None
+        self.endRemoveRows()
+        self._valuation_changed([])
+
+    @metrics.timed("table_update")
+    def apply_changes(self, rows, deleted_ids):
+        """다른 프로그램이 저장한 변경만 표에 반영하는 함수 (바뀐 행 수를 반환)
+
+        - rows: 추가되거나 수정된 행 (값이 표와 같은 행은 건너뜀)
+        - deleted_ids: 삭제된 저장소 행 번호 (표에 없는 번호는 건너뜀)
+        """
+        changed = []
+        added = []
+        for row in rows:
+            position = self.position_of(row.row_id)
+            if position < 0:
+                added.append(row)
+            elif self._rows[position] != row:
+                self._rows[position] = row
+                self._ticker_positions = None
+                changed.append(position)
+        if changed:
+            self.rows_changed(changed)
+
+        removed = [position for position in map(self.position_of, deleted_ids) if position >= 0]
+        # 뒤쪽 구간부터 지워야 앞쪽 행 번호가 바뀌지 않습니다.
+        for first, last in reversed(contiguous_ranges(removed)):
+            self.beginRemoveRows(QModelIndex(), first, last)
+            for row in self._rows[first:last + 1]:
+                self.valuation.remove(row.row_id)
+            del self._rows[first:last + 1]
+            self.endRemoveRows()
+        if removed:
+            self._positions = None
+            self._ticker_positions = None
+            self._valuation_changed([])
+
+        self.append_rows(added)
+        return len(changed) + len(removed) + len(added)
+
+    @metrics.timed("table_update")
+    def apply_quotes(self, quotes, now=None):
+        """실시간 시세(틱커 -> 현재가)를 표의 값과 비교해서 바뀐 셀만 다시 그리게 하는 함수
+
+        바뀐 행은 현재가격과 평가 열만 알리고, 오르거나 내린 현재가격 셀은 FLASH_SECONDS 동안
+        배경색으로 강조합니다. 바뀐 행 번호 목록을 반환합니다.
+        """
+        if self._ticker_positions is None:
+            self._ticker_positions = {}
+            for position, row in enumerate(self._rows):
+                self._ticker_positions.setdefault(row.ticker, []).append(position)
+        deadline = (time.monotonic() if now is None else now) + FLASH_SECONDS
+        changed = []
+        for ticker, price in quotes.items():
+            for position in self._ticker_positions.get(ticker, ()):
+                row = self._rows[position]
+                if row.current_price == price:
+                    continue
+                if row.current_price is not None:
+                    self._flashes[row.row_id] = (1 if price > row.current_price else -1, deadline)
+                row.current_price = price
+                changed.append(position)
+        if changed:
+            column_ranges = _QUOTE_COLUMN_RANGES
+            if "compare_change" in self._extra_columns:
+                # 비교일 대비 변화율도 현재가격으로 계산합니다.
+                column = _FIXED_COLUMNS + self._extra_columns.index("compare_change")
+                column_ranges += ((column, column),)
+            self._cells_changed(changed, column_ranges, [Qt.DisplayRole, Qt.BackgroundRole])
+            self._valuation_changed([self._rows[position] for position in changed])
+        return changed
+
+    def expire_flashes(self, now=None):
+        """강조 시간이 지난 셀의 배경색을 지우는 함수 (강조 중인 셀이 남아 있으면 True)"""
+        now = time.monotonic() if now is None else now
+        expired = [row_id for row_id, (_, deadline) in self._flashes.items() if deadline <= now]
+        for row_id in expired:
+            del self._flashes[row_id]
+        positions = [position for position in map(self.position_of, expired) if position >= 0]
+        self._cells_changed(positions, ((_PRICE_COLUMN, _PRICE_COLUMN),), [Qt.BackgroundRole])
+        return bool(self._flashes)
+
+    def _cells_changed(self, positions, column_ranges, roles):
+        """행 번호의 연속 구간마다 지정한 열 구간만 dataChanged를 알리는 함수"""
+        for first, last in contiguous_ranges(positions):
+            for first_column, last_column in column_ranges:
+                self.dataChanged.emit(self.index(first, first_column),
+                                      self.index(last, last_column), roles)
+
+    @metrics.timed("table_update")
+    def rows_changed(self, positions):
+        """값이 바뀐 행들을 연속 구간별로 묶어서 dataChanged를 알리는 함수"""
+        last_column = self.columnCount() - 1
+        for first, last in contiguous_ranges(positions):
+            self.dataChanged.emit(self.index(first, 0), self.index(last, last_column),
+                                  [Qt.DisplayRole])
+        self._valuation_changed([self._rows[position] for position in positions])
+
+    def _valuation_changed(self, rows):
+        """바뀐 행만 평가 합계에 반영하고, 합계가 바뀌었으면 비중 열과 합계 표시를 갱신하는 함수"""
+        before = self.valuation.market_value
+        self.valuation.update(rows)
+        if self.valuation.market_value != before and self._rows:
+            # 비중은 모든 행이 바뀌지만 뷰는 보이는 셀만 다시 그립니다.
+            self.dataChanged.emit(self.index(0, _WEIGHT_COLUMN),
+                                  self.index(len(self._rows) - 1, _WEIGHT_COLUMN),
+                                  [Qt.DisplayRole])
+        self.totals_changed.emit()
+
+
+class StockFilterProxyModel(QSortFilterProxyModel):
+    """틱커/종목명 검색을 제공하는 프록시 모델
+
+    정렬은 원본 모델에 맡겨서 Python 비교 함수를 행마다 호출하지 않도록 합니다.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setDynamicSortFilter(True)
+        self._needle = ""
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        self.sourceModel().sort(column, order)
+
+    def set_search_text(self, text):
+        self._needle = text.strip().lower()
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        if not self._needle:
+            return True
+        row = self.sourceModel().row(source_row)
+        return self._needle in row.ticker or self._needle in row.name.lower()
+
+
+class StockTableView(QTableView):
+    """보이는 셀을 그리는 데 걸린 시간을 지표로 기록하는 테이블 뷰"""
+
+    @metrics.timed("table_paint")
+    def paintEvent(self, event):
+        super().paintEvent(event)
@@ -0,0 +1,165 @@
+import io
+import json
+import os
+from bisect import bisect_left
+
+# KRX 상장법인 목록 다운로드 주소 (KIND)
+KIND_URL = "https://kind.krx.co.kr/corpgeneral/corpList.do"
+MARKETS = {"KOSPI": "stockMkt", "KOSDAQ": "kosdaqMkt"}
+
+# 한글 음절의 초성 (유니코드 순서)
+CHOSEONG = "ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ"
+
+
+def choseong(text):
+    """한글 음절을 초성으로 바꾼 문자열을 반환하는 함수 (한글이 아닌 글자는 소문자로 유지)"""
+    chars = []
+    for ch in text:
+        code = ord(ch) - 0xAC00
+        if 0 <= code < 11172:
+            chars.append(CHOSEONG[code // 588])
+        else:
+            chars.append(ch.lower())
+    return "".join(chars)
+
+
+def is_choseong_query(text):
+    """검색어가 초성(ㄱ~ㅎ)으로만 이루어져 있는지 확인하는 함수"""
+    return bool(text) and all("ㄱ" <= ch <= "ㅎ" or ch == " " for ch in text)
+
+
+class Symbol:
+    """상장 종목 한 건"""
+
+    __slots__ = ("code", "name", "name_en", "market")
+
+    def __init__(self, code, name, name_en="", market=""):
+        self.code = code
+        self.name = name
+        self.name_en = name_en
+        self.market = market
+
+    def __repr__(self):
+        return f"Symbol({self.code!r}, {self.name!r}, {self.name_en!r}, {self.market!r})"
+
+
+def _name_keys(name):
+    """이름 전체와 단어별 시작 위치부터의 부분 문자열을 검색 키로 만드는 함수"""
+    name = name.lower()
+    keys = {name}
+    for position, ch in enumerate(name):
+        if position and name[position - 1] in " -&()." and ch not in " -&().":
+            keys.add(name[position:])
+    return keys
+
+
+class SymbolIndex:
+    """종목코드/한글명/영문명/초성 접두사 검색을 위한 정렬 배열 색인
+
+    각 색인은 (검색 키, 종목 번호) 정렬 목록이며, 검색은 bisect로 시작 위치를 찾은 뒤
+    접두사가 일치하는 동안만 읽습니다.
+    """
+
+    def __init__(self, symbols=()):
+        self.symbols = list(symbols)
+        self.by_code = {symbol.code: symbol for symbol in self.symbols}
+        self._code_keys = self._build(lambda symbol: [symbol.code])
+        self._name_keys = self._build(lambda symbol: _name_keys(symbol.name))
+        self._name_en_keys = self._build(lambda symbol: _name_keys(symbol.name_en)
+                                         if symbol.name_en else [])
+        self._choseong_keys = self._build(lambda symbol: _name_keys(choseong(symbol.name)))
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def _build(self, keys_of):
+        entries = sorted((key, position) for position, symbol in enumerate(self.symbols)
+                         for key in keys_of(symbol))
+        return [key for key, _ in entries], [position for _, position in entries]
+
+    def _prefix(self, index, prefix, limit, seen, results):
+        keys, positions = index
+        start = bisect_left(keys, prefix)
+        for i in range(start, len(keys)):
+            if len(results) >= limit or not keys[i].startswith(prefix):
+                break
+            position = positions[i]
+            if position not in seen:
+                seen.add(position)
+                results.append(self.symbols[position])
+
+    def get(self, code):
+        return self.by_code.get(code)
+
+    def name_of(self, code):
+        symbol = self.by_code.get(code)
+        return symbol.name if symbol else None
+
+    def search(self, query, limit=20):
+        """종목코드 접두사, 한글/영문명 접두사 또는 초성으로 종목을 찾는 함수"""
+        query = query.strip().lower()
+        if not query:
+            return []
+        results = []
+        seen = set()
+        if query.isdigit():
+            self._prefix(self._code_keys, query, limit, seen, results)
+        elif is_choseong_query(query):
+            self._prefix(self._choseong_keys, query, limit, seen, results)
+        else:
+            self._prefix(self._name_keys, query, limit, seen, results)
+            self._prefix(self._name_en_keys, query, limit, seen, results)
+        return results
+
+
+def load_symbols(path):
+    """로컬 종목 목록 파일을 읽는 함수 (파일이 없으면 빈 목록)"""
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r', encoding="utf-8") as file:
+        return [Symbol(*item) for item in json.load(file)]
+
+
+def save_symbols(symbols, path):
+    """종목 목록을 파일로 저장하는 함수 (임시 파일에 쓴 뒤 교체)"""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as file:
+        json.dump([[symbol.code, symbol.name, symbol.name_en, symbol.market]
+                   for symbol in symbols], file, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+
+def download_symbols():
+    """KIND에서 유가증권(KOSPI)/코스닥 상장 종목 목록을 받아오는 함수 (시세 조회와 같은 공유 세션 사용)"""
+    import pandas as pd
+
+    from http_session import shared_session
+
+    session = shared_session()
+    symbols = []
+    for market, market_type in MARKETS.items():
+        # 응답 대기 시간은 세션에 설정한 값을 사용합니다.
+        response = session.get(KIND_URL, params={"method": "download", "marketType": market_type})
+        response.raise_for_status()
+        response.encoding = "euc-kr"
+        table = pd.read_html(io.StringIO(response.text), header=0,
+                             converters={"종목코드": str})[0]
+        for name, code in zip(table["회사명"], table["종목코드"]):
+            symbols.append(Symbol(code.strip().zfill(6), str(name), market=market))
+    return symbols
+
+
+def refresh_symbols(path, english_names=None):
+    """종목 목록을 새로 받아서 파일에 저장하고 SymbolIndex를 반환하는 함수
+
+    KIND 목록에는 영문명이 없으므로 english_names(종목코드 -> 영문명)나
+    기존 파일의 영문명을 이어받습니다.
+    """
+    previous = {symbol.code: symbol.name_en for symbol in load_symbols(path)}
+    english_names = english_names or {}
+    symbols = download_symbols()
+    for symbol in symbols:
+        symbol.name_en = english_names.get(symbol.code) or previous.get(symbol.code, "")
+    symbols.sort(key=lambda symbol: symbol.code)
+    save_symbols(symbols, path)
+    return SymbolIndex(symbols)
@@ -0,0 +1,31 @@
+"""HTTP 응답 캐시의 유효 시간 규칙과 캐시 키 테스트
+
+    python -m pytest -q test_http_session.py
+"""
+import unittest
+
+from http_session import METADATA_TTL, PRICE_TTL, cache_key, response_ttl
+from price_provider import YFinanceProvider
+
+
+class CacheRulesTest(unittest.TestCase):
+    def test_name_lookup_uses_metadata_ttl(self):
+        url = YFinanceProvider.SEARCH_URL + "?q=005930.KS&quotesCount=5&newsCount=0"
+        self.assertEqual(response_ttl(url), METADATA_TTL)
+
+    def test_intraday_quotes_are_not_cached(self):
+        url = "https://query2.finance.yahoo.com/v8/finance/chart/005930.KS?range=1d&interval=1m"
+        self.assertEqual(response_ttl(url), 0)
+        self.assertEqual(response_ttl("http://127.0.0.1:8765/quotes?symbols=005930.KS"), 0)
+
+    def test_history_key_ignores_moving_end_time(self):
+        url = ("https://query2.finance.yahoo.com/v8/finance/chart/005930.KS"
+               "?period1=1700000000&period2={}&interval=1d")
+        self.assertEqual(response_ttl(url.format(1)), PRICE_TTL)
+        self.assertEqual(cache_key(url.format(1792337822)), cache_key(url.format(1792339999)))
+        self.assertNotEqual(cache_key(url.format(1)),
+                            cache_key(url.format(1).replace("period1=1700000000", "period1=1")))
+
+
+if __name__ == "__main__":
+    unittest.main()
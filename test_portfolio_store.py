@@ -0,0 +1,96 @@
+"""포트폴리오 저장소(PortfolioStore)의 이전 스키마 변환 확인 테스트
+
+    python -m pytest -q test_portfolio_store.py
+"""
+import os
+import sqlite3
+import tempfile
+import unittest
+from unittest import mock
+
+from portfolio_store import SCHEMA_VERSION, PortfolioStore
+from stock_model import StockRow
+
+# 버전 0 형식의 행 (가격은 표시용 문자열)
+V0_ROWS = [(1, "005930.KS", "삼성전자", "70,100 원", "74,300 원", "81,200 원"),
+           (3, "035720.KS", "카카오", "", "14,624 원", "15,000 원")]
+EXPECTED = [StockRow("005930.KS", "삼성전자", 70100, 74300, 81200, row_id=1),
+            StockRow("035720.KS", "카카오", None, 14624, 15000, row_id=3)]
+
+
+class MigrationTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "portfolio.db")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def make_v0(self, table="rows"):
+        """버전 0 저장소 파일을 만드는 함수"""
+        conn = sqlite3.connect(self.path)
+        with conn:
+            conn.execute(f"""
+                CREATE TABLE {table} (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    ticker TEXT, name TEXT, price_1yr TEXT, price_6mo TEXT, current_price TEXT
+                )""")
+            conn.executemany(f"INSERT INTO {table} VALUES (?, ?, ?, ?, ?, ?)", V0_ROWS)
+        conn.close()
+
+    def tables(self):
+        conn = sqlite3.connect(self.path)
+        try:
+            return {name for name, in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table'")}
+        finally:
+            conn.close()
+
+    def test_v0_rows_are_converted(self):
+        self.make_v0()
+        store = PortfolioStore(self.path)
+        self.assertEqual(store.load(), EXPECTED)
+        self.assertEqual([row.row_id for row in store.load()], [1, 3])
+        store.close()
+        self.assertNotIn("rows_v0", self.tables())
+
+        # 다시 열어도 그대로입니다.
+        store = PortfolioStore(self.path)
+        self.assertEqual(store.load(), EXPECTED)
+        self.assertEqual(store._conn.execute("PRAGMA user_version").fetchone()[0],
+                         SCHEMA_VERSION)
+        store.close()
+
+    def test_failed_migration_keeps_v0_rows(self):
+        self.make_v0()
+        with mock.patch("portfolio_store.parse_price", side_effect=ValueError("bad")):
+            with self.assertRaises(ValueError):
+                PortfolioStore(self.path)
+        # 이름 바꾸기와 새 테이블 만들기까지 모두 취소되어 버전 0 상태가 남습니다.
+        self.assertEqual(self.tables(), {"rows", "sqlite_sequence"})
+
+        store = PortfolioStore(self.path)
+        self.assertEqual(store.load(), EXPECTED)
+        store.close()
+
+    def test_leftover_rows_v0_is_recovered(self):
+        # 이전 버전이 rows를 rows_v0으로 바꾸고 새 rows를 만든 뒤 중단된 파일
+        self.make_v0("rows_v0")
+        conn = sqlite3.connect(self.path)
+        conn.execute("CREATE TABLE rows (id INTEGER PRIMARY KEY AUTOINCREMENT, ticker TEXT)")
+        conn.close()
+
+        store = PortfolioStore(self.path)
+        self.assertEqual(store.load(), EXPECTED)
+        store.close()
+        self.assertNotIn("rows_v0", self.tables())
+
+    def test_leftover_rows_v0_without_rows(self):
+        self.make_v0("rows_v0")
+        store = PortfolioStore(self.path)
+        self.assertEqual(store.load(), EXPECTED)
+        store.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+"""종가 시계열 파일(SeriesStore)과 시세 캐시 세대 번호 확인 테스트
+
+    python -m pytest -q test_series_store.py
+"""
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from price_cache import PriceCache
+from series_store import SeriesStore
+
+
+def make_bars(start, closes):
+    """start(ISO 날짜)부터 하루씩 늘어나는 (날짜, 시가, 고가, 저가, 종가, 거래량) 목록"""
+    first = np.datetime64(start, "D")
+    return [(str(first + i), close, close, close, close, 0) for i, close in enumerate(closes)]
+
+
+class SeriesStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "series.bin")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_save_and_reopen_keeps_series(self):
+        store = SeriesStore(self.path)
+        store.load_rows([("A.KS", "2024-01-02", 100.0), ("A.KS", "2024-01-03", 101.0),
+                         ("B.KS", "2024-01-02", 50.0)], generation=3)
+        store.merge("C.KS", make_bars("2024-01-05", [7.0, 8.0]))
+        store.merge("A.KS", make_bars("2024-01-03", [102.0, 103.0]))
+        expected = {symbol: store.series(symbol) for symbol in ("A.KS", "B.KS", "C.KS")}
+        store.save()
+
+        reopened = SeriesStore(self.path)
+        self.assertTrue(reopened.open())
+        self.assertEqual(reopened.generation, 3)
+        self.assertEqual(len(reopened), 3)
+        for symbol, (days, closes) in expected.items():
+            got_days, got_closes = reopened.series(symbol)
+            np.testing.assert_array_equal(got_days, days)
+            np.testing.assert_array_equal(got_closes, closes)
+        # 같은 날짜는 새 값으로 바뀝니다.
+        np.testing.assert_array_equal(reopened.series("A.KS")[1], [100.0, 102.0, 103.0])
+
+        days, closes, offsets = reopened.pack(["C.KS", "없음", "A.KS"])
+        self.assertEqual(offsets.tolist(), [0, 2, 2, 5])
+        self.assertEqual(closes.tolist(), [7.0, 8.0, 100.0, 102.0, 103.0])
+
+    def test_failed_save_keeps_series_in_memory(self):
+        store = SeriesStore(self.path)
+        store.load_rows([("A.KS", "2024-01-02", 100.0)], generation=1)
+        store.save()
+        store.merge("A.KS", make_bars("2024-01-03", [101.0]))
+        with mock.patch("series_store.os.replace", side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                store.save()
+        self.assertEqual(store.series("A.KS")[1].tolist(), [100.0, 101.0])
+        self.assertFalse(os.path.exists(self.path + ".tmp"))
+        # 파일은 이전 상태 그대로입니다.
+        reopened = SeriesStore(self.path)
+        self.assertTrue(reopened.open())
+        self.assertEqual(reopened.series("A.KS")[1].tolist(), [100.0])
+
+    def test_open_rejects_other_format(self):
+        with open(self.path, "wb") as file:
+            file.write(b"not a series file at all, just bytes")
+        self.assertFalse(SeriesStore(self.path).open())
+
+
+class PriceCacheGenerationTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "price_cache.db")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_series_follows_own_writes(self):
+        cache = PriceCache(self.path)
+        cache.store("A.KS", make_bars("2024-01-02", [1.0, 2.0]))
+        cache.pack(["A.KS"])
+        cache.store("A.KS", make_bars("2024-01-04", [3.0]))
+        self.assertEqual(cache.pack(["A.KS"])[1].tolist(), [1.0, 2.0, 3.0])
+        cache.close()
+
+        reopened = PriceCache(self.path)
+        with mock.patch.object(SeriesStore, "load_rows") as load_rows:
+            self.assertEqual(reopened.pack(["A.KS"])[1].tolist(), [1.0, 2.0, 3.0])
+        # 저장한 파일의 세대 번호가 캐시와 같으므로 다시 만들지 않고 메모리 매핑합니다.
+        load_rows.assert_not_called()
+        reopened.close()
+
+    def test_generation_bumped_by_other_writer_rebuilds_series(self):
+        first = PriceCache(self.path)
+        first.store("A.KS", make_bars("2024-01-02", [1.0]))
+        first.pack(["A.KS"])
+
+        # 다른 프로그램이 같은 캐시에 일봉을 저장하고 시계열 파일도 저장합니다.
+        other = PriceCache(self.path)
+        other.store("B.KS", make_bars("2024-01-02", [9.0]))
+        other.close()
+
+        first.store("A.KS", make_bars("2024-01-03", [2.0]))
+        days, closes, offsets = first.pack(["A.KS", "B.KS"])
+        self.assertEqual(closes.tolist(), [1.0, 2.0, 9.0])
+        first.close()
+
+        # 저장한 파일에는 다른 프로그램의 일봉도 들어 있어야 합니다.
+        series = SeriesStore(os.path.splitext(self.path)[0] + "_series.bin")
+        self.assertTrue(series.open())
+        self.assertEqual(series.generation, PriceCache(self.path).generation())
+        self.assertEqual(series.series("B.KS")[1].tolist(), [9.0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,169 @@
+"""포트폴리오 스냅샷 기록(SnapshotHistory) 저장/조회 확인 테스트
+
+    python -m pytest -q test_snapshot_history.py
+"""
+import os
+import tempfile
+import unittest
+from datetime import date, timedelta
+from unittest import mock
+
+import numpy as np
+
+from snapshot_history import _HEADER, BLOCK_SIZE, SnapshotHistory, day_number
+from stock_model import StockRow
+
+FIRST_DAY = date(2024, 1, 1)
+
+
+def make_rows(number):
+    """number번째 스냅샷의 행 목록 (블록마다 차이값 크기가 다르고, 중간에 종목이 추가됨)"""
+    rows = [StockRow("005930.KS", "삼성전자", 70000, 70000 + number, 70000 + number * 37),
+            # 차이값이 int32를 넘는 열
+            StockRow("BIG", "큰 값", 2 ** 40, None, 2 ** 40 - number * 2 ** 33)]
+    if number % 5:
+        rows.append(StockRow("035720.KS", "카카오", 14624, None, 15000 - number))
+    if number >= 40:
+        rows.append(StockRow("NEW.KS", "새 종목", number, number, number))
+    return rows
+
+
+def expected_snapshot(rows):
+    return {row.ticker: (row.price_1yr, row.price_6mo, row.current_price) for row in rows}
+
+
+class SnapshotHistoryTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "history.bin")
+        # 이틀 간격으로 블록 세 개에 걸친 스냅샷
+        self.days = [FIRST_DAY + timedelta(days=2 * number) for number in range(BLOCK_SIZE * 2 + 5)]
+        history = SnapshotHistory(self.path)
+        for number, day in enumerate(self.days):
+            history.append(make_rows(number), day)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_snapshot_round_trip_across_blocks(self):
+        history = SnapshotHistory(self.path)
+        self.assertEqual(len(history), len(self.days))
+        self.assertEqual(history.dates(), self.days)
+        for number, day in enumerate(self.days):
+            self.assertEqual(history.snapshot(day), (day, expected_snapshot(make_rows(number))))
+        # 스냅샷이 없는 날은 그 이전 가장 가까운 날의 스냅샷입니다.
+        between = self.days[BLOCK_SIZE] + timedelta(days=1)
+        self.assertEqual(history.snapshot(between),
+                         (self.days[BLOCK_SIZE], expected_snapshot(make_rows(BLOCK_SIZE))))
+        self.assertIsNone(history.snapshot(FIRST_DAY - timedelta(days=1)))
+
+    def test_series_across_blocks(self):
+        history = SnapshotHistory(self.path)
+        start, end = self.days[BLOCK_SIZE - 3], self.days[BLOCK_SIZE * 2 + 1]
+        days, values = history.series("005930.KS", start, end + timedelta(days=1))
+        numbers = range(BLOCK_SIZE - 3, BLOCK_SIZE * 2 + 2)
+        self.assertEqual(days.tolist(), [day_number(self.days[number]) for number in numbers])
+        self.assertEqual(values.tolist(), [[70000, 70000 + number, 70000 + number * 37]
+                                           for number in numbers])
+
+        # 기록되기 전과 빠진 날의 값은 0입니다.
+        days, values = history.series("NEW.KS")
+        self.assertEqual(len(days), len(self.days))
+        self.assertFalse(values[:40].any())
+        np.testing.assert_array_equal(values[40:, 2], np.arange(40, len(self.days)))
+        days, values = history.series("035720.KS", end=self.days[10])
+        self.assertEqual(values[:, 2].tolist(),
+                         [0 if number % 5 == 0 else 15000 - number for number in range(11)])
+        self.assertEqual(values[:, 1].tolist(), [0] * 11)
+
+        self.assertEqual(len(history.series("없음")[0]), len(self.days))
+        self.assertEqual(len(history.series("BIG", start=self.days[-1] + timedelta(days=1))[0]), 0)
+
+    def test_same_day_replaces_and_earlier_day_is_rejected(self):
+        history = SnapshotHistory(self.path)
+        last = self.days[-1]
+        replaced = [StockRow("005930.KS", "삼성전자", 1, 2, 3), StockRow("LATE.KS", "", 4, 5, 6)]
+        history.append(replaced, last)
+        self.assertEqual(len(history), len(self.days))
+        self.assertEqual(history.snapshot(last), (last, expected_snapshot(replaced)))
+        self.assertEqual(history.snapshot(self.days[-2])[1],
+                         expected_snapshot(make_rows(len(self.days) - 2)))
+        with self.assertRaises(ValueError):
+            history.append(replaced, self.days[-2])
+
+        # 다른 인스턴스(다른 프로그램)도 바뀐 파일을 읽습니다.
+        self.assertEqual(SnapshotHistory(self.path).snapshot(last), (last, expected_snapshot(replaced)))
+
+    def test_replace_last_day_of_full_block(self):
+        path = os.path.join(self.directory.name, "full.bin")
+        history = SnapshotHistory(path)
+        days = self.days[:BLOCK_SIZE]
+        for number, day in enumerate(days):
+            history.append(make_rows(number), day)
+        history.append(make_rows(99), days[-1])
+        history.append(make_rows(100), days[-1] + timedelta(days=1))
+        self.assertEqual(len(history), BLOCK_SIZE + 1)
+        self.assertEqual(history.snapshot(days[-1])[1], expected_snapshot(make_rows(99)))
+        self.assertEqual(history.snapshot(days[-2])[1], expected_snapshot(make_rows(BLOCK_SIZE - 2)))
+
+    def test_append_writes_only_at_end(self):
+        history = SnapshotHistory(self.path)
+        before = os.stat(self.path)
+        with open(self.path, "rb") as file:
+            head = file.read(before.st_size)
+        history.append(make_rows(100), self.days[-1] + timedelta(days=1))
+        after = os.stat(self.path)
+        # 같은 파일에 덧붙이며, 헤더를 뺀 지난 내용은 바뀌지 않습니다.
+        self.assertEqual(after.st_ino, before.st_ino)
+        with open(self.path, "rb") as file:
+            self.assertEqual(file.read(before.st_size)[_HEADER.size:], head[_HEADER.size:])
+        self.assertLess(after.st_size - before.st_size, before.st_size // 2)
+        self.assertEqual(SnapshotHistory(self.path).snapshot(self.days[-1] + timedelta(days=1))[1],
+                         expected_snapshot(make_rows(100)))
+
+    def test_free_space_is_compacted(self):
+        history = SnapshotHistory(self.path)
+        day = self.days[-1]
+        sizes = []
+        for number in range(200):
+            day += timedelta(days=1)
+            history.append(make_rows(number), day)
+            sizes.append(os.path.getsize(self.path))
+        # 파일 크기는 기록한 내용에 비례하며, 덧붙인 횟수만큼 빈 공간이 쌓이지 않습니다.
+        self.assertTrue(any(after < before for before, after in zip(sizes, sizes[1:])))
+        self.assertLess(max(sizes), sizes[-1] * 3)
+        reopened = SnapshotHistory(self.path)
+        self.assertEqual(len(reopened), len(self.days) + 200)
+        self.assertEqual(reopened.snapshot(day)[1], expected_snapshot(make_rows(199)))
+        self.assertEqual(reopened.snapshot(self.days[-1])[1],
+                         expected_snapshot(make_rows(len(self.days) - 1)))
+
+    def test_interrupted_append_keeps_history(self):
+        history = SnapshotHistory(self.path)
+        history.snapshot(self.days[-1])
+        # 새 블록을 쓴 뒤 헤더를 바꾸기 전에 실패한 경우
+        with mock.patch("snapshot_history.os.fsync", side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                history.append(make_rows(0), self.days[-1] + timedelta(days=1))
+        for reader in (history, SnapshotHistory(self.path)):
+            self.assertEqual(len(reader), len(self.days))
+            self.assertEqual(reader.snapshot(self.days[-1])[1],
+                             expected_snapshot(make_rows(len(self.days) - 1)))
+        # 남은 빈 공간 뒤에 다시 덧붙일 수 있습니다.
+        history.append(make_rows(0), self.days[-1] + timedelta(days=1))
+        self.assertEqual(len(SnapshotHistory(self.path)), len(self.days) + 1)
+
+    def test_failed_compaction_keeps_history(self):
+        history = SnapshotHistory(self.path)
+        history.snapshot(self.days[-1])
+        with mock.patch("snapshot_history._COMPACT_RATIO", -1), \
+                mock.patch("snapshot_history.os.replace", side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                history.append(make_rows(0), self.days[-1] + timedelta(days=1))
+        self.assertFalse(os.path.exists(self.path + ".tmp"))
+        self.assertEqual(len(history), len(self.days))
+        self.assertEqual(history.snapshot(self.days[-1])[1],
+                         expected_snapshot(make_rows(len(self.days) - 1)))
+
+if __name__ == "__main__":
+    unittest.main()
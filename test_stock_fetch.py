@@ -0,0 +1,136 @@
+"""시세 조회 실패를 없는 종목이나 받은 일봉으로 기록하지 않는지 확인하는 테스트
+
+    python -m pytest -q test_stock_fetch.py
+"""
+import os
+import tempfile
+import unittest
+from datetime import date, timedelta
+from functools import partial
+from unittest import mock
+
+from market_resolver import MarketResolver
+from price_cache import PriceCache
+from price_provider import PriceProvider, ProviderError, YFinanceProvider
+from stock_fetch import _fetch_batch_prices, history_start, probe_symbol, update_price_cache
+
+
+class StubTicker:
+    """start 요청과 period 요청에 각각 정해 둔 결과를 돌려주는 yfinance Ticker 대역"""
+
+    def __init__(self, results, symbol):
+        self.results = results
+        self.symbol = symbol
+
+    def history(self, start=None, period=None, raise_errors=False):
+        result = self.results["start" if start is not None else "period"]
+        if isinstance(result, Exception):
+            raise Exception(f"{self.symbol}: {result}")
+        return result
+
+
+class StubYFinance:
+    def __init__(self, **results):
+        self.results = results
+
+    def Ticker(self, symbol, session=None):
+        return StubTicker(self.results, symbol)
+
+
+def make_history(days):
+    import pandas as pd
+
+    index = pd.DatetimeIndex([pd.Timestamp(day) for day in days])
+    return pd.DataFrame({"Open": 1.0, "High": 1.0, "Low": 1.0, "Close": 1.0, "Volume": 0},
+                        index=index)
+
+
+class StubProvider(PriceProvider):
+    """심볼 -> 일봉 목록을 그대로 돌려주는 제공자"""
+
+    def __init__(self, bars):
+        self.bars = bars
+
+    def get_history(self, symbol, start=None, period="1y"):
+        return self.bars.get(symbol, [])
+
+
+class ProbeTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = PriceCache(os.path.join(self.directory.name, "price_cache.db"))
+        self.resolver_path = os.path.join(self.directory.name, "markets.db")
+
+    def tearDown(self):
+        self.cache.close()
+        self.directory.cleanup()
+
+    def resolver(self, yfinance):
+        provider = YFinanceProvider(session=object())
+        provider._yf = lambda: yfinance
+        return MarketResolver(self.resolver_path, partial(probe_symbol, self.cache, provider))
+
+    def test_timezone_failure_is_not_remembered_as_missing(self):
+        # 접속이 끊겨 시간대도 일봉도 받지 못한 경우
+        resolver = self.resolver(StubYFinance(
+            start=Exception("No timezone found, symbol may be delisted"),
+            period=Exception("No price data found, symbol may be delisted (period=5y)")))
+        with self.assertRaises(ProviderError):
+            resolver.resolve("005930")
+        self.assertIs(resolver.cached("005930"), False)
+        resolver.close()
+        reopened = MarketResolver(self.resolver_path, probe=None)
+        self.assertIs(reopened.cached("005930"), False)
+        reopened.close()
+        self.assertIsNone(self.cache.last_date("005930.KS"))
+
+    def test_yahoo_not_found_is_remembered(self):
+        resolver = self.resolver(StubYFinance(
+            start=Exception("No timezone found, symbol may be delisted"),
+            period=Exception("No data found, symbol may be delisted")))
+        self.assertIsNone(resolver.resolve("999999"))
+        self.assertIsNone(resolver.cached("999999"))
+        resolver.close()
+
+    def test_timezone_failure_falls_back_to_period(self):
+        start = history_start()
+        days = [start - timedelta(days=1), start, date.today()]
+        resolver = self.resolver(StubYFinance(
+            start=Exception("No timezone found, symbol may be delisted"),
+            period=make_history(days)))
+        self.assertTrue(resolver.resolve("005930").endswith((".KS", ".KQ")))
+        symbol = resolver.cached("005930")
+        # 요청한 시작일 이전의 일봉은 버립니다.
+        self.assertEqual(self.cache.pack([symbol])[0].tolist()[0],
+                         (start - date(1970, 1, 1)).days)
+        self.assertFalse(self.cache.needs_history(symbol, start))
+        resolver.close()
+
+
+class UpdatePriceCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = PriceCache(os.path.join(self.directory.name, "price_cache.db"))
+
+    def tearDown(self):
+        self.cache.close()
+        self.directory.cleanup()
+
+    def test_empty_result_is_not_recorded(self):
+        update_price_cache(self.cache, StubProvider({}), "A.KS")
+        self.assertTrue(self.cache.needs_history("A.KS", history_start()))
+        self.assertFalse(self.cache.is_fresh("A.KS"))
+
+    def test_batch_records_history_only_for_symbols_with_bars(self):
+        today = date.today().isoformat()
+        provider = StubProvider({"A.KS": [(today, 1.0, 1.0, 1.0, 1.0, 0)]})
+        _fetch_batch_prices(["A.KS", "B.KS"], self.cache, provider,
+                            resolver=mock.Mock(resolve_many=lambda tickers: {
+                                ticker: ticker for ticker in tickers}))
+        self.assertFalse(self.cache.needs_history("A.KS", history_start()))
+        self.assertTrue(self.cache.needs_history("B.KS", history_start()))
+        self.assertFalse(self.cache.is_fresh("B.KS"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+"""포트폴리오 평가금액, 평가손익, 비중 계산
+
+행마다 평가금액(수량 x 현재가)과 매입금액(수량 x 평균 단가)을 기억해 두고, 가격이나 보유 정보가
+바뀐 행만 이전 값을 빼고 새 값을 더해서 합계를 갱신합니다. 금액은 정수(원)이므로 여러 번 갱신해도
+오차가 쌓이지 않습니다. 비중은 합계가 바뀔 때마다 모든 행이 달라지므로 저장하지 않고 표시할 때 나눕니다.
+"""
+
+
+def row_amounts(row):
+    """행의 (평가금액, 매입금액)을 반환하는 함수 (계산할 수 없으면 None)"""
+    if not row.quantity:
+        return None, None
+    market_value = None if row.current_price is None else row.quantity * row.current_price
+    cost = None if row.avg_cost is None else row.quantity * row.avg_cost
+    return market_value, cost
+
+
+class PortfolioValuation:
+    """행 번호별 금액과 전체 합계를 유지하는 평가 엔진
+
+    - set_rows(rows): 전체를 다시 계산 (불러오기 등)
+    - update(rows): 바뀐 행만 반영 (가격 새로고침, 수정, 추가)
+    - remove(row_id): 삭제한 행을 합계에서 뺌
+    """
+
+    def __init__(self):
+        self._amounts = {}  # 행 번호 -> (평가금액, 매입금액)
+        self.market_value = 0   # 평가금액 합계
+        self.cost = 0           # 매입금액 합계
+        self.pnl = 0            # 평가손익 합계 (평가금액과 매입금액이 모두 있는 행)
+        self.pnl_cost = 0       # 평가손익을 계산한 행의 매입금액 합계 (수익률 계산용)
+
+    def _apply(self, amounts, sign):
+        market_value, cost = amounts
+        if market_value is not None:
+            self.market_value += sign * market_value
+        if cost is not None:
+            self.cost += sign * cost
+        if market_value is not None and cost is not None:
+            self.pnl += sign * (market_value - cost)
+            self.pnl_cost += sign * cost
+
+    def set_rows(self, rows):
+        self._amounts = {}
+        self.market_value = self.cost = self.pnl = self.pnl_cost = 0
+        self.update(rows)
+
+    def update(self, rows):
+        """추가되거나 값이 바뀐 행을 합계에 반영하는 함수 (바뀐 행 수에 비례)"""
+        for row in rows:
+            old = self._amounts.get(row.row_id)
+            if old is not None:
+                self._apply(old, -1)
+            new = row_amounts(row)
+            self._amounts[row.row_id] = new
+            self._apply(new, 1)
+
+    def remove(self, row_id):
+        old = self._amounts.pop(row_id, None)
+        if old is not None:
+            self._apply(old, -1)
+
+    def row_values(self, row):
+        """행의 평가금액, 평가손익, 수익률, 비중 딕셔너리를 반환하는 함수 (없는 값은 None)"""
+        market_value, cost = self._amounts.get(row.row_id, (None, None))
+        pnl = None if market_value is None or cost is None else market_value - cost
+        return {
+            "market_value": market_value,
+            "pnl": pnl,
+            "pnl_rate": pnl / cost if pnl is not None and cost else None,
+            "weight": (market_value / self.market_value
+                       if market_value is not None and self.market_value else None),
+        }
+
+    def totals(self):
+        """전체 평가금액, 매입금액, 평가손익, 수익률 딕셔너리를 반환하는 함수"""
+        return {
+            "market_value": self.market_value,
+            "cost": self.cost,
+            "pnl": self.pnl,
+            "pnl_rate": self.pnl / self.pnl_cost if self.pnl_cost else None,
+        }